@@ -918,7 +918,7 @@ class IfcImporter:
             verts = geometry["verts"]
             mesh["has_cartesian_point_offset"] = False
 
-            if geometry["faces"]:
+            if len(geometry["faces"]):
                 num_vertices = len(verts) // 3
                 total_faces = len(geometry["faces"])
                 loop_start = range(0, total_faces, 3)
@@ -942,9 +942,11 @@ class IfcImporter:
                 mesh.from_pydata(vertices, edges, [])
 
             mesh["ios_materials"] = geometry["materials"]
-            mesh["ios_material_ids"] = geometry["material_ids"]
+            mesh["ios_material_ids"] = geometry["material_ids"].tolist()
             self.meshes[mesh_name] = mesh
 
+        # Load all element rows in bulk rather than querying them one by one
+        self.file.prefetch([e.id() for e in elements], max_levels=1)
         total = len(elements)
         for i, element in enumerate(elements):
             if i % 250 == 0:
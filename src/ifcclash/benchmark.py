@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+# IfcClash - IFC-based clash detection.
+# Copyright (C) 2020-2024 Dion Moult <dion@thinkmoult.com>
+#
+# This file is part of IfcClash.
+#
+# IfcClash is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IfcClash is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IfcClash.  If not, see <http://www.gnu.org/licenses/>.
+
+# Benchmarks smart grouping on synthetic clash point clouds, e.g.:
+# python benchmark.py -n 10000 100000 1000000 -d 3
+# If scikit-learn is installed, OPTICS is also timed for small clouds.
+
+import time
+import argparse
+import numpy as np
+from ifcclash.cluster import cluster_points
+
+
+def create_points(total_points, seed=0):
+    # Clashes tend to bunch up around services and junctions in a building
+    rng = np.random.default_rng(seed)
+    size = np.cbrt(total_points) * 10
+    total_hotspots = max(1, total_points // 20)
+    hotspots = rng.uniform(0, size, (total_hotspots, 3))
+    hotspots[:, 2] = np.floor(hotspots[:, 2] / 3.5) * 3.5
+    total_clustered = total_points * 3 // 4
+    clustered = hotspots[rng.integers(0, total_hotspots, total_clustered)] + rng.normal(0, 1, (total_clustered, 3))
+    scattered = rng.uniform(0, size, (total_points - total_clustered, 3))
+    return np.concatenate((clustered, scattered))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark smart grouping of clashes")
+    parser.add_argument(
+        "-n", "--points", type=int, nargs="+", help="Sizes of point clouds", default=[1000, 10000, 100000, 1000000]
+    )
+    parser.add_argument("-d", "--distance", type=float, help="The maximum clustering distance", default=3.0)
+    parser.add_argument(
+        "--optics-limit", type=int, help="The largest cloud to also run with OPTICS, if available", default=20000
+    )
+    args = parser.parse_args()
+
+    try:
+        from sklearn.cluster import OPTICS
+    except ImportError:
+        OPTICS = None
+
+    print("{:>10} {:>12} {:>10} {:>12}".format("points", "grid (s)", "groups", "OPTICS (s)"))
+    for total_points in args.points:
+        points = create_points(total_points)
+        start = time.time()
+        labels = cluster_points(points, args.distance)
+        duration = time.time() - start
+        optics_duration = "-"
+        if OPTICS and total_points <= args.optics_limit:
+            start = time.time()
+            OPTICS(min_samples=2, max_eps=args.distance).fit_predict(points)
+            optics_duration = "{:.2f}".format(time.time() - start)
+        print("{:>10} {:>12.2f} {:>10} {:>12}".format(total_points, duration, labels.max() + 1, optics_duration))
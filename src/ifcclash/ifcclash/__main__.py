@@ -29,10 +29,26 @@ parser.add_argument("input", type=str, help="A JSON dataset describing a series
 parser.add_argument(
     "-o", "--output", type=str, help="The JSON diff file to output. Defaults to output.json", default="output.json"
 )
+parser.add_argument(
+    "-b",
+    "--baseline",
+    type=str,
+    help="A JSON file storing the previous run. If provided, only changed elements are clashed again",
+    default=None,
+)
+parser.add_argument(
+    "-j",
+    "--workers",
+    type=int,
+    help="The number of processes used to run clash sets in parallel. Defaults to 1",
+    default=1,
+)
 args = parser.parse_args()
 
 settings = ClashSettings()
 settings.output = args.output
+settings.baseline = args.baseline
+settings.workers = args.workers
 settings.logger = logging.getLogger("Clash")
 settings.logger.setLevel(logging.DEBUG)
 handler = logging.StreamHandler(sys.stdout)
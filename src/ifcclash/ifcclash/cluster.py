@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+
+# IfcClash - IFC-based clash detection.
+# Copyright (C) 2020-2024 Dion Moult <dion@thinkmoult.com>
+#
+# This file is part of IfcClash.
+#
+# IfcClash is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IfcClash is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IfcClash.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+
+# The maximum number of point pairs to compare at once, bounding memory usage
+PAIR_BUDGET = 2000000
+
+
+def cluster_points(points, max_distance):
+    """Groups points which are chained together by gaps of at most a distance
+
+    Two points are in the same cluster if they are within ``max_distance`` of
+    each other, or if they are both linked to a point in the same cluster.
+    Points without any neighbour within ``max_distance`` are not clustered.
+
+    Points are hashed into a grid of cells small enough that all points in a
+    cell are within ``max_distance`` of each other. Only neighbouring cells
+    are compared, and connected cells are then merged, so runtime scales
+    with the number of points rather than the number of point pairs.
+
+    :param points: An Nx3 array of points
+    :param max_distance: The maximum gap between two grouped points
+    :return: An array of N cluster labels, numbered from 0. Unclustered
+        points are labeled -1.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape((-1, 3))
+    total_points = len(points)
+    if not total_points:
+        return np.zeros(0, dtype=np.int64)
+    if max_distance <= 0:
+        return np.full(total_points, -1, dtype=np.int64)
+
+    # The diagonal of a cell is max_distance, so points in a cell are always connected
+    cell_size = max_distance / np.sqrt(3)
+    cells = np.floor((points - points.min(axis=0)) / cell_size).astype(np.int64)
+    cells, cell_indices, cell_counts = np.unique(cells, axis=0, return_inverse=True, return_counts=True)
+    cell_indices = cell_indices.reshape(-1)
+    total_cells = len(cells)
+
+    # Points sorted by cell, so each cell is a contiguous slice
+    order = np.argsort(cell_indices, kind="stable")
+    sorted_points = points[order]
+    cell_starts = np.concatenate(([0], np.cumsum(cell_counts)[:-1]))
+
+    dimensions = cells.max(axis=0) + 5
+    keys = cells[:, 0] * dimensions[1] * dimensions[2] + cells[:, 1] * dimensions[2] + cells[:, 2]
+
+    # Only half of the neighbourhood is needed, as each pair is symmetric
+    offsets = np.array([(x, y, z) for x in range(-2, 3) for y in range(-2, 3) for z in range(-2, 3)])
+    offsets = offsets[[tuple(o) > (0, 0, 0) for o in offsets]]
+
+    max_distance_sq = max_distance * max_distance
+    edges_a = []
+    edges_b = []
+    for offset in offsets:
+        neighbour_cells = cells + offset
+        in_bounds = np.all(neighbour_cells >= 0, axis=1)
+        neighbour_keys = (
+            neighbour_cells[:, 0] * dimensions[1] * dimensions[2]
+            + neighbour_cells[:, 1] * dimensions[2]
+            + neighbour_cells[:, 2]
+        )
+        # Cells from np.unique are sorted lexicographically, so keys are sorted too
+        positions = np.searchsorted(keys, neighbour_keys)
+        positions = np.minimum(positions, total_cells - 1)
+        exists = in_bounds & (keys[positions] == neighbour_keys)
+        a = np.nonzero(exists)[0]
+        if not len(a):
+            continue
+        b = positions[a]
+        is_connected = _get_connected_cell_pairs(sorted_points, cell_starts, cell_counts, a, b, max_distance_sq)
+        edges_a.append(a[is_connected])
+        edges_b.append(b[is_connected])
+
+    cell_labels = np.arange(total_cells)
+    if edges_a:
+        cell_labels = _get_connected_components(total_cells, np.concatenate(edges_a), np.concatenate(edges_b))
+
+    # A cluster needs at least two points
+    cluster_sizes = np.bincount(cell_labels, weights=cell_counts, minlength=total_cells)
+    cell_labels = np.where(cluster_sizes[cell_labels] > 1, cell_labels, -1)
+    is_clustered = cell_labels >= 0
+    labels = np.full(total_cells, -1, dtype=np.int64)
+    labels[is_clustered] = np.unique(cell_labels[is_clustered], return_inverse=True)[1].reshape(-1)
+    return labels[cell_indices]
+
+
+def _get_connected_cell_pairs(points, starts, counts, a, b, max_distance_sq):
+    results = np.zeros(len(a), dtype=bool)
+    totals = counts[a] * counts[b]
+    is_large = totals > PAIR_BUDGET
+    for i in np.nonzero(is_large)[0]:
+        a_points = points[starts[a[i]] : starts[a[i]] + counts[a[i]]]
+        b_points = points[starts[b[i]] : starts[b[i]] + counts[b[i]]]
+        chunk_size = max(1, PAIR_BUDGET // len(b_points))
+        for chunk in range(0, len(a_points), chunk_size):
+            delta = a_points[chunk : chunk + chunk_size, None, :] - b_points[None, :, :]
+            if np.any(np.einsum("ijk,ijk->ij", delta, delta) <= max_distance_sq):
+                results[i] = True
+                break
+
+    small = np.nonzero(~is_large)[0]
+    batches = np.cumsum(totals[small]) // PAIR_BUDGET
+    for batch in np.unique(batches):
+        pairs = small[batches == batch]
+        pair_totals = totals[pairs]
+        pair_indices = np.repeat(np.arange(len(pairs)), pair_totals)
+        k = np.arange(pair_totals.sum()) - np.repeat(np.cumsum(pair_totals) - pair_totals, pair_totals)
+        b_counts = counts[b[pairs]][pair_indices]
+        a_points = points[starts[a[pairs]][pair_indices] + k // b_counts]
+        b_points = points[starts[b[pairs]][pair_indices] + k % b_counts]
+        delta = a_points - b_points
+        is_near = np.einsum("ij,ij->i", delta, delta) <= max_distance_sq
+        results[pairs[np.unique(pair_indices[is_near])]] = True
+    return results
+
+
+def _get_connected_components(total_nodes, a, b):
+    # Label propagation with pointer jumping, converging in a few passes
+    labels = np.arange(total_nodes)
+    while True:
+        previous = labels.copy()
+        minimum = np.minimum(labels[a], labels[b])
+        np.minimum.at(labels, a, minimum)
+        np.minimum.at(labels, b, minimum)
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+        if np.array_equal(labels, previous):
+            return labels
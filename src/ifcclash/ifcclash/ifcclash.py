@@ -19,13 +19,25 @@
 # along with IfcClash.  If not, see <http://www.gnu.org/licenses/>.
 
 
+import os
 import json
 import time
+import hashlib
 import numpy as np
 import multiprocessing
 import ifcopenshell
 import ifcopenshell.geom
+import ifcopenshell.geom.cache
+import ifcopenshell.util.shape
 import ifcopenshell.util.selector
+from ifcclash.cluster import cluster_points
+
+# Set in the parent before forking so that workers inherit the shared tree
+_worker_clasher = None
+
+
+def _clash_task(task):
+    return _worker_clasher.run_clash_task(task)
 
 
 class Clasher:
@@ -39,47 +51,398 @@ class Clasher:
         self.tree = None
 
     def clash(self):
+        if self.settings.baseline:
+            baseline = self.load_baseline()
+            for clash_set in self.clash_sets:
+                baseline[clash_set["name"]] = self.process_incremental_clash_set(
+                    clash_set, baseline.get(clash_set["name"], None)
+                )
+            self.save_baseline(baseline)
+            return
         for clash_set in self.clash_sets:
-            self.process_clash_set(clash_set)
+            if clash_set.get("tile_size"):
+                self.process_tiled_clash_set(clash_set)
+        self.process_clash_sets([c for c in self.clash_sets if not c.get("tile_size")])
+
+    def process_clash_sets(self, clash_sets):
+        """Clashes multiple clash sets against a single shared tree
+
+        Each source (a file, mode and selector) is only tessellated once, and
+        each element only added once to the tree no matter how many clash
+        sets or sources it belongs to. The clash sets are then run in a pool
+        of ``settings.workers`` forked processes which inherit the tree. When
+        there are more workers than clash sets, the A group of clash sets
+        between two different groups is also split across workers.
+        """
+        if not clash_sets:
+            return
+        start = time.time()
+        self.tree = ifcopenshell.geom.tree()
+        self.source_elements = {}
+        tree_elements = {}
+        for clash_set in clash_sets:
+            for source in clash_set["a"] + (clash_set.get("b", None) or []):
+                source["ifc"] = self.load_ifc(source["file"])
+                key = self.get_source_key(source)
+                if key in self.source_elements:
+                    continue
+                elements = self.get_elements(source["ifc"], source.get("mode", None), source.get("selector", None))
+                self.source_elements[key] = elements
+                added = tree_elements.setdefault(source["file"], set())
+                self.tessellate(source["ifc"], elements - added)
+                added.update(elements)
+        self.logger.info(f"Shared tree finished {time.time() - start}")
+
+        workers = max(1, self.settings.workers or 1)
+        if "fork" not in multiprocessing.get_all_start_methods():
+            workers = 1
+
+        tasks = []
+        for i, clash_set in enumerate(clash_sets):
+            total_chunks = 1
+            if clash_set.get("b", None) and len(clash_sets) < workers:
+                total_chunks = -(-workers // len(clash_sets))
+            tasks.extend((i, chunk, total_chunks) for chunk in range(total_chunks))
+
+        self.task_clash_sets = clash_sets
+        results = [{} for clash_set in clash_sets]
+        durations = [0.0 for clash_set in clash_sets]
+        if workers == 1 or len(tasks) == 1:
+            task_results = map(self.run_clash_task, tasks)
+        else:
+            global _worker_clasher
+            _worker_clasher = self
+            pool = multiprocessing.get_context("fork").Pool(min(workers, len(tasks)))
+            task_results = pool.imap_unordered(_clash_task, tasks)
+
+        try:
+            for i, processed_results, duration in task_results:
+                results[i].update(processed_results)
+                durations[i] += duration
+        finally:
+            if workers > 1 and len(tasks) > 1:
+                pool.close()
+                pool.join()
+                _worker_clasher = None
+
+        for clash_set, processed_results, duration in zip(clash_sets, results, durations):
+            clash_set["clashes"] = processed_results
+            self.logger.info(f"Clash set {clash_set['name']} finished {duration}")
+            self.logger.info(f"Found clashes: {len(processed_results.keys())}")
+        self.tree = None
+        self.source_elements = {}
+        self.task_clash_sets = []
+
+    def run_clash_task(self, task):
+        i, chunk, total_chunks = task
+        start = time.time()
+        clash_set = self.task_clash_sets[i]
+        self.groups = {}
+        groups = {"a": clash_set["a"]}
+        if clash_set.get("b", None):
+            groups["b"] = clash_set["b"]
+        for name, sources in groups.items():
+            self.create_group(name)
+            for source in sources:
+                elements = self.source_elements[self.get_source_key(source)]
+                self.groups[name]["elements"].update({e.GlobalId: e for e in elements})
+        if total_chunks > 1:
+            a_elements = self.groups["a"]["elements"]
+            global_ids = sorted(a_elements.keys())[chunk::total_chunks]
+            self.groups["a"]["elements"] = {g: a_elements[g] for g in global_ids}
+        b = "b" if "b" in groups else "a"
+        processed_results = {}
+        if self.groups["a"]["elements"] and self.groups[b]["elements"]:
+            processed_results = self.process_results(self.clash_groups(clash_set, "a", b))
+        return i, processed_results, time.time() - start
+
+    def get_source_key(self, source):
+        return (source["file"], source.get("mode", None) or "a", source.get("selector", None) or "")
+
+    def load_baseline(self):
+        if not os.path.exists(self.settings.baseline):
+            return {}
+        with open(self.settings.baseline, "r", encoding="utf-8") as baseline_file:
+            return json.load(baseline_file)
+
+    def save_baseline(self, baseline):
+        with open(self.settings.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(baseline, baseline_file)
+
+    def process_incremental_clash_set(self, clash_set, previous=None):
+        """Clashes only elements which changed since a previous run
+
+        Each element's geometry is fingerprinted by hashing its placement,
+        representation and openings. Elements with a new fingerprint are
+        tessellated, along with any unchanged elements in the other group
+        whose previous bounding box is within clash distance of them. Only
+        those are clashed, and previous clashes between unchanged elements
+        are carried forward.
+
+        A report of new, resolved and unchanged clashes is stored in the
+        clash set.
+
+        :param clash_set: The clash set to process
+        :param previous: The baseline returned by a previous run of this
+            clash set, or None to clash everything.
+        :return: The new baseline of this clash set, holding fingerprints,
+            bounding boxes and clashes.
+        """
+        parameters = {
+            k: clash_set.get(k, None) for k in ("mode", "tolerance", "check_all", "allow_touching", "clearance")
+        }
+        if previous and previous["parameters"] != parameters:
+            self.logger.info("Clash parameters changed, ignoring the baseline")
+            previous = None
+        if not previous:
+            previous = {"fingerprints": {}, "bounds": {}, "clashes": {}}
+
+        groups = {"a": clash_set["a"]}
+        if "b" in clash_set and clash_set["b"]:
+            groups["b"] = clash_set["b"]
+        b = "b" if "b" in groups else "a"
+
+        start = time.time()
+        self.hasher = ifcopenshell.geom.cache.structural_hasher()
+        fingerprints = {}
+        changed = {}
+        for name, sources in groups.items():
+            fingerprints[name] = {}
+            changed[name] = []
+            previous_fingerprints = previous["fingerprints"].get(name, {})
+            for source in sources:
+                source["ifc"] = self.load_ifc(source["file"])
+                source_changed = set()
+                for element in self.get_elements(source["ifc"], source.get("mode", None), source.get("selector", None)):
+                    fingerprint = self.get_fingerprint(element)
+                    fingerprints[name][element.GlobalId] = fingerprint
+                    if previous_fingerprints.get(element.GlobalId, None) != fingerprint:
+                        source_changed.add(element)
+                changed[name].append(source_changed)
+        self.logger.info(f"Fingerprints finished {time.time() - start}")
 
-    def process_clash_set(self, clash_set):
         self.tree = ifcopenshell.geom.tree()
-        self.create_group("a")
-        for source in clash_set["a"]:
-            source["ifc"] = self.load_ifc(source["file"])
-            self.add_collision_objects("a", source["ifc"], source.get("mode", None), source.get("selector", None))
+        bounds = {}
+        for name, sources in groups.items():
+            self.create_group(name)
+            bounds[name] = {}
+            for source, elements in zip(sources, changed[name]):
+                self.logger.info(f"Changed elements in {source['file']}: {len(elements)}")
+                self.add_collision_objects(name, source["ifc"], elements=elements, bounds=bounds[name])
+
+        # Unchanged elements keep their previous bounds
+        changed_ids = {e.GlobalId for elements in changed.values() for source in elements for e in source}
+        for name in groups.keys():
+            for global_id, bbox in previous["bounds"].get(name, {}).items():
+                if global_id in fingerprints[name] and global_id not in changed_ids:
+                    bounds[name][global_id] = bbox
+
+        # Add unchanged elements near changed elements of the other group
+        margin = self.get_clash_margin(clash_set)
+        for name, other in (("a", b), (b, "a")) if b == "b" else (("a", "a"),):
+            changed_bounds = [
+                bounds[other][e.GlobalId] for s in changed[other] for e in s if e.GlobalId in bounds[other]
+            ]
+            for source, elements in zip(groups[name], changed[name]):
+                candidates = self.get_nearby_elements(source["ifc"], elements, bounds[name], changed_bounds, margin)
+                candidates -= set(self.groups[name]["elements"].values())
+                self.add_collision_objects(name, source["ifc"], elements=candidates)
+
+        processed_results = {}
+        if self.groups["a"]["elements"] and self.groups[b]["elements"]:
+            processed_results = self.process_results(self.clash_groups(clash_set, "a", b))
+
+        for key, clash in previous["clashes"].items():
+            a_global_id, b_global_id = clash["a_global_id"], clash["b_global_id"]
+            if a_global_id in changed_ids or b_global_id in changed_ids:
+                continue
+            elif a_global_id in fingerprints["a"] and b_global_id in fingerprints[b]:
+                processed_results.setdefault(key, clash)
 
+        clash_set["clashes"] = processed_results
+        clash_set["report"] = {
+            "new": sorted(set(processed_results) - set(previous["clashes"])),
+            "resolved": sorted(set(previous["clashes"]) - set(processed_results)),
+            "unchanged": sorted(set(processed_results) & set(previous["clashes"])),
+        }
+        self.logger.info(
+            "Found clashes: {} ({} new, {} resolved, {} unchanged)".format(
+                len(processed_results),
+                len(clash_set["report"]["new"]),
+                len(clash_set["report"]["resolved"]),
+                len(clash_set["report"]["unchanged"]),
+            )
+        )
+        self.tree = None
+        return {"parameters": parameters, "fingerprints": fingerprints, "bounds": bounds, "clashes": processed_results}
+
+    def get_fingerprint(self, element):
+        values = [getattr(element, "ObjectPlacement", None), getattr(element, "Representation", None)]
+        for rel in getattr(element, "HasOpenings", []) or []:
+            values.append(rel.RelatedOpeningElement.ObjectPlacement)
+            values.append(rel.RelatedOpeningElement.Representation)
+        digest = hashlib.sha1()
+        for value in values:
+            digest.update(self.hasher.get_hash(value) if value else b"-")
+        return digest.hexdigest()
+
+    def get_nearby_elements(self, ifc_file, elements, bounds, target_bounds, margin):
+        """Finds elements whose bounding box is within a margin of any target bounding box
+
+        :param elements: Elements to exclude, typically those which changed
+        :param bounds: Bounding boxes of candidate elements keyed by GlobalId
+        :param target_bounds: A list of (min, max) bounding boxes
+        :return: A set of elements
+        """
+        if not target_bounds:
+            return set()
+        excluded = {e.GlobalId for e in elements}
+        global_ids = [g for g in bounds.keys() if g not in excluded]
+        if not global_ids:
+            return set()
+        candidate_bounds = np.array([bounds[g] for g in global_ids], dtype=np.float64)
+        targets = np.array(target_bounds, dtype=np.float64)
+        is_nearby = np.zeros(len(global_ids), dtype=bool)
+        for target_min, target_max in targets:
+            is_nearby |= np.all(candidate_bounds[:, 0] <= target_max + margin, axis=1) & np.all(
+                candidate_bounds[:, 1] >= target_min - margin, axis=1
+            )
+        results = set()
+        for global_id in np.array(global_ids)[is_nearby]:
+            try:
+                results.add(ifc_file.by_guid(global_id))
+            except RuntimeError:
+                # The element belongs to another source of the group
+                pass
+        return results
+
+    def process_clash_set(self, clash_set):
+        if clash_set.get("tile_size"):
+            return self.process_tiled_clash_set(clash_set)
+        self.process_clash_sets([clash_set])
+
+    def process_tiled_clash_set(self, clash_set):
+        """Clashes a clash set tile by tile to limit peak memory usage
+
+        The project extents are divided into a grid of square tiles in plan
+        of ``tile_size`` metres. Each element is assigned to every tile its
+        bounding box overlaps, with B elements expanded by the clash distance
+        so that clashes across tile boundaries are still found. For each tile
+        only its elements are tessellated into a fresh tree, which is
+        discarded once the tile is clashed. Results are merged and
+        deduplicated across tiles.
+
+        Elements spanning multiple tiles are tessellated once per tile, in
+        exchange for memory scaling with the density of a tile rather than
+        the size of the whole federated model.
+        """
+        tile_size = float(clash_set["tile_size"])
+        margin = self.get_clash_margin(clash_set)
+
+        groups = {"a": clash_set["a"]}
         if "b" in clash_set and clash_set["b"]:
-            self.create_group("b")
-            for source in clash_set["b"]:
+            groups["b"] = clash_set["b"]
+
+        # First pass: only keep the bounding boxes of elements in memory
+        bounds = {}
+        for name, sources in groups.items():
+            for i, source in enumerate(sources):
                 source["ifc"] = self.load_ifc(source["file"])
-                self.add_collision_objects("b", source["ifc"], source.get("mode", None), source.get("selector", None))
-            b = "b"
-        else:
-            b = "a"
+                elements = self.get_elements(source["ifc"], source.get("mode", None), source.get("selector", None))
+                bounds[(name, i)] = self.get_element_bounds(source["ifc"], elements)
+
+        all_bounds = [b for source_bounds in bounds.values() for b in source_bounds.values()]
+        if not all_bounds:
+            clash_set["clashes"] = {}
+            self.logger.info("Found clashes: 0")
+            return
+        origin = np.min([b[0] for b in all_bounds], axis=0)
+
+        # Map each tile to the elements of each source which overlap it
+        tiles = {}
+        for (name, i), source_bounds in bounds.items():
+            expansion = margin if name == "b" or len(groups) == 1 else 0.0
+            for element_id, (bbox_min, bbox_max) in source_bounds.items():
+                start = np.floor((bbox_min[0:2] - expansion - origin[0:2]) / tile_size).astype(int)
+                end = np.floor((bbox_max[0:2] + expansion - origin[0:2]) / tile_size).astype(int)
+                for x in range(start[0], end[0] + 1):
+                    for y in range(start[1], end[1] + 1):
+                        tiles.setdefault((x, y), {}).setdefault((name, i), []).append(element_id)
+        del bounds
+
+        b = "b" if "b" in groups else "a"
+        processed_results = {}
+        for tile_index, (tile, tile_sources) in enumerate(sorted(tiles.items())):
+            if not any(n == "a" for n, i in tile_sources.keys()) or not any(n == b for n, i in tile_sources.keys()):
+                continue
+            self.logger.info(f"Clashing tile {tile} ({tile_index + 1}/{len(tiles)})")
+            self.tree = ifcopenshell.geom.tree()
+            for name in groups.keys():
+                self.create_group(name)
+            for (name, i), element_ids in tile_sources.items():
+                ifc_file = groups[name][i]["ifc"]
+                self.add_collision_objects(name, ifc_file, elements={ifc_file.by_id(e) for e in element_ids})
+            processed_results.update(self.process_results(self.clash_groups(clash_set, "a", b)))
+            self.tree = None
+            self.groups = {}
+
+        clash_set["clashes"] = processed_results
+        self.logger.info(f"Found clashes: {len(processed_results.keys())}")
+
+    def get_clash_margin(self, clash_set):
+        if clash_set["mode"] == "clearance":
+            return float(clash_set["clearance"])
+        # A small fuzz so that touching elements are always in a common tile
+        return 1e-3
+
+    def get_element_bounds(self, ifc_file, elements):
+        """Tessellates elements to find their world axis aligned bounding boxes
 
+        :return: A dictionary of element IDs mapped to (min, max) numpy arrays.
+        """
+        bounds = {}
+        if not elements:
+            return bounds
+        start = time.time()
+        self.settings.logger.info("Calculating element bounds")
+        iterator = ifcopenshell.geom.iterator(
+            self.geom_settings, ifc_file, multiprocessing.cpu_count(), include=elements
+        )
+        if iterator.initialize():
+            while True:
+                shape = iterator.get()
+                vertices = ifcopenshell.util.shape.get_shape_vertices(shape, shape.geometry)
+                if len(vertices):
+                    bounds[shape.id] = (vertices.min(axis=0), vertices.max(axis=0))
+                if not iterator.next():
+                    break
+        self.settings.logger.info(f"Element bounds finished {time.time() - start}")
+        return bounds
+
+    def clash_groups(self, clash_set, a, b):
         mode = clash_set["mode"]
         if mode == "intersection":
-            results = self.tree.clash_intersection_many(
-                list(self.groups["a"]["elements"].values()),
+            return self.tree.clash_intersection_many(
+                list(self.groups[a]["elements"].values()),
                 list(self.groups[b]["elements"].values()),
                 tolerance=clash_set["tolerance"],
                 check_all=clash_set["check_all"],
             )
         elif mode == "collision":
-            results = self.tree.clash_collision_many(
-                list(self.groups["a"]["elements"].values()),
+            return self.tree.clash_collision_many(
+                list(self.groups[a]["elements"].values()),
                 list(self.groups[b]["elements"].values()),
                 allow_touching=clash_set["allow_touching"],
             )
         elif mode == "clearance":
-            results = self.tree.clash_clearance_many(
-                list(self.groups["a"]["elements"].values()),
+            return self.tree.clash_clearance_many(
+                list(self.groups[a]["elements"].values()),
                 list(self.groups[b]["elements"].values()),
                 clearance=clash_set["clearance"],
                 check_all=clash_set["check_all"],
             )
 
+    def process_results(self, results):
         processed_results = {}
         for result in results:
             element1 = result.a
@@ -97,8 +460,7 @@ class Clasher:
                 "p2": list(result.p2),
                 "distance": result.distance,
             }
-        clash_set["clashes"] = processed_results
-        self.logger.info(f"Found clashes: {len(processed_results.keys())}")
+        return processed_results
 
     def create_group(self, name):
         self.logger.info(f"Creating group {name}")
@@ -114,9 +476,7 @@ class Clasher:
         self.settings.logger.info(f"Loading finished {time.time() - start}")
         return ifc
 
-    def add_collision_objects(self, name, ifc_file, mode=None, selector=None):
-        start = time.time()
-        self.settings.logger.info("Creating iterator")
+    def get_elements(self, ifc_file, mode=None, selector=None):
         if not mode or mode == "a" or not selector:
             elements = set(ifc_file.by_type("IfcElement"))
             elements -= set(ifc_file.by_type("IfcFeatureElement"))
@@ -126,24 +486,42 @@ class Clasher:
             elements -= set(ifcopenshell.util.selector.filter_elements(ifc_file, selector))
         elif mode == "i":
             elements = set(ifcopenshell.util.selector.filter_elements(ifc_file, selector))
+        return elements
+
+    def add_collision_objects(self, name, ifc_file, mode=None, selector=None, elements=None, bounds=None):
+        start = time.time()
+        self.settings.logger.info("Creating iterator")
+        if elements is None:
+            elements = self.get_elements(ifc_file, mode, selector)
+        if not elements:
+            return
+        self.logger.info(f"Adding objects {name}")
+        self.tessellate(ifc_file, elements, bounds=bounds)
+        start = time.time()
+        self.groups[name]["elements"].update({e.GlobalId: e for e in elements})
+        self.logger.info(f"Element metadata finished {time.time() - start}")
+
+    def tessellate(self, ifc_file, elements, bounds=None):
+        if not elements:
+            return
+        start = time.time()
         iterator = ifcopenshell.geom.iterator(
             self.geom_settings, ifc_file, multiprocessing.cpu_count(), include=elements
         )
         self.settings.logger.info(f"Iterator creation finished {time.time() - start}")
 
         start = time.time()
-        self.logger.info(f"Adding objects {name}")
         assert iterator.initialize()
         while True:
             self.tree.add_element(iterator.get())
             shape = iterator.get()
+            if bounds is not None:
+                vertices = ifcopenshell.util.shape.get_shape_vertices(shape, shape.geometry)
+                if len(vertices):
+                    bounds[shape.guid] = [vertices.min(axis=0).tolist(), vertices.max(axis=0).tolist()]
             if not iterator.next():
                 break
         self.logger.info(f"Tree finished {time.time() - start}")
-        start = time.time()
-        self.groups[name]["elements"].update({e.GlobalId: e for e in elements})
-        self.logger.info(f"Element metadata finished {time.time() - start}")
-        start = time.time()
 
     def export(self):
         if len(self.settings.output) > 4 and self.settings.output[-4:] == ".bcf":
@@ -186,7 +564,6 @@ class Clasher:
             json.dump(clash_sets, clashes_file, indent=4)
 
     def smart_group_clashes(self, clash_sets, max_clustering_distance):
-        from sklearn.cluster import OPTICS
         from collections import defaultdict
 
         count_of_input_clashes = 0
@@ -213,7 +590,10 @@ class Clasher:
 
             positions = []
             for clash in clashes.values():
-                positions.append(clash["position"])
+                if "position" in clash:
+                    positions.append(clash["position"])
+                else:
+                    positions.append((np.array(clash["p1"]) + np.array(clash["p2"])) / 2)
 
             data = np.array(positions)
 
@@ -224,9 +604,7 @@ class Clasher:
             else:
                 max_distance_between_grouped_points = 3
 
-            model = OPTICS(min_samples=2, max_eps=max_distance_between_grouped_points)
-            model.fit_predict(data)
-            pred = model.fit_predict(data)
+            pred = cluster_points(data, max_distance_between_grouped_points)
 
             # Insert the smart groups into the clashes
             if len(pred) == len(clashes.values()):
@@ -280,3 +658,7 @@ class ClashSettings:
     def __init__(self):
         self.logger = None
         self.output = "clashes.json"
+        # A JSON file to persist fingerprints and results between runs, enabling incremental clashing
+        self.baseline = None
+        # The number of processes used to run clash sets in parallel
+        self.workers = 1
@@ -0,0 +1,202 @@
+# IfcClash - IFC-based clash detection.
+# Copyright (C) 2020-2024 Dion Moult <dion@thinkmoult.com>
+#
+# This file is part of IfcClash.
+#
+# IfcClash is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IfcClash is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IfcClash.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import numpy as np
+import ifcopenshell
+import ifcopenshell.api
+import ifcopenshell.geom.cache
+from ifcclash.ifcclash import Clasher, ClashSettings
+
+
+def create_model(positions):
+    """Creates a model with a 1m x 0.2m x 1m wall at each named XY position"""
+    ifc = ifcopenshell.api.run("project.create_file")
+    ifcopenshell.api.run("root.create_entity", ifc, ifc_class="IfcProject")
+    ifcopenshell.api.run("unit.assign_unit", ifc)
+    model = ifcopenshell.api.run("context.add_context", ifc, context_type="Model")
+    body = ifcopenshell.api.run(
+        "context.add_context",
+        ifc,
+        context_type="Model",
+        context_identifier="Body",
+        target_view="MODEL_VIEW",
+        parent=model,
+    )
+    for name, position in positions.items():
+        wall = ifcopenshell.api.run("root.create_entity", ifc, ifc_class="IfcWall", name=name)
+        move(ifc, wall, position)
+        representation = ifcopenshell.api.run(
+            "geometry.add_wall_representation", ifc, context=body, length=1.0, height=1.0, thickness=0.2
+        )
+        ifcopenshell.api.run("geometry.assign_representation", ifc, product=wall, representation=representation)
+    return ifc
+
+
+def move(ifc, wall, position):
+    matrix = np.eye(4)
+    matrix[0:2, 3] = position
+    ifcopenshell.api.run("geometry.edit_object_placement", ifc, product=wall, matrix=matrix)
+
+
+def get_wall(ifc, name):
+    return [e for e in ifc.by_type("IfcWall") if e.Name == name][0]
+
+
+def get_clasher(**kwargs):
+    settings = ClashSettings()
+    settings.logger = logging.getLogger("Clash")
+    for key, value in kwargs.items():
+        setattr(settings, key, value)
+    return Clasher(settings)
+
+
+def get_clash_set(name, a, b, **kwargs):
+    return {"name": name, "mode": "collision", "allow_touching": False, "a": a, "b": b, **kwargs}
+
+
+def get_fingerprint(element):
+    clasher = get_clasher()
+    # Hashes are memoised per run, so each fingerprint uses a new hasher
+    clasher.hasher = ifcopenshell.geom.cache.structural_hasher()
+    return clasher.get_fingerprint(element)
+
+
+def get_names(*ifcs):
+    return {e.GlobalId: e.Name for ifc in ifcs for e in ifc.by_type("IfcWall")}
+
+
+def get_pairs(names, keys):
+    """Converts clash keys of GlobalIds into sorted pairs of wall names, as GlobalIds don't contain hyphens"""
+    return {tuple(sorted(names[g] for g in key.split("-"))) for key in keys}
+
+
+def create_models(tmp_path):
+    ifc_a = create_model({"A1": (0.0, 0.0), "A2": (2.0, 0.0), "A3": (4.0, 0.0), "A4": (6.0, 0.0)})
+    ifc_b = create_model({"B1": (0.5, 0.1), "B2": (2.5, 0.5), "B3": (4.0, 0.1), "B4": (6.0, 3.0)})
+    ifc_a.write(str(tmp_path / "a.ifc"))
+    ifc_b.write(str(tmp_path / "b.ifc"))
+
+
+def get_clash_sets(tmp_path, **kwargs):
+    clash_sets = [
+        get_clash_set("Collision", [], [], **kwargs),
+        get_clash_set("Clearance", [], [], mode="clearance", clearance=1.0, check_all=False, **kwargs),
+    ]
+    # Sources are not shared between clash sets, as the clasher stores the loaded file in them
+    for clash_set in clash_sets:
+        clash_set["a"].append({"file": str(tmp_path / "a.ifc")})
+        clash_set["b"].append({"file": str(tmp_path / "b.ifc")})
+    return clash_sets
+
+
+def get_results(clash_sets):
+    return {c["name"]: {k: v["type"] for k, v in c["clashes"].items()} for c in clash_sets}
+
+
+class TestIncrementalClash:
+    def test_classifying_clashes_against_a_baseline(self, tmp_path):
+        # Each B wall overlaps the A wall of the same number
+        ifc_a = create_model({"A1": (10.0, 0.0), "A2": (20.0, 0.0), "A3": (30.0, 0.0)})
+        ifc_b = create_model({"B1": (10.5, 0.1), "B2": (20.5, 0.1), "B3": (30.5, 0.1)})
+        ifc_a.write(str(tmp_path / "a.ifc"))
+        ifc_b.write(str(tmp_path / "b.ifc"))
+        baseline = str(tmp_path / "baseline.json")
+        names = get_names(ifc_a, ifc_b)
+
+        clasher = get_clasher(baseline=baseline)
+        clasher.clash_sets = [
+            get_clash_set("Set", [{"file": str(tmp_path / "a.ifc")}], [{"file": str(tmp_path / "b.ifc")}])
+        ]
+        clasher.clash()
+        report = clasher.clash_sets[0]["report"]
+        assert get_pairs(names, report["new"]) == {("A1", "B1"), ("A2", "B2"), ("A3", "B3")}
+        assert report["resolved"] == report["unchanged"] == []
+
+        # B1 moves from A1 to A2, B2 is deleted, and B3 is untouched
+        move(ifc_b, get_wall(ifc_b, "B1"), (20.5, 0.1))
+        ifcopenshell.api.run("root.remove_product", ifc_b, product=get_wall(ifc_b, "B2"))
+        ifc_b.write(str(tmp_path / "b2.ifc"))
+
+        clasher = get_clasher(baseline=baseline)
+        clasher.clash_sets = [
+            get_clash_set("Set", [{"file": str(tmp_path / "a.ifc")}], [{"file": str(tmp_path / "b2.ifc")}])
+        ]
+        clasher.clash()
+        clash_set = clasher.clash_sets[0]
+        report = clash_set["report"]
+        assert get_pairs(names, report["new"]) == {("A2", "B1")}
+        assert get_pairs(names, report["resolved"]) == {("A1", "B1"), ("A2", "B2")}
+        assert get_pairs(names, report["unchanged"]) == {("A3", "B3")}
+
+        # The incremental results match clashing everything from scratch
+        clasher = get_clasher()
+        clasher.clash_sets = [
+            get_clash_set("Set", [{"file": str(tmp_path / "a.ifc")}], [{"file": str(tmp_path / "b2.ifc")}])
+        ]
+        clasher.clash()
+        assert set(clasher.clash_sets[0]["clashes"]) == set(clash_set["clashes"])
+
+    def test_fingerprinting_placements_representations_and_openings(self):
+        ifc = create_model({"A1": (0.0, 0.0), "A2": (0.0, 0.0)})
+        wall1, wall2 = get_wall(ifc, "A1"), get_wall(ifc, "A2")
+        # Identical geometry has an identical fingerprint, regardless of the element
+        assert get_fingerprint(wall1) == get_fingerprint(wall2)
+
+        fingerprint = get_fingerprint(wall1)
+        move(ifc, wall1, (1.0, 0.0))
+        assert get_fingerprint(wall1) != fingerprint
+
+        fingerprint = get_fingerprint(wall1)
+        wall1.Representation.Representations[0].Items[0].Depth = 2.0
+        assert get_fingerprint(wall1) != fingerprint
+
+        fingerprint = get_fingerprint(wall1)
+        opening = ifcopenshell.api.run("root.create_entity", ifc, ifc_class="IfcOpeningElement")
+        ifcopenshell.api.run("void.add_opening", ifc, opening=opening, element=wall1)
+        assert get_fingerprint(wall1) != fingerprint
+
+
+class TestParallelClash:
+    def test_matching_a_single_worker(self, tmp_path):
+        create_models(tmp_path)
+        results = []
+        # More workers than clash sets also splits the A group of each clash set across workers
+        for workers in (1, 2, 4):
+            clasher = get_clasher(workers=workers)
+            clasher.clash_sets = get_clash_sets(tmp_path)
+            clasher.clash()
+            results.append(get_results(clasher.clash_sets))
+        assert results[0]["Collision"]
+        assert results[0]["Clearance"]
+        assert results[0] == results[1] == results[2]
+
+
+class TestTiledClash:
+    def test_matching_an_untiled_clash(self, tmp_path):
+        create_models(tmp_path)
+        results = []
+        # Tiles are smaller than the walls, so clashes cross tile boundaries
+        for kwargs in ({}, {"tile_size": 0.75}, {"tile_size": 5.0}):
+            clasher = get_clasher()
+            clasher.clash_sets = get_clash_sets(tmp_path, **kwargs)
+            clasher.clash()
+            results.append(get_results(clasher.clash_sets))
+        assert results[0]["Collision"]
+        assert results[0]["Clearance"]
+        assert results[0] == results[1] == results[2]
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+# IfcDiff - Compare IFCs
+# Copyright (C) 2020, 2021 Dion Moult <dion@thinkmoult.com>
+#
+# This file is part of IfcDiff.
+#
+# IfcDiff is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IfcDiff is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IfcDiff.  If not, see <http://www.gnu.org/licenses/>.
+
+# Compares the sequential diff with the hashing and multiprocess diff, e.g.:
+# python benchmark.py old.ifc new.ifc -r "attributes geometry property" -j 8
+
+import time
+import argparse
+import multiprocessing
+import ifcopenshell
+from ifcdiff import IfcDiff
+
+
+def run(old, new, relationships, **kwargs):
+    start = time.time()
+    ifc_diff = IfcDiff(old, new, relationships, **kwargs)
+    ifc_diff.diff()
+    return ifc_diff, time.time() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark IfcDiff modes against each other")
+    parser.add_argument("old", type=str, help="The old IFC file")
+    parser.add_argument("new", type=str, help="The new IFC file")
+    parser.add_argument(
+        "-r",
+        "--relationships",
+        type=str,
+        help="A list of space-separated relationships to check",
+        default="attributes geometry",
+    )
+    parser.add_argument(
+        "-j",
+        "--processes",
+        type=int,
+        help="The number of processes for the parallel runs. Defaults to the CPU count",
+        default=multiprocessing.cpu_count(),
+    )
+    args = parser.parse_args()
+
+    old = ifcopenshell.open(args.old)
+    new = ifcopenshell.open(args.new)
+    relationships = args.relationships.split()
+
+    modes = [
+        ("sequential", {}),
+        ("hashing", {"use_hashing": True}),
+        ("parallel", {"processes": args.processes}),
+        ("hashing + parallel", {"use_hashing": True, "processes": args.processes}),
+    ]
+
+    results = []
+    for name, kwargs in modes:
+        print("# Running {} diff ...".format(name))
+        ifc_diff, duration = run(old, new, relationships, **kwargs)
+        results.append((name, duration, set(ifc_diff.change_register.keys())))
+
+    baseline = results[0]
+    print("# Results")
+    for name, duration, changed in results:
+        print(
+            "{:<20} {:>10.2f}s {:>8.2f}x {:>8} changed{}".format(
+                name,
+                duration,
+                baseline[1] / duration if duration else 0,
+                len(changed),
+                "" if changed == baseline[2] else " (MISMATCH)",
+            )
+        )
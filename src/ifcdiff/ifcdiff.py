@@ -21,6 +21,7 @@
 # This can be packaged with `pyinstaller --onefile --clean --icon=icon.ico ifcdiff.py`
 
 import time
+import hashlib
 import json
 import logging
 import argparse
@@ -28,6 +29,7 @@ import numpy as np
 import multiprocessing
 import ifcopenshell
 import ifcopenshell.geom
+import ifcopenshell.geom.cache
 import ifcopenshell.util.element
 import ifcopenshell.util.selector
 import ifcopenshell.util.placement
@@ -36,6 +38,13 @@ import ifcopenshell.util.representation
 from deepdiff import DeepDiff
 from ordered_set import OrderedSet
 
+# The IfcDiff instance shared with forked worker processes
+_worker_diff = None
+
+
+def _diff_chunk(global_ids):
+    return _worker_diff.diff_common_elements(global_ids)
+
 
 class IfcDiff:
     """Main IfcDiff application
@@ -56,6 +65,15 @@ class IfcDiff:
     :param filter_elements: An IFC filter query if you only want to compare a
         subset of elements. For example: ``IfcWall`` to only compare walls.
     :type filter_elements: string
+    :param use_hashing: True if you want to first compute a content hash of
+        the attributes, relationships, and representation of each element in
+        both models, and only diff the elements whose hashes differ. This is
+        much faster for large models where most elements are unchanged.
+    :type use_hashing: bool
+    :param processes: The number of processes to distribute the hashing and
+        diffing of common elements over. Parallel processing requires the
+        "fork" start method, otherwise elements are diffed sequentially.
+    :type processes: int
 
     Example::
 
@@ -67,7 +85,16 @@ class IfcDiff:
         ifc_diff.export()
     """
 
-    def __init__(self, old, new, relationships=None, is_shallow=True, filter_elements=None):
+    def __init__(
+        self,
+        old,
+        new,
+        relationships=None,
+        is_shallow=True,
+        filter_elements=None,
+        use_hashing=False,
+        processes=1,
+    ):
         self.old = old
         self.new = new
         self.change_register = {}
@@ -76,6 +103,9 @@ class IfcDiff:
         self.precision = 1e-4
         self.is_shallow = is_shallow
         self.filter_elements = filter_elements
+        self.use_hashing = use_hashing
+        self.processes = processes
+        self.hasher = ifcopenshell.geom.cache.structural_hasher()
 
     def diff(self):
         logging.disable(logging.CRITICAL)
@@ -115,47 +145,13 @@ class IfcDiff:
         print(" - {} item(s) were deleted".format(len(self.deleted_elements)))
         print(" - {} item(s) are common to both models".format(total_same_elements))
 
-        total_diffed = 0
-
-        potential_old_changes = []
-        potential_new_changes = []
-
-        should_check_attributes = False
-        should_check_geometry = False
-        should_check_other = False
-
-        for relationship in self.relationships:
-            if relationship == "attributes":
-                should_check_attributes = True
-            elif relationship == "geometry":
-                should_check_geometry = True
-            else:
-                should_check_other = True
-
-        for global_id in same_elements:
-            total_diffed += 1
-            if total_diffed % 250 == 0:
-                print("{}/{} diffed ...".format(total_diffed, total_same_elements), end="\r", flush=True)
-            old = self.old.by_id(global_id)
-            new = self.new.by_id(global_id)
-            if should_check_attributes:
-                if self.diff_element(old, new) and self.is_shallow:
-                    continue
-            if should_check_other:
-                if self.diff_element_relationships(old, new) and self.is_shallow:
-                    continue
-            if should_check_geometry:
-                # Option 1: check everything heuristically using the iterator (seems faster)
-                if ifcopenshell.util.representation.get_representation(new, "Model", "Body", "MODEL_VIEW"):
-                    potential_old_changes.append(old)
-                    potential_new_changes.append(new)
-                # Option 2: check first using Python, then fallback to iterator (twice as slow)
-                # diff = self.diff_element_basic_geometry(old, new)
-                # if diff:
-                #    self.change_register.setdefault(new.GlobalId, {}).update({"geometry_changed": True})
-                # else:
-                #    potential_old_changes.append(old)
-                #    potential_new_changes.append(new)
+        potential_changes = []
+        for change_register, geometry_changes in self.diff_all_common_elements(same_elements):
+            for global_id, changes in change_register.items():
+                self.change_register.setdefault(global_id, {}).update(changes)
+            potential_changes.extend(geometry_changes)
+        potential_old_changes = [self.old.by_id(global_id) for global_id in potential_changes]
+        potential_new_changes = [self.new.by_id(global_id) for global_id in potential_changes]
 
         print(" - {} item(s) had simple changes".format(len(self.change_register.keys())))
 
@@ -184,6 +180,140 @@ class IfcDiff:
 
         logging.disable(logging.NOTSET)
 
+    def diff_all_common_elements(self, global_ids):
+        """Diffs elements common to both models, in parallel if possible
+
+        :return: A generator of ``(change_register, geometry_changes)`` tuples
+            where geometry changes are GlobalIds which need a detailed geometry
+            check using the iterator.
+        """
+        global _worker_diff
+        global_ids = list(global_ids)
+        total = len(global_ids)
+        processes = min(self.processes or 1, max(1, total // 250))
+        if processes > 1 and "fork" not in multiprocessing.get_all_start_methods():
+            print(" - Parallel diffing is not supported on this platform, falling back to a single process")
+            processes = 1
+
+        chunk_size = 250
+        if processes > 1:
+            chunk_size = max(250, min(5000, total // (processes * 4) + 1))
+        chunks = [global_ids[i : i + chunk_size] for i in range(0, total, chunk_size)]
+
+        total_diffed = 0
+        if processes > 1:
+            # Forked workers inherit the already loaded models, so they never need to be pickled
+            _worker_diff = self
+            try:
+                with multiprocessing.get_context("fork").Pool(processes) as pool:
+                    for chunk, result in zip(chunks, pool.imap(_diff_chunk, chunks)):
+                        total_diffed += len(chunk)
+                        print("{}/{} diffed ...".format(total_diffed, total), end="\r", flush=True)
+                        yield result
+            finally:
+                _worker_diff = None
+        else:
+            for chunk in chunks:
+                result = self.diff_common_elements(chunk)
+                total_diffed += len(chunk)
+                print("{}/{} diffed ...".format(total_diffed, total), end="\r", flush=True)
+                yield result
+
+    def diff_common_elements(self, global_ids):
+        """Diffs a batch of elements common to both models
+
+        Changes are collected in a separate change register so that the
+        results of worker processes can be merged by the main process.
+
+        :return: A tuple of ``(change_register, geometry_changes)``
+        """
+        should_check_attributes = "attributes" in self.relationships
+        should_check_geometry = "geometry" in self.relationships
+        other_relationships = [r for r in self.relationships if r not in ("attributes", "geometry")]
+
+        main_change_register = self.change_register
+        self.change_register = {}
+        geometry_changes = []
+        try:
+            for global_id in global_ids:
+                old = self.old.by_id(global_id)
+                new = self.new.by_id(global_id)
+                if self.use_hashing:
+                    old_hashes = self.get_element_hashes(old)
+                    new_hashes = self.get_element_hashes(new)
+                    changes = {k for k, v in old_hashes.items() if new_hashes[k] != v}
+                    if not changes:
+                        continue
+                    relationships = [r for r in other_relationships if r in changes]
+                else:
+                    changes = self.relationships
+                    relationships = other_relationships
+                if should_check_attributes and "attributes" in changes:
+                    if self.diff_element(old, new) and self.is_shallow:
+                        continue
+                if relationships:
+                    if self.diff_element_relationships(old, new, relationships) and self.is_shallow:
+                        continue
+                if should_check_geometry and "geometry" in changes:
+                    # Option 1: check everything heuristically using the iterator (seems faster)
+                    if ifcopenshell.util.representation.get_representation(new, "Model", "Body", "MODEL_VIEW"):
+                        geometry_changes.append(global_id)
+                    # Option 2: check first using Python, then fallback to iterator (twice as slow)
+                    # diff = self.diff_element_basic_geometry(old, new)
+                    # if diff:
+                    #    self.change_register.setdefault(new.GlobalId, {}).update({"geometry_changed": True})
+                    # else:
+                    #    geometry_changes.append(global_id)
+            return self.change_register, geometry_changes
+        finally:
+            self.change_register = main_change_register
+
+    def get_element_hashes(self, element):
+        """Computes a content hash for each checked aspect of an element
+
+        Hashes are independent of STEP ids, so the same element in two models
+        has the same hashes if its content is identical. Differing hashes do
+        not necessarily mean a change, as values are not compared within the
+        diff precision, so a detailed diff must still follow.
+
+        :return: A dictionary of relationship names (including "attributes"
+            and "geometry") mapped to hashes.
+        """
+        hashes = {}
+        for relationship in self.relationships:
+            if relationship == "attributes":
+                value = [a for a in element if not isinstance(a, (ifcopenshell.entity_instance, tuple))]
+            elif relationship == "geometry":
+                value = (
+                    self.get_hash(getattr(element, "ObjectPlacement", None)),
+                    self.get_hash(getattr(element, "Representation", None)),
+                    sorted([o.RelatedOpeningElement.GlobalId for o in getattr(element, "HasOpenings", []) or []]),
+                    sorted([o.RelatedFeatureElement.GlobalId for o in getattr(element, "HasProjections", []) or []]),
+                )
+            elif relationship == "type":
+                value = getattr(ifcopenshell.util.element.get_type(element), "GlobalId", None)
+            elif relationship == "property":
+                value = ifcopenshell.util.element.get_psets(element)
+                for pset in value.values():
+                    pset.pop("id", None)
+                value = sorted((k, sorted(v.items(), key=lambda x: x[0])) for k, v in value.items())
+            elif relationship == "container":
+                value = getattr(ifcopenshell.util.element.get_container(element), "GlobalId", None)
+            elif relationship == "aggregate":
+                value = getattr(ifcopenshell.util.element.get_aggregate(element), "GlobalId", None)
+            elif relationship == "classification":
+                attribute = "ItemReference" if element.wrapped_data.file.schema == "IFC2X3" else "Identification"
+                value = [getattr(r, attribute) for r in ifcopenshell.util.classification.get_references(element)]
+            else:
+                continue
+            hashes[relationship] = hashlib.sha1(repr(value).encode()).digest()
+        return hashes
+
+    def get_hash(self, element):
+        if element is None:
+            return None
+        return self.hasher.get_hash(element)
+
     def summarise_shapes(self, ifc, elements):
         shapes = {}
         iterator = ifcopenshell.geom.iterator(
@@ -275,10 +405,11 @@ class IfcDiff:
             self.change_register.setdefault(new.GlobalId, {}).update({"attributes_changed": True})
             return True
 
-    def diff_element_relationships(self, old, new):
-        if not self.relationships:
+    def diff_element_relationships(self, old, new, relationships=None):
+        relationships = self.relationships if relationships is None else relationships
+        if not relationships:
             return
-        for relationship in self.relationships:
+        for relationship in relationships:
             if relationship == "type":
                 old_type = ifcopenshell.util.element.get_type(old)
                 new_type = ifcopenshell.util.element.get_type(new)
@@ -418,6 +549,18 @@ if __name__ == "__main__":
         help='A list of space-separated relationships, chosen from "type", "property", "container", "aggregate", "classification"',
         default="",
     )
+    parser.add_argument(
+        "--hash",
+        action="store_true",
+        help="Only diff elements whose content hashes differ. This is much faster for large models.",
+    )
+    parser.add_argument(
+        "-j",
+        "--processes",
+        type=int,
+        help="The number of processes to diff common elements with. Defaults to 1",
+        default=1,
+    )
     args = parser.parse_args()
 
     print("# IFC Diff")
@@ -431,7 +574,7 @@ if __name__ == "__main__":
     print("# Loading finished in {:.2f} seconds".format(time.time() - start))
     start = time.time()
 
-    ifc_diff = IfcDiff(old, new, args.relationships.split())
+    ifc_diff = IfcDiff(old, new, args.relationships.split(), use_hashing=args.hash, processes=args.processes)
     ifc_diff.diff()
 
     print("# Diff finished in {:.2f} seconds".format(time.time() - start))
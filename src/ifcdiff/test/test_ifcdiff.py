@@ -0,0 +1,73 @@
+# IfcDiff - Compare IFCs
+# Copyright (C) 2020, 2021 Dion Moult <dion@thinkmoult.com>
+#
+# This file is part of IfcDiff.
+#
+# IfcDiff is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IfcDiff is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IfcDiff.  If not, see <http://www.gnu.org/licenses/>.
+
+import ifcopenshell
+import ifcopenshell.api
+import ifcopenshell.guid
+from ifcdiff import IfcDiff
+
+
+def create_models(filepath):
+    ifc = ifcopenshell.api.run("project.create_file")
+    project = ifcopenshell.api.run("root.create_entity", ifc, ifc_class="IfcProject")
+    storeys = [ifcopenshell.api.run("root.create_entity", ifc, ifc_class="IfcBuildingStorey", name=n) for n in "AB"]
+    ifcopenshell.api.run("aggregate.assign_object", ifc, products=storeys, relating_object=project)
+    wall_types = [ifcopenshell.api.run("root.create_entity", ifc, ifc_class="IfcWallType", name=n) for n in "AB"]
+    # Enough walls to be diffed in several chunks
+    walls = [ifc.createIfcWall(ifcopenshell.guid.new(), Name=f"Wall {i}") for i in range(1000)]
+    ifcopenshell.api.run("spatial.assign_container", ifc, products=walls, relating_structure=storeys[0])
+    ifcopenshell.api.run("type.assign_type", ifc, related_objects=walls, relating_type=wall_types[0])
+    ifc.write(str(filepath))
+    old, new = ifcopenshell.open(filepath), ifcopenshell.open(filepath)
+
+    walls = sorted(new.by_type("IfcWall"), key=lambda e: e.Name)
+    for wall in walls[0:100]:
+        wall.Name += " (Renamed)"
+    relating_type = [e for e in new.by_type("IfcWallType") if e.Name == "B"][0]
+    ifcopenshell.api.run("type.assign_type", new, related_objects=walls[100:150], relating_type=relating_type)
+    relating_structure = [e for e in new.by_type("IfcBuildingStorey") if e.Name == "B"][0]
+    ifcopenshell.api.run(
+        "spatial.assign_container", new, products=walls[150:200], relating_structure=relating_structure
+    )
+    for wall in walls[200:210]:
+        ifcopenshell.api.run("root.remove_product", new, product=wall)
+    for i in range(10):
+        new.createIfcWall(ifcopenshell.guid.new(), Name=f"New wall {i}")
+    return old, new
+
+
+class TestIfcDiff:
+    def test_diffing_in_parallel(self, tmp_path):
+        old, new = create_models(tmp_path / "model.ifc")
+        results = []
+        for use_hashing in (False, True):
+            for processes in (1, 4):
+                ifc_diff = IfcDiff(
+                    old, new, ["attributes", "type", "container"], use_hashing=use_hashing, processes=processes
+                )
+                ifc_diff.diff()
+                results.append((ifc_diff.change_register, ifc_diff.added_elements, ifc_diff.deleted_elements))
+
+        change_register, added_elements, deleted_elements = results[0]
+        assert len(change_register) == 200
+        assert sum(c == {"attributes_changed": True} for c in change_register.values()) == 100
+        assert sum(c == {"type_changed": True} for c in change_register.values()) == 50
+        assert sum(c == {"container_changed": True} for c in change_register.values()) == 50
+        assert len(added_elements) == len(deleted_elements) == 10
+        for result in results[1:]:
+            assert result == results[0]
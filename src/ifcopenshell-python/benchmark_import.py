@@ -0,0 +1,58 @@
+# IfcOpenShell - IFC toolkit and geometry engine
+# Copyright (C) 2024 Thomas Krijnen <thomas@aecgeeks.com>
+#
+# This file is part of IfcOpenShell.
+#
+# IfcOpenShell is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IfcOpenShell is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IfcOpenShell.  If not, see <http://www.gnu.org/licenses/>.
+
+# Measures the time to import the Python modules of ifcopenshell, excluding
+# the compiled wrapper, using python -X importtime, e.g.:
+# python benchmark_import.py -n 10 -s "import ifcopenshell, ifcopenshell.api"
+
+import sys
+import argparse
+import subprocess
+
+
+def get_import_time(statement):
+    """Returns the import time in seconds of the ifcopenshell modules imported by a statement"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True, check=True
+    )
+    duration = 0.0
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_time, cumulative, module = line[len("import time:") :].split("|")
+        name = module.strip()
+        if name == "ifcopenshell.ifcopenshell_wrapper":
+            duration -= int(cumulative) / 1e6
+        # Nested imports are indented, and are already included in their importer's cumulative time
+        elif name.split(".")[0] == "ifcopenshell" and module == f" {name}":
+            duration += int(cumulative) / 1e6
+    return duration
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the import time of ifcopenshell")
+    parser.add_argument("-n", "--runs", type=int, help="Number of runs", default=10)
+    parser.add_argument(
+        "-s", "--statement", type=str, help="The import statement", default="import ifcopenshell, ifcopenshell.api"
+    )
+    args = parser.parse_args()
+
+    durations = sorted(get_import_time(args.statement) for i in range(args.runs))
+    print("{:>10} {:>10} {:>10}".format("min (s)", "median (s)", "max (s)"))
+    print("{:>10.3f} {:>10.3f} {:>10.3f}".format(durations[0], durations[len(durations) // 2], durations[-1]))
@@ -0,0 +1,81 @@
+# IfcOpenShell - IFC toolkit and geometry engine
+# Copyright (C) 2024 Thomas Krijnen <thomas@aecgeeks.com>
+#
+# This file is part of IfcOpenShell.
+#
+# IfcOpenShell is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IfcOpenShell is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IfcOpenShell.  If not, see <http://www.gnu.org/licenses/>.
+
+# Benchmarks purging the subgraphs of many products with tessellated geometry, e.g.:
+# python benchmark_remove.py -n 100 1000 -f 1000
+# Each product has its own IfcPolygonalFaceSet, and all products share an
+# owner history and a representation context with the project, which must
+# survive the purge.
+
+import time
+import argparse
+import ifcopenshell
+import ifcopenshell.guid
+import ifcopenshell.util.element
+
+
+def create_model(total_products, total_faces):
+    f = ifcopenshell.file(schema="IFC4")
+    owner = f.createIfcOwnerHistory()
+    context = f.createIfcGeometricRepresentationContext()
+    f.createIfcProject(ifcopenshell.guid.new(), owner, RepresentationContexts=[context])
+    products = []
+    for i in range(total_products):
+        coordinates = [(float(x), float(y), 0.0) for x in range(total_faces + 1) for y in range(2)]
+        faces = [
+            f.createIfcIndexedPolygonalFace((j * 2 + 1, j * 2 + 2, j * 2 + 4, j * 2 + 3)) for j in range(total_faces)
+        ]
+        face_set = f.createIfcPolygonalFaceSet(f.createIfcCartesianPointList3D(coordinates), None, faces)
+        representation = f.createIfcShapeRepresentation(context, "Body", "Tessellation", [face_set])
+        products.append(
+            f.createIfcWall(
+                ifcopenshell.guid.new(),
+                owner,
+                Representation=f.createIfcProductDefinitionShape(None, None, [representation]),
+            )
+        )
+    return f, products
+
+
+def remove_deep2(f, products):
+    for product in products:
+        ifcopenshell.util.element.remove_deep2(f, product)
+
+
+def remove_subgraphs(f, products):
+    ifcopenshell.util.element.remove_subgraphs(f, products)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark purging the subgraphs of many products")
+    parser.add_argument("-n", "--products", type=int, nargs="+", help="Numbers of products", default=[100, 1000])
+    parser.add_argument("-f", "--faces", type=int, help="Number of faces per product", default=1000)
+    args = parser.parse_args()
+
+    print("{:>10} {:>10} {:>18} {:>22}".format("products", "faces", "remove_deep2 (s)", "remove_subgraphs (s)"))
+    for total_products in args.products:
+        durations = []
+        for function in (remove_deep2, remove_subgraphs):
+            f, products = create_model(total_products, args.faces)
+            start = time.time()
+            function(f, products)
+            durations.append(time.time() - start)
+            assert len(f.by_type("IfcIndexedPolygonalFace")) == 0
+            assert len(f.by_type("IfcOwnerHistory")) == 1
+            assert len(f.by_type("IfcGeometricRepresentationContext")) == 1
+        print("{:>10} {:>10} {:>18.2f} {:>22.2f}".format(total_products, args.faces, *durations))
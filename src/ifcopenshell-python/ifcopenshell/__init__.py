@@ -58,6 +58,8 @@ import os
 import sys
 import zipfile
 import tempfile
+import importlib
+import types
 from pathlib import Path
 from typing import Optional, Union
 
@@ -96,12 +98,45 @@ __all__ = [
     "sqlite_entity",
     "stream",
     "stream_entity",
+    "indexed_stream",
 ]
 
-try:
-    from .stream import stream, stream_entity
-except:
-    pass
+# Submodules and optional features are only loaded on first access, to keep
+# the import of ifcopenshell fast for short-lived scripts.
+_lazy_submodules = {"alignment", "api", "draw", "express", "geom", "guid", "template", "util", "validate"}
+_lazy_attributes = {"stream": "stream", "stream_entity": "stream", "indexed_stream": "stream"}
+
+
+def __getattr__(name: str):
+    if name in _lazy_submodules:
+        return importlib.import_module(f".{name}", __name__)
+    elif name in _lazy_attributes:
+        _import_lazy_attributes(_lazy_attributes[name])
+        if name in globals():
+            return globals()[name]
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+
+def _import_lazy_attributes(module_name: str):
+    module = importlib.import_module(f".{module_name}", __name__)
+    # Importing a submodule binds it to the package, shadowing its attribute of the same name
+    for name, attribute_module_name in _lazy_attributes.items():
+        if attribute_module_name == module_name and hasattr(module, name):
+            globals()[name] = getattr(module, name)
+    return module
+
+
+class _package(types.ModuleType):
+    def __setattr__(self, name, value):
+        # The import system binds submodules to the package after loading them, even with
+        # import ifcopenshell.stream, so keep the lazy attribute of the same name instead
+        if isinstance(value, types.ModuleType) and _lazy_attributes.get(name) == name and hasattr(value, name):
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _package
+
 
 READ_ERROR = ifcopenshell_wrapper.file_open_status.READ_ERROR
 NO_HEADER = ifcopenshell_wrapper.file_open_status.NO_HEADER
@@ -160,6 +195,7 @@ def open(path: Union[os.PathLike, str], format: Optional[str] = None, should_str
     if format == ".ifcSQLite":
         return sqlite(path)
     if should_stream:
+        stream = _import_lazy_attributes("stream").stream
         return stream(path)
     f = ifcopenshell_wrapper.open(str(path.absolute()))
     if f.good():
@@ -38,8 +38,7 @@ Also see how to `create a simple model from scratch
 <https://docs.ifcopenshell.org/ifcopenshell-python/code_examples.html#create-a-simple-model-from-scratch>`_.
 """
 
-import json
-import numpy
+import sys
 import inspect
 import importlib
 import ifcopenshell
@@ -146,6 +145,17 @@ ARGUMENTS_DEPRECATION = {
 }
 
 
+def __getattr__(name: str):
+    # API modules are only loaded on first access, e.g. ifcopenshell.api.root
+    if not name.startswith("_"):
+        try:
+            return importlib.import_module(f"{__name__}.{name}")
+        except ModuleNotFoundError as e:
+            if e.name != f"{__name__}.{name}":
+                raise
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+
 CACHED_USECASE_CLASSES: dict[str, Callable] = {}
 CACHED_USECASES: dict[str, Callable] = {}
 
@@ -284,6 +294,11 @@ def extract_docs(module, usecase):
 
 
 def serialise_settings(settings):
+    import json
+
+    # A value can only be an array if numpy has already been loaded
+    numpy = sys.modules.get("numpy")
+
     def serialise_entity_instance(entity):
         return {"cast_type": "entity_instance", "value": entity.id(), "Name": getattr(entity, "Name", None)}
 
@@ -291,7 +306,7 @@ def serialise_settings(settings):
     for key, value in settings.items():
         if isinstance(value, ifcopenshell.entity_instance):
             vcs_settings[key] = serialise_entity_instance(value)
-        elif isinstance(value, numpy.ndarray):
+        elif numpy and isinstance(value, numpy.ndarray):
             vcs_settings[key] = {"cast_type": "ndarray", "value": value.tolist()}
         elif isinstance(value, list) and value and isinstance(value[0], ifcopenshell.entity_instance):
             vcs_settings[key] = [serialise_entity_instance(i) for i in value]
@@ -344,7 +359,6 @@ def wrap_usecase(usecase_path, usecase):
 
 def wrap_usecases(path, name):
     """This developer feature wraps an API module's usecases with listeners."""
-    import sys
     import pkgutil
 
     module_name = name.split(".")[-1]
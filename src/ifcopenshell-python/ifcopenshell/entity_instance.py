@@ -99,6 +99,32 @@ for nm in ifcopenshell_wrapper.schema_names():
     register_schema_attributes(schema)
 
 
+# Resolving the function which calculates a derived attribute means walking
+# the supertypes of the entity in the generated rules module of the schema,
+# which is done once per entity and attribute rather than for every access.
+@functools.lru_cache(maxsize=None)
+def _get_derived_attribute_function(fq_name: str, name: str) -> Union[Callable[["entity_instance"], Any], None]:
+    schema_name, entity_name = fq_name.split(".")
+    try:
+        rules = importlib.import_module(f"ifcopenshell.express.rules.{schema_name}")
+    except:
+        import os
+        current_dir_files = {fn.lower(): fn for fn in os.listdir('.')}
+        schema_path = current_dir_files.get(schema_name.lower() + '.exp')
+        fn = schema_path[:-4] + '.py'
+        if not os.path.exists(fn):
+            subprocess.run([sys.executable, "-m", "ifcopenshell.express.rule_compiler", schema_path, fn], check=True)
+            time.sleep(1.)
+        rules = importlib.import_module(schema_name)
+
+    decl = ifcopenshell_wrapper.schema_by_name(schema_name).declaration_by_name(entity_name)
+    while decl:
+        fn = getattr(rules, f"calc_{decl.name()}_{name}", None)
+        if fn:
+            return fn
+        decl = decl.supertype()
+
+
 class entity_instance:
     """Represents an entity (wall, slab, property, etc) of an IFC model
 
@@ -191,29 +217,9 @@ class entity_instance:
             return vs
 
         # derived attribute perhaps?
-        schema_name = self.wrapped_data.is_a(True).split(".")[0]
-        try:
-            rules = importlib.import_module(f"ifcopenshell.express.rules.{schema_name}")
-        except:
-            import os
-            current_dir_files = {fn.lower(): fn for fn in os.listdir('.')}
-            schema_path = current_dir_files.get(schema_name.lower() + '.exp')
-            fn = schema_path[:-4] + '.py'
-            if not os.path.exists(fn):
-                subprocess.run([sys.executable, "-m", "ifcopenshell.express.rule_compiler", schema_path, fn], check=True)
-                time.sleep(1.)
-            rules = importlib.import_module(schema_name)
-
-        def yield_supertypes():
-            decl = ifcopenshell_wrapper.schema_by_name(schema_name).declaration_by_name(self.is_a())
-            while decl:
-                yield decl.name()
-                decl = decl.supertype()
-
-        for sty in yield_supertypes():
-            fn = getattr(rules, f"calc_{sty}_{name}", None)
-            if fn:
-                return fn(self)
+        fn = _get_derived_attribute_function(self.wrapped_data.is_a(True), name)
+        if fn:
+            return fn(self)
 
         if attr_cat != FORWARD:
             raise AttributeError(
@@ -1,7 +1,13 @@
 import os
 import re
 import ast
+import sys
+import time
+import marshal
+import hashlib
+import functools
 import collections
+import multiprocessing
 import ifcopenshell
 from dataclasses import dataclass
 from codegen import indent
@@ -62,127 +68,248 @@ def fix_type(v):
     return v
 
 
-def run(f, logger):
-    from _pytest import assertion
-
-    if hasattr(logger, "set_instance"):
-        # when using the json logger, we notify it of the relevant instance
-        pre_annotate_instance = lambda instance: logger.set_state('instance', instance) if hasattr(logger, 'set_state') else None
-        post_annotate_instance = lambda instance: instance
-        pre_annotate_attribute = lambda attribute: logger.set_state('attribute', attribute) if hasattr(logger, 'set_state') else None
-        post_annotate_attribute = lambda attribute: None
+def type_name(ty):
+    if isinstance(ty, ifcopenshell.ifcopenshell_wrapper.named_type):
+        return type_name(ty.declared_type())
+    elif isinstance(ty, ifcopenshell.ifcopenshell_wrapper.aggregation_type):
+        pass
+    elif isinstance(ty, ifcopenshell.ifcopenshell_wrapper.simple_type):
+        pass
     else:
-        # when using the normal text logger the instance is appended to the method
-        pre_annotate_instance = lambda instance: None
-        post_annotate_instance = lambda instance: instance
-        pre_annotate_attribute = lambda attribute: None
-        post_annotate_attribute = lambda attribute: attribute
+        return ty.name()
 
-    orig = ifcopenshell.settings.unpack_non_aggregate_inverses
-    ifcopenshell.settings.unpack_non_aggregate_inverses = True
 
-    fn = os.path.join(os.path.dirname(__file__), "rules", f"{f.schema_identifier}.py")
+def load_rules_source(schema_identifier):
+    fn = os.path.join(os.path.dirname(__file__), "rules", f"{schema_identifier}.py")
     try:
-        source = open(fn, "r").read()
+        return open(fn, "r").read()
     except FileNotFoundError as e:
-        import sys
-        import time
         import subprocess
 
         current_dir_files = {fn.lower(): fn for fn in os.listdir('.')}
-        schema_name = str(f.schema_identifier).split(' ')[-1].lower()
+        schema_name = str(schema_identifier).split(' ')[-1].lower()
         schema_path = current_dir_files.get(schema_name + '.exp')
         fn = schema_path[:-4] + '.py'
         if not os.path.exists(fn):
             subprocess.run([sys.executable, "-m", "ifcopenshell.express.rule_compiler", schema_path, fn], check=True)
             time.sleep(1.)
-        source = open(fn, "r").read()
+        return open(fn, "r").read()
 
-    a = ast.parse(source)
-    assertion.rewrite.rewrite_asserts(mod=a, source=source)
-    cd = compile(a, f"{f.schema_identifier}.py", "exec")
-    scope = {}
-    exec(cd, scope)
-    S = ifcopenshell.ifcopenshell_wrapper.schema_by_name(f.schema_identifier)
 
-    rules = list(filter(lambda x: hasattr(x, "SCOPE"), scope.values()))
+def compile_rules(schema_identifier, source):
+    """Compiles a rules module with rewritten asserts, caching the bytecode
+
+    Parsing and rewriting the rules of a schema takes a large share of the
+    validation time of small files, so the compiled code is stored next to
+    the rules and reused for as long as the source and Python are unchanged.
+    """
+    import _pytest
+    from _pytest import assertion
+
+    key = hashlib.sha1(f"{sys.version}\n{_pytest.__version__}\n{source}".encode()).hexdigest()
+    cache_fn = os.path.join(
+        os.path.dirname(__file__), "rules", "__pycache__", f"{schema_identifier}.rules.{sys.implementation.cache_tag}.bin"
+    )
+    try:
+        with open(cache_fn, "rb") as f:
+            cached_key, cd = marshal.load(f)
+        if cached_key == key:
+            return cd
+    except Exception:
+        pass
 
-    if hasattr(logger, 'set_state'):
-        logger.set_state('type', 'global_rule')
+    a = ast.parse(source)
+    assertion.rewrite.rewrite_asserts(mod=a, source=source)
+    cd = compile(a, f"{schema_identifier}.py", "exec")
 
-    for R in [r for r in rules if r.SCOPE == "file"]:
+    try:
+        os.makedirs(os.path.dirname(cache_fn), exist_ok=True)
+        # Written to a temporary file first, so that concurrent processes never read a partial cache
+        temp_fn = f"{cache_fn}.{os.getpid()}"
+        with open(temp_fn, "wb") as f:
+            marshal.dump((key, cd), f)
+        os.replace(temp_fn, cache_fn)
+    except OSError:
+        # The installation may be read-only
+        pass
+    return cd
+
+
+def get_rule_name(R):
+    if R.SCOPE == "file":
+        return R.__name__
+    return f"{R.TYPE_NAME}.{R.RULE_NAME}"
+
+
+class compiled_rules:
+    """The rules of a schema, compiled once and dispatched by entity type
+
+    Which entity rules apply to an entity, and which of its attributes may
+    hold a value constrained by a type rule, is only resolved once per
+    entity rather than for every instance.
+    """
+
+    def __init__(self, schema_identifier):
+        self.source = load_rules_source(schema_identifier)
+        self.source_lines = self.source.split("\n")
+
+        cd = compile_rules(schema_identifier, self.source)
+        scope = {}
+        exec(cd, scope)
+        self.schema = ifcopenshell.ifcopenshell_wrapper.schema_by_name(schema_identifier)
+
+        rules = list(filter(lambda x: hasattr(x, "SCOPE"), scope.values()))
+        self.file_rules = [r for r in rules if r.SCOPE == "file"]
+
+        subtypes = collections.defaultdict(list)
+        for d in self.schema.declarations():
+            if isinstance(d, ifcopenshell.ifcopenshell_wrapper.type_declaration):
+                if isinstance(d.declared_type(), ifcopenshell.ifcopenshell_wrapper.named_type):
+                    subtypes[d.declared_type().declared_type().name()].append(d.name())
+
+        # Type rules also apply to the types defined in terms of the constrained type
+        self.type_rules = collections.defaultdict(list)
+        for r in rules:
+            if r.SCOPE == "type":
+
+                def visit(nm):
+                    self.type_rules[nm].append(r)
+                    for nm2 in subtypes[nm]:
+                        visit(nm2)
+
+                visit(r.TYPE_NAME)
+
+        self.entity_rules = collections.defaultdict(list)
+        for i, r in enumerate(rules):
+            if r.SCOPE == "entity":
+                self.entity_rules[r.TYPE_NAME].append((i, r))
+
+        self.entity_rules_by_entity = {}
+        self.attributes_by_entity = {}
+        self.has_type_rules_by_type = {}
+
+    def get_entity_rules(self, entity_name):
+        """Gets the entity rules of an entity and its supertypes, in schema order"""
+        rules = self.entity_rules_by_entity.get(entity_name)
+        if rules is None:
+            rules = []
+            decl = self.schema.declaration_by_name(entity_name)
+            while decl:
+                rules.extend(self.entity_rules.get(decl.name(), ()))
+                decl = decl.supertype()
+            rules = self.entity_rules_by_entity[entity_name] = [r for i, r in sorted(rules, key=lambda x: x[0])]
+        return rules
+
+    def get_attributes(self, entity_name):
+        """Gets the index and type of the attributes of an entity which may hold a value with type rules"""
+        attributes = self.attributes_by_entity.get(entity_name)
+        if attributes is None:
+            entity = self.schema.declaration_by_name(entity_name)
+            attributes = self.attributes_by_entity[entity_name] = [
+                (i, attr.type_of_attribute())
+                for i, (attr, is_derived) in enumerate(zip(entity.all_attributes(), entity.derived()))
+                # @todo derived attributes
+                if not is_derived and self.has_type_rules(attr.type_of_attribute())
+            ]
+        return attributes
+
+    def has_type_rules(self, ty):
+        while isinstance(ty, (ifcopenshell.ifcopenshell_wrapper.named_type, ifcopenshell.ifcopenshell_wrapper.aggregation_type)):
+            if isinstance(ty, ifcopenshell.ifcopenshell_wrapper.named_type):
+                ty = ty.declared_type()
+            else:
+                ty = ty.type_of_element()
+        if isinstance(ty, ifcopenshell.ifcopenshell_wrapper.simple_type):
+            return False
+
+        name = ty.name()
+        result = self.has_type_rules_by_type.get(name)
+        if result is not None:
+            return result
+        # Guards against recursion through select types
+        self.has_type_rules_by_type[name] = False
+        if name in self.type_rules:
+            result = True
+        elif isinstance(ty, ifcopenshell.ifcopenshell_wrapper.type_declaration):
+            result = self.has_type_rules(ty.declared_type())
+        elif isinstance(ty, ifcopenshell.ifcopenshell_wrapper.select_type):
+            result = any(self.has_type_rules(t) for t in ty.select_list())
+        else:
+            # Entity instances are checked on their own
+            result = False
+        self.has_type_rules_by_type[name] = result
+        return result
+
+
+@functools.lru_cache(maxsize=None)
+def get_compiled_rules(schema_identifier):
+    return compiled_rules(schema_identifier)
+
+
+class rule_runner:
+    def __init__(self, rules, logger):
+        self.rules = rules
+        self.logger = logger
+        self.has_state = hasattr(logger, "set_state")
+        # Maps a rule name to its number of calls and total duration in seconds
+        self.timings = collections.defaultdict(lambda: [0, 0.0])
+
+        if hasattr(logger, "set_instance"):
+            # when using the json logger, we notify it of the relevant instance
+            self.pre_annotate_instance = lambda instance: logger.set_state('instance', instance) if self.has_state else None
+            self.post_annotate_instance = lambda instance: instance
+            self.pre_annotate_attribute = lambda attribute: logger.set_state('attribute', attribute) if self.has_state else None
+            self.post_annotate_attribute = lambda attribute: None
+        else:
+            # when using the normal text logger the instance is appended to the method
+            self.pre_annotate_instance = lambda instance: None
+            self.post_annotate_instance = lambda instance: instance
+            self.pre_annotate_attribute = lambda attribute: None
+            self.post_annotate_attribute = lambda attribute: attribute
+
+    def call(self, R, value, rule_type, instance=None):
+        name = get_rule_name(R)
+        start = time.perf_counter()
         try:
-            R()(f)
-        except Exception as e:
-            ln = e.__traceback__.tb_next.tb_lineno
-            pre_annotate_attribute(R.__name__)
-            logger.error(
-                str(
-                    error(
-                        post_annotate_attribute(R.__name__),
-                        reverse_compile(source.split("\n")[ln - 1]),
-                        reverse_compile(e.args[0]),
-                    )
+            R()(value)
+            e = None
+        except Exception as exc:
+            e = exc
+        timing = self.timings[name]
+        timing[0] += 1
+        timing[1] += time.perf_counter() - start
+        if e is None:
+            return
+
+        ln = e.__traceback__.tb_next.tb_lineno
+        if self.has_state:
+            self.logger.set_state('type', rule_type)
+        if instance is not None:
+            self.pre_annotate_instance(instance)
+        self.pre_annotate_attribute(name)
+        self.logger.error(
+            str(
+                error(
+                    self.post_annotate_attribute(name),
+                    reverse_compile(self.rules.source_lines[ln - 1]),
+                    reverse_compile(e.args[0]),
+                    None if instance is None else self.post_annotate_instance(instance),
                 )
             )
+        )
 
-    if hasattr(logger, 'set_state'):
-        logger.set_state('type', 'simpletype_rule')
-
-    types = {}
-    subtypes = collections.defaultdict(list)
-    for d in S.declarations():
-        if isinstance(d, ifcopenshell.ifcopenshell_wrapper.type_declaration):
-            types[d.name()] = d
-            if isinstance(
-                d.declared_type(), ifcopenshell.ifcopenshell_wrapper.named_type
-            ):
-                subtypes[d.declared_type().declared_type().name()].append(d.name())
-
-    D = collections.defaultdict(list)
-    for r in rules:
-        if r.SCOPE == "type":
-
-            def visit(nm):
-                D[nm].append(r)
-                for nm2 in subtypes[nm]:
-                    visit(nm2)
-
-            visit(r.TYPE_NAME)
-
-    def type_name(ty):
-        if isinstance(ty, ifcopenshell.ifcopenshell_wrapper.named_type):
-            return type_name(ty.declared_type())
-        elif isinstance(ty, ifcopenshell.ifcopenshell_wrapper.aggregation_type):
-            # breakpoint()
-            pass
-        elif isinstance(ty, ifcopenshell.ifcopenshell_wrapper.simple_type):
-            pass
-        else:
-            return ty.name()
+    def run_file_rules(self, f):
+        for R in self.rules.file_rules:
+            self.call(R, f, "global_rule")
 
-    def check(value, type, instance):
+    def check(self, value, type, instance):
         if value is None:
             return
 
-        if type_name(type) in D:
-            for R in D[type_name(type)]:
-                try:
-                    R()(fix_type(value))
-                except Exception as e:
-                    ln = e.__traceback__.tb_next.tb_lineno
-                    pre_annotate_instance(instance)
-                    pre_annotate_attribute(f"{R.TYPE_NAME}.{R.RULE_NAME}")
-                    logger.error(
-                        str(
-                            error(
-                                post_annotate_attribute(f"{R.TYPE_NAME}.{R.RULE_NAME}"),
-                                reverse_compile(source.split("\n")[ln - 1]),
-                                reverse_compile(e.args[0]),
-                                post_annotate_instance(instance),
-                            )
-                        )
-                    )
+        type_rules = self.rules.type_rules.get(type_name(type))
+        if type_rules:
+            for R in type_rules:
+                self.call(R, fix_type(value), "simpletype_rule", instance)
 
         # @nb something can be a named type with rules and still be an aggregation.
         # case in point IfcCompoundPlaneAngleMeasure. Therefore only unpack named
@@ -200,65 +327,112 @@ def run(f, logger):
             if isinstance(type, ifcopenshell.ifcopenshell_wrapper.aggregation_type):
                 ty = type.type_of_element()
                 for v in value:
-                    check(v, ty, instance=inst)
+                    self.check(v, ty, instance)
             else:
                 # Let's hope a schema validation error was reported for this case
                 pass
 
         elif isinstance(value, ifcopenshell.entity_instance):
-            if isinstance(
-                S.declaration_by_name(value.is_a()),
-                ifcopenshell.ifcopenshell_wrapper.entity,
-            ):
+            decl = self.rules.schema.declaration_by_name(value.is_a())
+            if isinstance(decl, ifcopenshell.ifcopenshell_wrapper.entity):
                 # top level entity instances will be checked on their own
                 pass
             else:
                 # unpack the type instance
-                check(value[0], S.declaration_by_name(value.is_a()), instance=inst)
+                self.check(value[0], decl, instance)
+
+    def run_instance_rules(self, instances):
+        """Runs the type rules on the attribute values and the entity rules of every instance"""
+        for inst in instances:
+            entity_name = inst.is_a()
+            attributes = self.rules.get_attributes(entity_name)
+            if attributes:
+                try:
+                    values = list(inst)
+                except Exception as e:
+                    if self.has_state:
+                        self.logger.set_state('type', 'simpletype_rule')
+                        self.logger.set_state('instance', inst)
+                        self.logger.set_state('attribute', None)
+                        self.logger.error(str(e))
+                    else:
+                        self.logger.error("For instance:\n    %s\n%s", inst, e)
+                else:
+                    for i, attr_type in attributes:
+                        self.check(values[i], attr_type, inst)
 
-    for inst in f:
-        try:
-            values = list(inst)
-        except Exception as e:
-            if hasattr(logger, "set_state"):
-                logger.error(str(e))
-            else:
-                logger.error("For instance:\n    %s\n%s", inst, e)
-            continue
-        entity = S.declaration_by_name(inst.is_a())
-        attrs = entity.all_attributes()
-        for i, (attr, val, is_derived) in enumerate(
-            zip(attrs, values, entity.derived())
-        ):
-            if is_derived:
-                # @todo
-                pass
-            else:
-                check(val, attr.type_of_attribute(), instance=inst)
-
-    if hasattr(logger, 'set_state'):
-        logger.set_state('type', 'entity_rule')
-
-    for R in [r for r in rules if r.SCOPE == "entity"]:
-        for inst in f.by_type(R.TYPE_NAME):
-            try:
-                R()(inst)
-            except Exception as e:
-                ln = e.__traceback__.tb_next.tb_lineno
-                pre_annotate_instance(inst)
-                pre_annotate_attribute(f"{R.TYPE_NAME}.{R.RULE_NAME}")
-                logger.error(
-                    str(
-                        error(
-                            post_annotate_attribute(f"{R.TYPE_NAME}.{R.RULE_NAME}"),
-                            reverse_compile(source.split("\n")[ln - 1]),
-                            reverse_compile(e.args[0]),
-                            post_annotate_instance(inst),
-                        )
-                    )
-                )
+            # Entity rules are still run when attribute values can't be read, as they may not need them
+            for R in self.rules.get_entity_rules(entity_name):
+                self.call(R, inst, "entity_rule", inst)
+
+
+_worker_runner = None
+
+
+def _run_chunk(chunk):
+    f, ids, runner = _worker_runner
+    from ifcopenshell.validate import create_worker_logger, get_worker_log
+
+    worker_logger = create_worker_logger(runner.logger, instance=None, attribute=None)
+    worker_runner = rule_runner(runner.rules, worker_logger)
+    worker_runner.run_instance_rules(f.by_id(i) for i in ids[chunk[0] : chunk[1]])
+    return get_worker_log(worker_logger), dict(worker_runner.timings)
 
-    ifcopenshell.settings.unpack_non_aggregate_inverses = orig
+
+def run_parallel(f, runner, processes):
+    global _worker_runner
+    from ifcopenshell.validate import replay_worker_log
+
+    ids = [inst.id() for inst in f]
+    chunk_size = -(-len(ids) // processes)
+    chunks = [(i, min(i + chunk_size, len(ids))) for i in range(0, len(ids), chunk_size)]
+
+    _worker_runner = (f, ids, runner)
+    try:
+        with multiprocessing.get_context("fork").Pool(processes) as pool:
+            for log, timings in pool.imap(_run_chunk, chunks):
+                replay_worker_log(f, runner.logger, log)
+                for name, (calls, duration) in timings.items():
+                    timing = runner.timings[name]
+                    timing[0] += calls
+                    timing[1] += duration
+    finally:
+        _worker_runner = None
+
+
+def run(f, logger, processes=1):
+    """Checks a file against the WHERE rules and global rules of its schema
+
+    Global rules are evaluated once for the file. Type rules and entity
+    rules are evaluated per instance, optionally in a pool of processes.
+
+    :param f: The IFC file to check
+    :param logger: A logger, such as a logging.Logger or ifcopenshell.validate.json_logger
+    :param processes: The number of processes to check instances with
+    :return: A dictionary mapping each executed rule name to a list of its
+        number of calls and total duration in seconds
+    """
+    orig = ifcopenshell.settings.unpack_non_aggregate_inverses
+    ifcopenshell.settings.unpack_non_aggregate_inverses = True
+
+    try:
+        runner = rule_runner(get_compiled_rules(f.schema_identifier), logger)
+        runner.run_file_rules(f)
+        if processes > 1 and "fork" in multiprocessing.get_all_start_methods():
+            run_parallel(f, runner, processes)
+        else:
+            runner.run_instance_rules(f)
+    finally:
+        ifcopenshell.settings.unpack_non_aggregate_inverses = orig
+
+    return dict(runner.timings)
+
+
+def print_timings(timings, limit=20, file=None):
+    """Prints the rules which took the longest in total to run"""
+    rows = sorted(timings.items(), key=lambda x: x[1][1], reverse=True)[:limit]
+    for name, (calls, duration) in rows:
+        print(f"{duration:10.3f}s {calls:10d} {name}", file=file)
 
 
 if __name__ == "__main__":
@@ -270,6 +444,7 @@ if __name__ == "__main__":
 
     filenames = [x for x in sys.argv[1:] if not x.startswith("--")]
     flags = set(x for x in sys.argv[1:] if x.startswith("--"))
+    processes = next((int(x.split("=")[1]) for x in flags if x.startswith("--jobs=")), 1)
 
     for fn in filenames:
         if "--json" in flags:
@@ -280,7 +455,10 @@ if __name__ == "__main__":
 
         f = ifcopenshell.open(fn)
 
-        run(f, logger)
+        timings = run(f, logger, processes=processes)
 
         if "--json" in flags:
             print("\n".join(json.dumps(x, default=str) for x in logger.statements))
+
+        if "--timings" in flags:
+            print_timings(timings, file=sys.stderr)
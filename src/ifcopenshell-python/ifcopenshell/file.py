@@ -19,6 +19,8 @@
 
 import os
 import re
+import sys
+import array
 import numbers
 import zipfile
 import functools
@@ -30,34 +32,93 @@ from . import ifcopenshell_wrapper
 from .entity_instance import entity_instance
 
 
+class reference(int):
+    """A serialised reference to an entity instance by its STEP ID"""
+
+    __slots__ = ()
+
+
+class typed_value:
+    """A serialised typed value, such as IfcLabel('Foo'), which has no STEP ID"""
+
+    __slots__ = ("type", "value")
+
+    def __init__(self, type: str, value: Any):
+        self.type = type
+        self.value = value
+
+
+def get_size(value: Any) -> int:
+    """Estimates the memory used by a serialised value, in bytes"""
+    size = sys.getsizeof(value)
+    if isinstance(value, tuple):
+        for v in value:
+            if v is not None:
+                size += get_size(v)
+    elif isinstance(value, typed_value):
+        size += get_size(value.value)
+    return size
+
+
 class Transaction:
+    """Records changes to a file so that they may be rolled back or committed
+
+    Operations are stored as compact tuples of an operation code followed by
+    its data, rather than as full entity snapshots. Attribute values are
+    stored by attribute index, entity references as their STEP ID, class names
+    are interned, and homogeneous numeric aggregates are packed into arrays.
+    Repeated edits of the same attribute are coalesced into a single edit.
+
+    The approximate memory used by the transaction is tracked in ``size``.
+    """
+
+    CREATE, EDIT, DELETE, BATCH_DELETE = range(4)
+
     def __init__(self, ifc_file):
         self.file = ifc_file
         self.operations = []
+        self.size = 0
         self.is_batched = False
         self.batch_delete_index = 0
         self.batch_delete_ids = set()
         self.batch_inverses = []
+        # Maps (id, attribute index) to the position of its last edit operation
+        self.edit_positions = {}
+        self.last_delete_position = -1
 
-    def serialise_entity_instance(self, element: ifcopenshell.entity_instance) -> dict[str, Any]:
-        info = element.get_info()
-        for key, value in info.items():
-            info[key] = self.serialise_value(element, value)
-        return info
+    def serialise_entity_instance(self, element: ifcopenshell.entity_instance) -> tuple:
+        return tuple((i, self.serialise_value(element, v)) for i, v in enumerate(element) if v is not None)
 
     def serialise_value(self, element, value):
-        return element.walk(
-            lambda v: isinstance(v, entity_instance),
-            lambda v: {"id": v.id()} if v.id() else {"type": v.is_a(), "value": v.wrappedValue},
-            value,
-        )
+        if isinstance(value, entity_instance):
+            if value.id():
+                return reference(value.id())
+            return typed_value(sys.intern(value.is_a()), self.serialise_value(element, value.wrappedValue))
+        elif isinstance(value, (tuple, list)):
+            if value:
+                value_type = type(value[0])
+                if value_type in (float, int) and all(type(v) is value_type for v in value):
+                    try:
+                        return array.array("d" if value_type is float else "q", value)
+                    except OverflowError:
+                        pass
+            return tuple(self.serialise_value(element, v) for v in value)
+        return value
 
     def unserialise_value(self, element, value):
-        return element.walk(
-            lambda v: isinstance(v, dict),
-            lambda v: self.file.by_id(v["id"]) if v.get("id") else self.file.create_entity(v["type"], v["value"]),
-            value,
-        )
+        if isinstance(value, reference):
+            return self.file.by_id(value)
+        elif isinstance(value, typed_value):
+            return self.file.create_entity(value.type, self.unserialise_value(element, value.value))
+        elif isinstance(value, array.array):
+            return tuple(value)
+        elif isinstance(value, tuple):
+            return tuple(self.unserialise_value(element, v) for v in value)
+        return value
+
+    def add_operation(self, operation: tuple) -> None:
+        self.operations.append(operation)
+        self.size += get_size(operation)
 
     def batch(self):
         self.is_batched = True
@@ -68,49 +129,72 @@ class Transaction:
     def unbatch(self):
         for inverses in self.batch_inverses:
             if inverses:
-                self.operations.insert(self.batch_delete_index, {"action": "batch_delete", "inverses": inverses})
+                operation = (self.BATCH_DELETE, inverses)
+                self.operations.insert(self.batch_delete_index, operation)
+                self.size += get_size(operation)
         self.is_batched = False
         self.batch_delete_index = 0
         self.batch_delete_ids = set()
         self.batch_inverses = []
+        # Inserted operations shift the positions of all later operations
+        self.edit_positions = {}
+        self.last_delete_position = len(self.operations) - 1
 
     def store_create(self, element):
         if element.id():
-            self.operations.append({"action": "create", "value": self.serialise_entity_instance(element)})
+            self.add_operation(
+                (self.CREATE, element.id(), sys.intern(element.is_a()), self.serialise_entity_instance(element))
+            )
 
     def store_edit(self, element, index, value):
-        if element.id():
-            self.operations.append(
-                {
-                    "action": "edit",
-                    "id": element.id(),
-                    "index": index,
-                    "old": self.serialise_value(element, element[index]),
-                    "new": self.serialise_value(element, value),
-                }
-            )
+        if not element.id():
+            return
+        key = (element.id(), index)
+        position = self.edit_positions.get(key, None)
+        if position is not None and position > self.last_delete_position:
+            # Coalesce with the previous edit. The edit is moved to the end so
+            # that anything the new value references already exists on redo.
+            # This is unsafe if an entity referenced by the original value may
+            # have been deleted since, so deletions prevent coalescing.
+            previous = self.operations[position]
+            self.operations[position] = None
+            self.size -= get_size(previous)
+            old = previous[3]
+        else:
+            old = self.serialise_value(element, element[index])
+        self.edit_positions[key] = len(self.operations)
+        self.add_operation((self.EDIT, element.id(), index, old, self.serialise_value(element, value)))
 
     def store_delete(self, element: ifcopenshell.entity_instance) -> None:
-        inverses = {}
+        inverses = ()
         if self.is_batched:
             if element.id() not in self.batch_delete_ids:
                 self.batch_inverses.append(self.get_element_inverses(element))
             self.batch_delete_ids.add(element.id())
         else:
             inverses = self.get_element_inverses(element)
-        self.operations.append(
-            {"action": "delete", "inverses": inverses, "value": self.serialise_entity_instance(element)}
+        self.add_operation(
+            (
+                self.DELETE,
+                element.id(),
+                sys.intern(element.is_a()),
+                self.serialise_entity_instance(element),
+                inverses,
+            )
         )
+        self.last_delete_position = len(self.operations) - 1
 
-    def get_element_inverses(self, element):
+    def get_element_inverses(self, element) -> tuple:
+        """Gets the values of all attributes which reference the element
+
+        :return: A tuple of (inverse id, attribute index, serialised value)
+        """
         inverses = {}
-        for inverse in self.file.get_inverse(element):
-            inverse_references = []
-            for i, attribute in enumerate(inverse):
-                if self.has_element_reference(attribute, element):
-                    inverse_references.append((i, self.serialise_value(inverse, attribute)))
-            inverses[inverse.id()] = inverse_references
-        return inverses
+        for inverse, index in self.file.get_inverse(element, allow_duplicate=True, with_attribute_indices=True):
+            key = (inverse.id(), index)
+            if key not in inverses:
+                inverses[key] = self.serialise_value(inverse, inverse[index])
+        return tuple((inverse_id, index, value) for (inverse_id, index), value in inverses.items())
 
     def has_element_reference(self, value: Any, element: ifcopenshell.entity_instance) -> bool:
         if isinstance(value, (tuple, list)):
@@ -120,56 +204,58 @@ class Transaction:
             return False
         return value == element
 
+    def restore_inverses(self, inverses: tuple) -> None:
+        for inverse_id, index, value in inverses:
+            inverse = self.file.by_id(inverse_id)
+            inverse[index] = self.unserialise_value(inverse, value)
+
+    def create_entity(self, ifc_class: str, id: int, attributes: tuple) -> None:
+        e = self.file.create_entity(ifc_class, id=id)
+        for index, value in attributes:
+            try:
+                e[index] = self.unserialise_value(e, value)
+            except:
+                # Catch discrepancy where IfcOpenShell creates but doesn't allow editing of invalid values
+                pass
+
     def rollback(self):
         for operation in self.operations[::-1]:
-            if operation["action"] == "create":
-                element = self.file.by_id(operation["value"]["id"])
+            if operation is None:
+                continue
+            action = operation[0]
+            if action == self.CREATE:
+                element = self.file.by_id(operation[1])
                 if hasattr(element, "GlobalId") and element.GlobalId is None:
                     # hack, otherwise ifcopenshell gets upset
                     element.GlobalId = "x"
                 self.file.remove(element)
-            elif operation["action"] == "edit":
-                element = self.file.by_id(operation["id"])
+            elif action == self.EDIT:
+                element = self.file.by_id(operation[1])
                 try:
-                    element[operation["index"]] = self.unserialise_value(element, operation["old"])
+                    element[operation[2]] = self.unserialise_value(element, operation[3])
                 except:
                     # Catch discrepancy where IfcOpenShell creates but doesn't allow editing of invalid values
                     pass
-            elif operation["action"] == "delete":
-                e = self.file.create_entity(operation["value"]["type"], id=operation["value"]["id"])
-                for k, v in operation["value"].items():
-                    try:
-                        setattr(e, k, self.unserialise_value(e, v))
-                    except:
-                        # Catch discrepancy where IfcOpenShell creates but doesn't allow editing of invalid values
-                        pass
-                for inverse_id, data in operation["inverses"].items():
-                    inverse = self.file.by_id(inverse_id)
-                    for index, value in data:
-                        inverse[index] = self.unserialise_value(inverse, value)
-            elif operation["action"] == "batch_delete":
-                for inverse_id, data in operation["inverses"].items():
-                    inverse = self.file.by_id(inverse_id)
-                    for index, value in data:
-                        inverse[index] = self.unserialise_value(inverse, value)
+            elif action == self.DELETE:
+                self.create_entity(operation[2], operation[1], operation[3])
+                self.restore_inverses(operation[4])
+            elif action == self.BATCH_DELETE:
+                self.restore_inverses(operation[1])
 
     def commit(self):
         for operation in self.operations:
-            if operation["action"] == "create":
-                e = self.file.create_entity(operation["value"]["type"], id=operation["value"]["id"])
-                for k, v in operation["value"].items():
-                    try:
-                        setattr(e, k, self.unserialise_value(e, v))
-                    except:
-                        # Catch discrepancy where IfcOpenShell creates but doesn't allow editing of invalid values
-                        pass
-            elif operation["action"] == "edit":
-                element = self.file.by_id(operation["id"])
-                element[operation["index"]] = self.unserialise_value(element, operation["new"])
-            elif operation["action"] == "delete":
-                element = self.file.by_id(operation["value"]["id"])
+            if operation is None:
+                continue
+            action = operation[0]
+            if action == self.CREATE:
+                self.create_entity(operation[2], operation[1], operation[3])
+            elif action == self.EDIT:
+                element = self.file.by_id(operation[1])
+                element[operation[2]] = self.unserialise_value(element, operation[4])
+            elif action == self.DELETE:
+                element = self.file.by_id(operation[1])
                 self.file.remove(element)
-            elif operation["action"] == "batch_delete":
+            elif action == self.BATCH_DELETE:
                 pass
 
 
@@ -252,6 +338,7 @@ class file:
             args = map(ifcopenshell_wrapper.schema_by_name, args)
             self.wrapped_data = ifcopenshell_wrapper.file(*args)
         self.history_size = 64
+        self.history_memory_limit: Optional[int] = None
         self.history = []
         self.future = []
         self.transaction: Optional[Transaction] = None
@@ -265,8 +352,31 @@ class file:
 
     def set_history_size(self, size):
         self.history_size = size
+        self.trim_history()
+
+    def set_history_memory_limit(self, size: Optional[int]) -> None:
+        """Limits the undo history by the memory it uses instead of only by its length
+
+        The oldest transactions are discarded until the history fits within
+        the limit, except for the most recent transaction which is always kept
+        so that it can be undone.
+
+        :param size: The approximate maximum memory in bytes, or None for no limit.
+        """
+        self.history_memory_limit = size
+        self.trim_history()
+
+    def get_history_memory(self) -> int:
+        """Returns the approximate memory used by the undo history in bytes"""
+        return sum(t.size for t in self.history)
+
+    def trim_history(self) -> None:
         while len(self.history) > self.history_size:
             self.history.pop(0)
+        if self.history_memory_limit is not None:
+            memory = self.get_history_memory()
+            while len(self.history) > 1 and memory > self.history_memory_limit:
+                memory -= self.history.pop(0).size
 
     def begin_transaction(self):
         if self.history_size:
@@ -275,8 +385,7 @@ class file:
     def end_transaction(self):
         if self.transaction:
             self.history.append(self.transaction)
-            if len(self.history) > self.history_size:
-                self.history.pop(0)
+            self.trim_history()
             self.future = []
             self.transaction = None
 
@@ -0,0 +1,440 @@
+# IfcOpenShell - IFC toolkit and geometry engine
+# Copyright (C) 2021 Thomas Krijnen <thomas@aecgeeks.com>
+#
+# This file is part of IfcOpenShell.
+#
+# IfcOpenShell is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IfcOpenShell is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IfcOpenShell.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Persistent tessellation cache shared across files and runs
+
+Tessellations are keyed by a structural hash of an element's representation
+subgraph (plus styles, materials, openings and the geometry settings), not by
+STEP ids. Unchanged elements in a new revision of a model, or the same type
+geometry appearing in a different model, are therefore loaded from the cache
+instead of being tessellated again.
+
+Example:
+
+.. code:: python
+
+    settings = ifcopenshell.geom.settings()
+    cache = ifcopenshell.geom.cache.geometry_cache("/path/to/geometry.db", max_size=4 * 1024**3)
+    for shape in cache.iterate(settings, model):
+        print(shape.guid, len(shape.geometry.verts))
+    print(cache.get_statistics())
+"""
+
+import json
+import time
+import sqlite3
+import hashlib
+import numpy as np
+import ifcopenshell
+import ifcopenshell.util.element
+import ifcopenshell.util.placement
+import ifcopenshell.util.unit
+from typing import Optional, Iterator
+
+# Settings where the element placement is baked into the output geometry
+PLACEMENT_DEPENDENT_SETTINGS = ("USE_WORLD_COORDS", "SITE_LOCAL_PLACEMENT", "BUILDING_LOCAL_PLACEMENT")
+
+
+def get_settings_hash(settings) -> str:
+    """Hashes all geometry settings which may influence tessellation
+
+    :param settings: The geometry settings used to tessellate
+    :type settings: ifcopenshell.geom.settings
+    :return: A hex digest
+    :rtype: str
+    """
+    tolerances = []
+    for name in ("deflection_tolerance", "angular_tolerance"):
+        value = getattr(settings, name, None)
+        tolerances.append(repr(value() if callable(value) else value))
+    return hashlib.sha1((repr(settings) + ",".join(tolerances)).encode()).hexdigest()
+
+
+class structural_hasher:
+    """Computes STEP-id independent hashes of instance subgraphs
+
+    Hashes are memoised per instance, so hashing many elements which share
+    resources (e.g. mapped type representations, styles, profiles) only hashes
+    each shared resource once.
+    """
+
+    def __init__(self):
+        self.hashes = {}
+
+    def get_hash(self, element: ifcopenshell.entity_instance) -> bytes:
+        key = (element.id(), element.wrapped_data.file_pointer())
+        result = self.hashes.get(key)
+        if result is not None:
+            return result
+        digest = hashlib.sha1(element.is_a().encode())
+        for value in element:
+            self.update(digest, value)
+        result = self.hashes[key] = digest.digest()
+        return result
+
+    def update(self, digest, value) -> None:
+        if isinstance(value, ifcopenshell.entity_instance):
+            if value.id():
+                digest.update(b"#" + self.get_hash(value))
+            else:
+                # Inline typed values such as IfcLengthMeasure(1.)
+                digest.update(value.is_a().encode() + repr(value.wrappedValue).encode())
+        elif isinstance(value, tuple):
+            digest.update(b"(")
+            for item in value:
+                self.update(digest, item)
+                digest.update(b",")
+            digest.update(b")")
+        else:
+            digest.update(repr(value).encode() + b";")
+
+
+class cached_transformation_matrix:
+    def __init__(self, data):
+        self.data = tuple(data)
+
+
+class cached_transformation:
+    def __init__(self, data):
+        self.matrix = cached_transformation_matrix(data)
+
+
+class cached_material:
+    def __init__(self, data):
+        self.name = data["name"]
+        self.has_diffuse = data["diffuse"] is not None
+        self.has_specular = data["specular"] is not None
+        self.has_transparency = data["transparency"] is not None
+        self.has_specularity = data["specularity"] is not None
+        self.diffuse = tuple(data["diffuse"] or (0.0, 0.0, 0.0))
+        self.specular = tuple(data["specular"] or (0.0, 0.0, 0.0))
+        self.transparency = data["transparency"] or 0.0
+        self.specularity = data["specularity"] or 0.0
+
+
+class cached_geometry:
+    """Mimics the triangulation returned by the geometry iterator"""
+
+    BUFFERS = {
+        "verts": np.float64,
+        "normals": np.float64,
+        "faces": np.int32,
+        "edges": np.int32,
+        "material_ids": np.int32,
+        "item_ids": np.int32,
+    }
+
+    def __init__(self, id, buffers, materials):
+        self.id = id
+        self.buffers = buffers
+        self.materials = tuple(cached_material(m) for m in materials)
+
+    def __getattr__(self, name):
+        if name.endswith("_buffer") and name[: -len("_buffer")] in cached_geometry.BUFFERS:
+            return self.buffers[name[: -len("_buffer")]]
+        elif name in cached_geometry.BUFFERS:
+            return tuple(np.frombuffer(self.buffers[name], dtype=cached_geometry.BUFFERS[name]).tolist())
+        raise AttributeError(name)
+
+    @property
+    def colors_buffer(self):
+        colors = []
+        for material in self.materials:
+            colors.extend(material.diffuse)
+            colors.append(1.0 - material.transparency if material.has_transparency else 1.0)
+        return np.array(colors, dtype=np.float64).tobytes()
+
+
+class cached_shape:
+    """Mimics the triangulation element returned by the geometry iterator"""
+
+    def __init__(self, element, geometry, matrix, parent_id=None):
+        self.id = element.id()
+        self.guid = element.GlobalId
+        self.name = element.Name or ""
+        self.type = element.is_a()
+        self.parent_id = parent_id
+        self.product = element
+        self.geometry = geometry
+        self.transformation = cached_transformation(matrix)
+        self.transformation_buffer = np.array(matrix, dtype=np.float64).tobytes()
+        self.is_cached = True
+
+
+class geometry_cache:
+    """A size bounded LRU cache of tessellations stored in an SQLite database
+
+    :param path: The filepath to the cache database. It is created if it does
+        not exist. Use ":memory:" for a non-persistent cache.
+    :param max_size: The maximum total size of cached buffers in bytes. The
+        least recently used shapes are evicted once this is exceeded.
+    """
+
+    def __init__(self, path: str, max_size: int = 1024**3):
+        self.path = str(path)
+        self.max_size = max_size
+        self.hasher = structural_hasher()
+        self.unit_scales = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS shapes (
+                key TEXT PRIMARY KEY,
+                geometry_id TEXT,
+                verts BLOB,
+                normals BLOB,
+                faces BLOB,
+                edges BLOB,
+                material_ids BLOB,
+                item_ids BLOB,
+                materials TEXT,
+                matrix BLOB,
+                size INTEGER,
+                last_access REAL
+            )
+            """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS shapes_last_access ON shapes (last_access)")
+        self.db.commit()
+        self.size = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM shapes").fetchone()[0]
+
+    def get_key(
+        self, element: ifcopenshell.entity_instance, settings, unit_scale: Optional[float] = None
+    ) -> Optional[str]:
+        """Calculates the cache key of an element's tessellation
+
+        The key covers the element's class, its representation subgraph, the
+        styles of its representation items, its material, the relative
+        placement and representation of its openings, the model's length unit
+        scale and the geometry settings. If the settings bake placements into
+        the geometry, the absolute placement is also covered.
+
+        :param element: An IfcProduct with a representation
+        :param settings: The geometry settings used to tessellate
+        :param unit_scale: The model's length unit scale, calculated once per
+            model if not provided
+        :return: A hex digest, or None if the element has no representation
+        """
+        if not getattr(element, "Representation", None):
+            return None
+        hasher = self.hasher
+        digest = hashlib.sha1(element.is_a().encode())
+        digest.update(get_settings_hash(settings).encode())
+        # Cached geometry is in SI units, so identical values in different units differ
+        if unit_scale is None:
+            unit_scale = self.get_unit_scale(element)
+        digest.update(np.float64(unit_scale).tobytes())
+        digest.update(hasher.get_hash(element.Representation))
+
+        material = ifcopenshell.util.element.get_material(element)
+        if material:
+            digest.update(hasher.get_hash(material))
+        for style in ifcopenshell.util.element.get_styles(element):
+            digest.update(hasher.get_hash(style))
+
+        placement = self.get_placement(element)
+        for rel in getattr(element, "HasOpenings", None) or ():
+            opening = rel.RelatedOpeningElement
+            if opening.Representation:
+                digest.update(hasher.get_hash(opening.Representation))
+            relative = np.linalg.inv(placement) @ self.get_placement(opening)
+            digest.update(np.round(relative, 9).tobytes())
+
+        if any(settings.get(getattr(settings, s)) for s in PLACEMENT_DEPENDENT_SETTINGS):
+            digest.update(np.round(placement, 9).tobytes())
+        return digest.hexdigest()
+
+    def get_unit_scale(self, element: ifcopenshell.entity_instance) -> float:
+        key = element.wrapped_data.file_pointer()
+        unit_scale = self.unit_scales.get(key)
+        if unit_scale is None:
+            unit_scale = self.unit_scales[key] = ifcopenshell.util.unit.calculate_unit_scale(element.file)
+        return unit_scale
+
+    def get_placement(self, element: ifcopenshell.entity_instance) -> np.ndarray:
+        placement = getattr(element, "ObjectPlacement", None)
+        if placement and placement.is_a("IfcLocalPlacement"):
+            return ifcopenshell.util.placement.get_local_placement(placement)
+        return np.eye(4)
+
+    def get(self, key: str) -> Optional[tuple[cached_geometry, tuple]]:
+        """Fetches a cached geometry and the matrix it was stored with
+
+        :param key: The cache key from :meth:`get_key`
+        :return: A tuple of the geometry and a 12 value transformation matrix,
+            or None if the key is not cached.
+        """
+        row = self.db.execute(
+            "SELECT geometry_id, verts, normals, faces, edges, material_ids, item_ids, materials, matrix"
+            " FROM shapes WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.db.execute("UPDATE shapes SET last_access = ? WHERE key = ?", (time.time(), key))
+        geometry_id, *buffers, materials, matrix = row
+        geometry = cached_geometry(
+            geometry_id, dict(zip(cached_geometry.BUFFERS.keys(), buffers)), json.loads(materials)
+        )
+        return geometry, tuple(np.frombuffer(matrix, dtype=np.float64).tolist())
+
+    def add(self, key: str, shape) -> None:
+        """Stores the tessellation of a shape produced by the geometry iterator
+
+        :param key: The cache key from :meth:`get_key`
+        :param shape: A triangulation element from the geometry iterator
+        """
+        geometry = shape.geometry
+        buffers = [bytes(getattr(geometry, f"{name}_buffer")) for name in cached_geometry.BUFFERS.keys()]
+        materials = [
+            {
+                "name": m.name,
+                "diffuse": tuple(m.diffuse) if m.has_diffuse else None,
+                "specular": tuple(m.specular) if m.has_specular else None,
+                "transparency": m.transparency if m.has_transparency else None,
+                "specularity": m.specularity if m.has_specularity else None,
+            }
+            for m in geometry.materials
+        ]
+        size = sum(len(b) for b in buffers)
+        previous = self.db.execute("SELECT size FROM shapes WHERE key = ?", (key,)).fetchone()
+        if previous:
+            self.size -= previous[0]
+        self.db.execute(
+            "INSERT OR REPLACE INTO shapes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                geometry.id,
+                *buffers,
+                json.dumps(materials),
+                np.array(shape.transformation.matrix.data, dtype=np.float64).tobytes(),
+                size,
+                time.time(),
+            ),
+        )
+        self.size += size
+        self.evict()
+
+    def evict(self) -> None:
+        """Removes least recently used shapes until the cache fits its size"""
+        while self.size > self.max_size:
+            rows = self.db.execute("SELECT key, size FROM shapes ORDER BY last_access LIMIT 100").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self.size <= self.max_size:
+                    break
+                self.db.execute("DELETE FROM shapes WHERE key = ?", (key,))
+                self.size -= size
+                self.evictions += 1
+
+    def iterate(
+        self,
+        settings,
+        ifc_file: ifcopenshell.file,
+        num_threads: int = 1,
+        include: Optional[list[ifcopenshell.entity_instance]] = None,
+        exclude: Optional[list[ifcopenshell.entity_instance]] = None,
+    ) -> Iterator:
+        """Iterates over shapes, only tessellating elements missing from the cache
+
+        Cached shapes are yielded first, followed by newly tessellated shapes
+        from :class:`ifcopenshell.geom.iterator` which are added to the cache.
+        Cached shapes mimic the iterator's output and have ``is_cached`` set.
+
+        :param settings: The geometry settings to tessellate with
+        :param ifc_file: The model to iterate over
+        :param num_threads: Threads used to tessellate cache misses
+        :param include: Elements to process, defaults to all products
+        :param exclude: Elements to skip
+        """
+        import ifcopenshell.geom
+
+        # Memoised hashes and unit scales are only valid for the lifetime of a model
+        self.hasher = structural_hasher()
+        self.unit_scales = {}
+
+        if include is None:
+            elements = [
+                e
+                for e in ifc_file.by_type("IfcProduct")
+                if e.Representation and not e.is_a("IfcOpeningElement") and not e.is_a("IfcSpace")
+            ]
+        else:
+            elements = [e for e in include if e.Representation]
+        if exclude:
+            exclude = set(exclude)
+            elements = [e for e in elements if e not in exclude]
+
+        file_unit_scale = ifcopenshell.util.unit.calculate_unit_scale(ifc_file)
+        unit_scale = 1.0 if settings.get(settings.CONVERT_BACK_UNITS) else file_unit_scale
+        is_placement_dependent = any(settings.get(getattr(settings, s)) for s in PLACEMENT_DEPENDENT_SETTINGS)
+
+        misses = {}
+        for element in elements:
+            key = self.get_key(element, settings, unit_scale=file_unit_scale)
+            result = self.get(key)
+            if result is None:
+                misses[element.id()] = key
+                continue
+            geometry, matrix = result
+            if not is_placement_dependent:
+                placement = self.get_placement(element)
+                placement[0:3, 3] *= unit_scale
+                matrix = placement[0:3, :].T.flatten().tolist()
+            yield cached_shape(element, geometry, matrix)
+        self.db.commit()
+
+        if misses:
+            iterator = ifcopenshell.geom.iterator(
+                settings, ifc_file, num_threads, include=[ifc_file.by_id(i) for i in misses.keys()]
+            )
+            for shape in iterator:
+                key = misses.get(shape.id)
+                if key:
+                    self.add(key, shape)
+                yield shape
+            self.db.commit()
+
+    def get_statistics(self) -> dict:
+        """Summarises cache usage since the cache was opened
+
+        :return: A dictionary of hits, misses, hit rate, evictions, the number
+            of cached shapes and the total cached size in bytes.
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "evictions": self.evictions,
+            "shapes": self.db.execute("SELECT COUNT(*) FROM shapes").fetchone()[0],
+            "size": self.size,
+        }
+
+    def clear(self) -> None:
+        self.db.execute("DELETE FROM shapes")
+        self.db.commit()
+        self.size = 0
+
+    def close(self) -> None:
+        self.db.commit()
+        self.db.close()
@@ -249,7 +249,29 @@ def consume_iterator(it, with_progress=False):
                 break
 
 
-def iterate(settings, file_or_filename, num_threads=1, include=None, exclude=None, with_progress=False, cache=None):
+def iterate(
+    settings,
+    file_or_filename,
+    num_threads=1,
+    include=None,
+    exclude=None,
+    with_progress=False,
+    cache=None,
+    geometry_cache=None,
+):
+    if geometry_cache is not None:
+        # See ifcopenshell.geom.cache.geometry_cache
+        if not isinstance(file_or_filename, file):
+            from .. import open as open_file
+
+            file_or_filename = open_file(file_or_filename)
+        shapes = geometry_cache.iterate(settings, file_or_filename, num_threads, include, exclude)
+        if with_progress:
+            shapes = list(shapes)
+            yield from ((int(100 * (i + 1) / len(shapes)), shape) for i, shape in enumerate(shapes))
+        else:
+            yield from shapes
+        return
     it = iterator(settings, file_or_filename, num_threads, include, exclude)
     if cache:
         hdf5_cache = serializers.hdf5(cache, settings)
@@ -1,6 +1,7 @@
 try:
     import re
     import json
+    import collections
 
     from .file import file
     from . import ifcopenshell_wrapper
@@ -10,11 +11,24 @@ except ImportError as e:
 
 
 class sqlite(file):
-    def __init__(self, filepath):
+    # SQLite limits the number of host parameters in a single statement
+    MAX_VARIABLES = 900
+
+    def __init__(self, filepath, row_cache_size: int = 100000):
+        """Opens a model stored in the SQLite format created by the Ifc2Sql patch recipe
+
+        Rows are loaded lazily when attributes are first accessed. To avoid a
+        query per entity, use :meth:`prefetch` to load the rows of many
+        entities in bulk. Loaded rows are kept in an LRU cache.
+
+        :param filepath: The path to the SQLite database
+        :param row_cache_size: The maximum number of rows kept in the row cache
+        """
         import sqlite3
 
         self.wrapped_data = None
         self.history_size = 64
+        self.history_memory_limit = None
         self.history = []
         self.future = []
         self.transaction = None
@@ -48,6 +62,8 @@ class sqlite(file):
         self.id_map = {}
         self.class_map = {}
         self.entity_cache = {}
+        self.row_cache_size = row_cache_size
+        self.row_cache = collections.OrderedDict()
         for row in self.cursor.fetchall():
             self.id_map[row[0]] = row[1]
             self.class_map.setdefault(row[1], []).append(row[0])
@@ -101,6 +117,102 @@ class sqlite(file):
 
     def clear_cache(self):
         self.entity_cache = {}
+        self.row_cache.clear()
+
+    def cache_row(self, id, row):
+        self.row_cache[id] = row
+        self.row_cache.move_to_end(id)
+        while len(self.row_cache) > self.row_cache_size:
+            self.row_cache.popitem(last=False)
+
+    def get_row(self, id):
+        """Gets the raw database row of an entity, using the row cache if possible
+
+        :param id: The STEP ID of the entity
+        :return: A row, or None if the entity has no row
+        """
+        row = self.row_cache.get(id, None)
+        if row is not None:
+            self.row_cache.move_to_end(id)
+            return row
+        ifc_class = self.id_map.get(id, None)
+        if not ifc_class:
+            return
+        self.cursor.execute(f"SELECT * FROM {ifc_class} WHERE `ifc_id` = {id} LIMIT 1")
+        row = self.cursor.fetchone()
+        if row is not None:
+            self.cache_row(id, row)
+        return row
+
+    def prefetch(self, ids, max_levels=0):
+        """Loads the rows of many entities with one query per class
+
+        This avoids the cost of querying the database separately for each
+        entity when attributes are later accessed. Entities referenced by the
+        prefetched entities may also be prefetched, level by level.
+
+        Example:
+
+        .. code:: python
+
+            walls = model.by_type("IfcWall")
+            # Also load placements, representations, and owner histories
+            model.prefetch([w.id() for w in walls], max_levels=1)
+
+        :param ids: The STEP IDs of entities to prefetch
+        :param max_levels: How many levels of referenced entities to also
+            prefetch. 0 means only the entities themselves are prefetched.
+        :return: None
+        """
+        seen = set()
+        ids = set(ids)
+        while ids:
+            seen.update(ids)
+            class_ids = {}
+            for id in ids:
+                if id in self.row_cache:
+                    continue
+                ifc_class = self.id_map.get(id, None)
+                if ifc_class:
+                    class_ids.setdefault(ifc_class, []).append(id)
+
+            for ifc_class, uncached_ids in class_ids.items():
+                for i in range(0, len(uncached_ids), self.MAX_VARIABLES):
+                    batch = uncached_ids[i : i + self.MAX_VARIABLES]
+                    query = f"SELECT * FROM {ifc_class} WHERE `ifc_id` IN ({','.join('?' * len(batch))})"
+                    self.cursor.execute(query, batch)
+                    for row in self.cursor.fetchall():
+                        self.cache_row(row["ifc_id"], row)
+
+            if not max_levels:
+                break
+            max_levels -= 1
+
+            references = set()
+            for id in ids:
+                row = self.row_cache.get(id, None)
+                if row is not None:
+                    references.update(self.get_row_references(self.id_map[id], row))
+            ids = references - seen
+
+    def get_row_references(self, ifc_class, row):
+        references = self.ifc_class_references[ifc_class]
+        for name in references["entity"]:
+            if row[name] is not None:
+                yield row[name]
+        for name in references["entity_list"]:
+            value = row[name]
+            if isinstance(value, int):
+                yield value
+            elif value:
+                yield from self.get_json_references(json.loads(value))
+
+    def get_json_references(self, value):
+        if isinstance(value, list):
+            for item in value:
+                yield from self.get_json_references(item)
+        elif isinstance(value, int) and not isinstance(value, bool):
+            yield value
 
     def create_entity(self, type, *args, **kawrgs):
         assert False
@@ -171,14 +283,10 @@ class sqlite(file):
         return results
 
     def get_inverse(self, inst, allow_duplicate=False, with_attribute_indices=False):
-        query = (
-            f"SELECT inverses FROM {inst.sqlite_wrapper.ifc_class} WHERE `ifc_id` = {inst.sqlite_wrapper.id} LIMIT 1"
-        )
-        self.cursor.execute(query)
-        row = self.cursor.fetchone()
-        if not row or not row[0]:
+        row = self.get_row(inst.sqlite_wrapper.id)
+        if not row or not row["inverses"]:
             return set()
-        return {self.by_id(e) for e in json.loads(row[0])}
+        return {self.by_id(e) for e in json.loads(row["inverses"])}
 
     def is_entity_list(self, attribute):
         attribute = str(attribute.type_of_attribute())
@@ -190,6 +298,16 @@ class sqlite(file):
         return False
 
     def get_geometry(self, ids: list[int]) -> dict[str, dict]:
+        """Gets the tessellated geometry and placements of elements
+
+        Geometry buffers are returned as read-only numpy arrays which directly
+        view the database blobs without copying.
+
+        :param ids: The STEP IDs of elements
+        :return: A dictionary with "shapes" holding the placement and geometry
+            ID of each element, and "geometry" holding the verts, edges,
+            faces, material_ids, and materials of each geometry ID.
+        """
         import numpy as np
 
         ids_csv = ",".join(map(str, ids))
@@ -201,12 +319,10 @@ class sqlite(file):
         for row in rows:
             if row["geometry"] and row["geometry"] not in geometry:
                 geometry[row["geometry"]] = {
-                    "verts": np.frombuffer(row["verts"]).tolist() if row["verts"] else [],
-                    "edges": np.frombuffer(row["edges"], dtype=np.int64).tolist() if row["edges"] else [],
-                    "faces": np.frombuffer(row["faces"], dtype=np.int64).tolist() if row["faces"] else [],
-                    "material_ids": (
-                        np.frombuffer(row["material_ids"], dtype=np.int64).tolist() if row["material_ids"] else []
-                    ),
+                    "verts": np.frombuffer(row["verts"] or b"", dtype=np.float64),
+                    "edges": np.frombuffer(row["edges"] or b"", dtype=np.int64),
+                    "faces": np.frombuffer(row["faces"] or b"", dtype=np.int64),
+                    "material_ids": np.frombuffer(row["material_ids"] or b"", dtype=np.int64),
                     "materials": json.loads(row["materials"]) if row["materials"] else [],
                 }
             shapes[row["ifc_id"]] = {
@@ -248,6 +364,7 @@ class sqlite_entity(entity_instance):
         query = f"UPDATE `{self.sqlite_wrapper.ifc_class}` SET `{key}` = ? WHERE ifc_id = {self.sqlite_wrapper.id}"
         self.sqlite_wrapper.file.cursor.execute(query, (value,))
         self.sqlite_wrapper.file.db.commit()
+        self.sqlite_wrapper.file.row_cache.pop(self.sqlite_wrapper.id, None)
         self.sqlite_wrapper.attribute_cache = {}
 
     def __getattr__(self, name):
@@ -265,9 +382,7 @@ class sqlite_entity(entity_instance):
             # print('first time for', self.sqlite_wrapper.ifc_class)
 
             # print("IT IS A FORWARD")
-            query = f"SELECT * FROM {self.sqlite_wrapper.ifc_class} WHERE `ifc_id` = {self.sqlite_wrapper.id} LIMIT 1"
-            self.sqlite_wrapper.file.cursor.execute(query)
-            row = self.sqlite_wrapper.file.cursor.fetchone()
+            row = self.sqlite_wrapper.file.get_row(self.sqlite_wrapper.id)
 
             for attribute in self.sqlite_wrapper.attributes.values():
                 # attribute = self.sqlite_wrapper.attributes[name]
@@ -296,10 +411,8 @@ class sqlite_entity(entity_instance):
 
             results = []
 
-            query = f"SELECT inverses FROM {self.sqlite_wrapper.ifc_class} WHERE `ifc_id` = {self.sqlite_wrapper.id} LIMIT 1"
-            self.sqlite_wrapper.file.cursor.execute(query)
-            row = self.sqlite_wrapper.file.cursor.fetchone()
-            if not row or not row[0]:
+            row = self.sqlite_wrapper.file.get_row(self.sqlite_wrapper.id)
+            if not row or not row["inverses"]:
                 self.sqlite_wrapper.inverse_attribute_cache[name] = tuple()
                 return self.sqlite_wrapper.inverse_attribute_cache[name]
 
@@ -309,7 +422,11 @@ class sqlite_entity(entity_instance):
             forward_name = attribute.attribute_reference().name()
 
             subtypes = [st.name() for st in ifcopenshell.util.schema.get_subtypes(declaration)]
-            element_ids = json.loads(row[0])
+            element_ids = json.loads(row["inverses"])
+            # Load the candidates in bulk rather than one at a time when checking their forward attribute
+            self.sqlite_wrapper.file.prefetch(
+                [e for e in element_ids if self.sqlite_wrapper.file.id_map.get(e, None) in subtypes]
+            )
             for element_id in element_ids:
                 ifc_class = self.sqlite_wrapper.file.id_map[element_id]
                 if ifc_class in subtypes:
@@ -1,6 +1,9 @@
 try:
+    import os
     import re
+    import mmap
 
+    import numpy as np
     import ifcopenshell.util.schema
     from .file import file
     from . import ifcopenshell_wrapper
@@ -66,6 +69,7 @@ try:
         def __init__(self, filepath):
             self.wrapped_data = None
             self.history_size = 64
+            self.history_memory_limit = None
             self.history = []
             self.future = []
             self.transaction = None
@@ -80,44 +84,7 @@ try:
             self.reference_pattern = re.compile(r"#(\d+)")
             self.entity_cache = {}
             self.inverses = {}
-    
-            # common.INT doesn't support negative integers.
-            grammar = r"""
-                start: "#" NUMBER "=" TYPE "(" args ")" ";"
-    
-                args: arg ("," arg)*
-    
-                arg: STRING        -> string
-                    | FLOAT        -> float
-                    | IFCINT       -> ifcint
-                    | NULL         -> null
-                    | DERIVED      -> derived
-                    | ENUM         -> enum
-                    | REFERENCE    -> reference
-                    | list         -> list
-                    | inline_type  -> inline_type
-    
-                list: "(" arg? ("," arg)* ")"
-                inline_type: TYPE "(" arg ")"
-                REFERENCE: "#" /[0-9]+/
-    
-                TYPE: CNAME
-                NUMBER: INT
-    
-                STRING: "'" /([^']|'')*/ "'"
-                IFCINT: /-?[0-9]+/
-                FLOAT: /-?[0-9]+\.[0-9]*([Ee]-?[0-9]+)?/
-                NULL: "$"
-                DERIVED: "*"
-                ENUM: "." CNAME "."
-    
-                %import common.INT
-                %import common.CNAME
-            """
-    
-            transformer = StreamTransformer()
-            transformer.file = self
-            self.parser = Lark(grammar, parser="lalr", transformer=transformer)
+            self.create_parser()
     
             exclude_classes = [
                 "IfcObjectPlacement",
@@ -159,6 +126,45 @@ try:
     
             self.preprocess_schema()
     
+        def create_parser(self):
+            # common.INT doesn't support negative integers.
+            grammar = r"""
+                start: "#" NUMBER "=" TYPE "(" args ")" ";"
+    
+                args: arg ("," arg)*
+    
+                arg: STRING        -> string
+                    | FLOAT        -> float
+                    | IFCINT       -> ifcint
+                    | NULL         -> null
+                    | DERIVED      -> derived
+                    | ENUM         -> enum
+                    | REFERENCE    -> reference
+                    | list         -> list
+                    | inline_type  -> inline_type
+    
+                list: "(" arg? ("," arg)* ")"
+                inline_type: TYPE "(" arg ")"
+                REFERENCE: "#" /[0-9]+/
+    
+                TYPE: CNAME
+                NUMBER: INT
+    
+                STRING: "'" /([^']|'')*/ "'"
+                IFCINT: /-?[0-9]+/
+                FLOAT: /-?[0-9]+\.[0-9]*([Ee]-?[0-9]+)?/
+                NULL: "$"
+                DERIVED: "*"
+                ENUM: "." CNAME "."
+    
+                %import common.INT
+                %import common.CNAME
+            """
+    
+            transformer = StreamTransformer()
+            transformer.file = self
+            self.parser = Lark(grammar, parser="lalr", transformer=transformer)
+    
         def preprocess_schema(self):
             self.ifc_class_names = {}
             self.ifc_class_subtypes = {}
@@ -208,11 +214,21 @@ try:
         def create_entity(self, type, *args, **kawrgs):
             assert False
     
+        def read_line(self, id):
+            self.file.seek(self.id_offset[id])
+            return self.file.readline()
+
+        def get_ifc_class(self, id):
+            return self.id_map.get(id, None)
+
+        def get_inverse_ids(self, id):
+            return self.inverses.get(id, [])
+
         def by_id(self, id):
             entity = self.entity_cache.get(id, None)
             if entity:
                 return entity
-            ifc_class = self.id_map.get(id, None)
+            ifc_class = self.get_ifc_class(id)
             if ifc_class:
                 entity = stream_entity(id, self.ifc_class_names[ifc_class], self)
                 self.entity_cache[id] = entity
@@ -244,7 +260,7 @@ try:
             return results
     
         def get_inverse(self, inst, allow_duplicate=False, with_attribute_indices=False):
-            return {self.by_id(e) for e in self.inverses.get(inst.stream_wrapper.id, [])}
+            return {self.by_id(e) for e in self.get_inverse_ids(inst.stream_wrapper.id)}
     
         def is_entity_list(self, attribute):
             attribute = str(attribute.type_of_attribute())
@@ -256,6 +272,237 @@ try:
             return False
     
     
+    class indexed_stream(stream):
+        """A stream backed by a memory-mapped file and a compact array index
+
+        Unlike :class:`stream`, the index of entity ids, byte offsets, classes
+        and inverse references is held in numpy arrays instead of dicts of
+        lists, and may be persisted as a sidecar index file next to the model
+        (``<filepath>.idx`` by default). Reopening an unchanged file loads the
+        index directly instead of rescanning the model.
+
+        Entities are only parsed when their attributes are accessed.
+
+        Example:
+
+        .. code:: python
+
+            model = ifcopenshell.indexed_stream("/path/to/huge_model.ifc")
+            wall = model.by_type("IfcWall")[0]
+            print(wall.Name)
+            print(model.get_inverse(wall))
+        """
+
+        INDEX_VERSION = 1
+        CHUNK_SIZE = 64 * 1024 * 1024
+
+        def __init__(self, filepath, index_path=None, should_save_index=True):
+            self.wrapped_data = None
+            self.history_size = 64
+            self.history_memory_limit = None
+            self.history = []
+            self.future = []
+            self.transaction = None
+
+            self.filepath = str(filepath)
+            self.index_path = str(index_path) if index_path else self.filepath + ".idx"
+            self.reference_pattern = re.compile(r"#(\d+)")
+            self.entity_cache = {}
+
+            self.file = open(self.filepath, "rb")
+            self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.schema = self.read_schema()
+            self.ifc_schema = ifcopenshell_wrapper.schema_by_name(self.schema)
+            self.create_parser()
+
+            if not self.load_index():
+                self.build_index()
+                if should_save_index:
+                    self.save_index()
+
+            self.class_codes = {ifc_class: i for i, ifc_class in enumerate(self.class_names)}
+            self.preprocess_schema()
+
+        def read_schema(self):
+            data = self.mmap.find(b"DATA;")
+            data = len(self.mmap) if data == -1 else data
+            match = re.compile(rb"FILE_SCHEMA\s*\(\s*\(\s*'([^']*)'").search(self.mmap, 0, data)
+            if not match:
+                return "IFC4"
+            return match.group(1).decode("utf-8", errors="replace")
+
+        def get_file_signature(self):
+            stat = os.stat(self.filepath)
+            return np.array([self.INDEX_VERSION, stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+        def build_index(self):
+            entity_pattern = re.compile(rb"^[ \t]*#(\d+)[ \t]*=[ \t]*([A-Za-z0-9_]+)", re.M)
+            class_codes = {}
+            ids, offsets, codes = [], [], []
+            sources, targets = [], []
+
+            size = len(self.mmap)
+            start = 0
+            while start < size:
+                end = self.mmap.find(b"\n", min(start + self.CHUNK_SIZE, size))
+                end = size if end == -1 else end + 1
+                chunk = self.mmap[start:end]
+
+                chunk_ids, chunk_offsets, chunk_codes = [], [], []
+                for match in entity_pattern.finditer(chunk):
+                    chunk_ids.append(int(match.group(1)))
+                    chunk_offsets.append(match.start(1) - 1)
+                    ifc_class = match.group(2).decode("utf-8", errors="replace").upper()
+                    code = class_codes.get(ifc_class)
+                    if code is None:
+                        code = class_codes[ifc_class] = len(class_codes)
+                    chunk_codes.append(code)
+
+                chunk_offsets = np.array(chunk_offsets, dtype=np.int64)
+                chunk_ids = np.array(chunk_ids, dtype=np.int64)
+                if len(chunk_offsets):
+                    chunk_sources, chunk_targets = self.find_references(chunk, chunk_offsets, chunk_ids)
+                    sources.append(chunk_sources)
+                    targets.append(chunk_targets)
+
+                ids.append(chunk_ids)
+                offsets.append(chunk_offsets + start)
+                codes.append(np.array(chunk_codes, dtype=np.int32))
+                start = end
+
+            ids = np.concatenate(ids) if ids else np.empty(0, dtype=np.int64)
+            order = np.argsort(ids, kind="stable")
+            self.ids = ids[order]
+            self.offsets = np.concatenate(offsets)[order] if offsets else np.empty(0, dtype=np.int64)
+            self.codes = np.concatenate(codes)[order] if codes else np.empty(0, dtype=np.int32)
+            self.class_names = np.array(sorted(class_codes, key=class_codes.get), dtype=str)
+
+            sources = np.concatenate(sources) if sources else np.empty(0, dtype=np.int64)
+            targets = np.concatenate(targets) if targets else np.empty(0, dtype=np.int64)
+            order = np.lexsort((sources, targets))
+            sources, targets = sources[order], targets[order]
+            if len(sources):
+                # An entity referencing the same instance several times is only an inverse once
+                is_unique = np.ones(len(sources), dtype=bool)
+                is_unique[1:] = (sources[1:] != sources[:-1]) | (targets[1:] != targets[:-1])
+                sources, targets = sources[is_unique], targets[is_unique]
+            self.inverse_sources = sources
+            self.inverse_targets = targets
+
+        def find_references(self, chunk, entity_offsets, entity_ids):
+            """Vectorised search for all #123 references in a chunk of lines
+
+            :return: A tuple of arrays of referencing ids and referenced ids.
+            """
+            buffer = np.frombuffer(chunk, dtype=np.uint8)
+            positions = np.flatnonzero(buffer == ord("#"))
+            # Entity definitions (#1=...) are not references
+            positions = positions[~np.isin(positions, entity_offsets)]
+            positions = positions[positions >= entity_offsets[0]]
+
+            values = np.zeros(len(positions), dtype=np.int64)
+            is_digit = np.ones(len(positions), dtype=bool)
+            total_digits = np.zeros(len(positions), dtype=np.int64)
+            cursor = positions + 1
+            while True:
+                cursor_in_bounds = cursor < len(buffer)
+                digits = np.zeros(len(positions), dtype=np.int64)
+                digits[cursor_in_bounds] = buffer[cursor[cursor_in_bounds]].astype(np.int64) - ord("0")
+                is_digit &= cursor_in_bounds & (digits >= 0) & (digits <= 9)
+                if not is_digit.any():
+                    break
+                values[is_digit] = values[is_digit] * 10 + digits[is_digit]
+                total_digits += is_digit
+                cursor += 1
+
+            # A hash without digits is a literal character within a string
+            is_reference = total_digits > 0
+            positions, values = positions[is_reference], values[is_reference]
+            owners = entity_ids[np.searchsorted(entity_offsets, positions, side="right") - 1]
+            return owners, values
+
+        def save_index(self):
+            temporary_path = self.index_path + ".tmp"
+            try:
+                with open(temporary_path, "wb") as f:
+                    np.savez(
+                        f,
+                        signature=self.get_file_signature(),
+                        ids=self.ids,
+                        offsets=self.offsets,
+                        codes=self.codes,
+                        class_names=self.class_names,
+                        inverse_sources=self.inverse_sources,
+                        inverse_targets=self.inverse_targets,
+                    )
+                os.replace(temporary_path, self.index_path)
+            except OSError:
+                # A read-only location simply means the index is rebuilt next time
+                if os.path.exists(temporary_path):
+                    os.remove(temporary_path)
+
+        def load_index(self):
+            if not os.path.isfile(self.index_path):
+                return False
+            try:
+                with np.load(self.index_path, allow_pickle=False) as index:
+                    if not np.array_equal(index["signature"], self.get_file_signature()):
+                        return False
+                    self.ids = index["ids"]
+                    self.offsets = index["offsets"]
+                    self.codes = index["codes"]
+                    self.class_names = index["class_names"]
+                    self.inverse_sources = index["inverse_sources"]
+                    self.inverse_targets = index["inverse_targets"]
+            except (OSError, ValueError, KeyError):
+                return False
+            return True
+
+        def get_index(self, id):
+            i = int(np.searchsorted(self.ids, id))
+            if i < len(self.ids) and self.ids[i] == id:
+                return i
+
+        def read_line(self, id):
+            offset = int(self.offsets[self.get_index(id)])
+            lines = []
+            while True:
+                end = self.mmap.find(b"\n", offset)
+                end = len(self.mmap) if end == -1 else end + 1
+                lines.append(self.mmap[offset:end].strip())
+                # Entities may be wrapped across several physical lines
+                if lines[-1].endswith(b";") or end >= len(self.mmap):
+                    break
+                offset = end
+            return b"".join(lines).decode("utf-8", errors="replace")
+
+        def get_ifc_class(self, id):
+            i = self.get_index(id)
+            if i is not None:
+                return str(self.class_names[self.codes[i]])
+
+        def get_inverse_ids(self, id):
+            start = np.searchsorted(self.inverse_targets, id, side="left")
+            end = np.searchsorted(self.inverse_targets, id, side="right")
+            return self.inverse_sources[start:end].tolist()
+
+        def by_type(self, type, include_subtypes=True):
+            subtypes = self.ifc_class_subtypes[type] if include_subtypes else self.ifc_class_subtypes[type][0:1]
+            codes = [self.class_codes.get(subtype.name().upper()) for subtype in subtypes]
+            codes = [c for c in codes if c is not None]
+            if not codes:
+                return []
+            return [self.by_id(i) for i in self.ids[np.isin(self.codes, codes)].tolist()]
+
+        def __len__(self):
+            return len(self.ids)
+
+        def close(self):
+            self.entity_cache = {}
+            self.mmap.close()
+            self.file.close()
+
+    
     class stream_entity(entity_instance):
         def __init__(self, id, ifc_class, file=None):
             if not ifc_class:
@@ -270,9 +517,7 @@ try:
             return self.stream_wrapper.id
     
         def __repr__(self):
-            offset = self.stream_wrapper.file.id_offset[self.stream_wrapper.id]
-            self.stream_wrapper.file.file.seek(offset)
-            return self.stream_wrapper.file.file.readline().strip()
+            return self.stream_wrapper.file.read_line(self.stream_wrapper.id).strip()
     
         def __del__(self):
             pass
@@ -293,9 +538,7 @@ try:
                 if self.stream_wrapper.attribute_cache:
                     return self.stream_wrapper.attribute_cache[name]
     
-                offset = self.stream_wrapper.file.id_offset[self.stream_wrapper.id]
-                self.stream_wrapper.file.file.seek(offset)
-                line = self.stream_wrapper.file.file.readline()
+                line = self.stream_wrapper.file.read_line(self.stream_wrapper.id)
                 attributes = self.stream_wrapper.file.parser.parse(line.strip())[2]
     
                 for i, attribute in enumerate(self.stream_wrapper.attributes.values()):
@@ -309,7 +552,7 @@ try:
     
                 results = []
     
-                element_ids = self.stream_wrapper.file.inverses.get(self.stream_wrapper.id, [])
+                element_ids = self.stream_wrapper.file.get_inverse_ids(self.stream_wrapper.id)
                 if not element_ids:
                     self.stream_wrapper.inverse_attribute_cache[name] = tuple()
                     return self.stream_wrapper.inverse_attribute_cache[name]
@@ -321,7 +564,9 @@ try:
     
                 subtypes = [st.name() for st in ifcopenshell.util.schema.get_subtypes(declaration)]
                 for element_id in element_ids:
-                    ifc_class = self.stream_wrapper.file.ifc_class_names[self.stream_wrapper.file.id_map[element_id]]
+                    ifc_class = self.stream_wrapper.file.ifc_class_names[
+                        self.stream_wrapper.file.get_ifc_class(element_id)
+                    ]
                     if ifc_class in subtypes:
                         potential_result = self.stream_wrapper.file.by_id(element_id)
                         forward_value = getattr(potential_result, forward_name, None)
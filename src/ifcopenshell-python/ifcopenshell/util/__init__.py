@@ -42,3 +42,16 @@ The most commonly used utilities to help you get started are:
 - See :mod:`ifcopenshell.util.shape` to calculate quantities from processed
   geometry.
 """
+
+import importlib
+
+
+def __getattr__(name: str):
+    # Utility modules are only loaded on first access, e.g. ifcopenshell.util.element
+    if not name.startswith("_"):
+        try:
+            return importlib.import_module(f"{__name__}.{name}")
+        except ModuleNotFoundError as e:
+            if e.name != f"{__name__}.{name}":
+                raise
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
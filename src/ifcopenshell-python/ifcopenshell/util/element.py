@@ -19,8 +19,8 @@
 import ifcopenshell
 import ifcopenshell.guid
 import ifcopenshell.util.element
-from typing import Any, Callable, Optional, Union, Literal, overload
-from collections import namedtuple
+from typing import Any, Callable, Iterable, Optional, Union, Literal, overload
+from collections import Counter, namedtuple
 
 
 def get_pset(
@@ -339,6 +339,151 @@ def get_property(
         return result
 
 
+def get_psets_table(
+    ifc_file: ifcopenshell.file,
+    psets_only: bool = False,
+    qtos_only: bool = False,
+    should_inherit: bool = True,
+    elements: Optional[list[ifcopenshell.entity_instance]] = None,
+    psets: Optional[dict[str, Optional[list[str]]]] = None,
+) -> dict[str, list[Any]]:
+    """Extracts the properties of all elements in a model as columns
+
+    This is the bulk equivalent of calling ``get_psets`` on every element.
+    Instead of walking the inverses of each element, every
+    IfcRelDefinesByProperties and IfcRelDefinesByType is visited once, and
+    every property set is parsed once regardless of how many elements share
+    it. Type properties are inherited by occurrences using the same rules as
+    ``get_psets``.
+
+    The result is a dictionary of equal length columns, with one row per
+    element property. It can be directly loaded into a dataframe or table
+    library, such as ``pandas.DataFrame(table)`` or
+    ``pyarrow.table(table)``. The columns are:
+
+    - ``id``: The ID of the element (occurrence or type)
+    - ``pset``: The name of the property set or quantity set
+    - ``property``: The name of the property or quantity
+    - ``value``: The value of the property or quantity
+    - ``definition_id``: The ID of the property set providing the value
+    - ``is_inherited``: Whether or not the value is inherited from the type
+
+    :param ifc_file: The IFC file to extract properties from
+    :type ifc_file: ifcopenshell.file
+    :param psets_only: Default as False. Set to true if only property sets are needed.
+    :type psets_only: bool,optional
+    :param qtos_only: Default as False. Set to true if only quantities are needed.
+    :type qtos_only: bool,optional
+    :param should_inherit: Default as True. Set to false if you don't want to inherit property sets from the Type.
+    :type should_inherit: bool,optional
+    :param elements: If provided, only these elements are included in the results.
+    :type elements: list[ifcopenshell.entity_instance],optional
+    :param psets: If provided, a dictionary of property set names mapped to a
+        list of property names to include. A list of None includes all
+        properties in that property set.
+    :type psets: dict[str, list[str]],optional
+    :return: A dictionary of column names and lists of values
+    :rtype: dict[str, list[Any]]
+
+    Example:
+
+    .. code:: python
+
+        table = ifcopenshell.util.element.get_psets_table(ifc_file, psets={"Pset_WallCommon": ["FireRating"]})
+        for element_id, value in zip(table["id"], table["value"]):
+            print(element_id, value)
+    """
+    # Each definition is parsed once: definition ID -> (name, properties)
+    definitions: dict[int, tuple[str, dict[str, Any]]] = {}
+
+    def parse_definition(definition: ifcopenshell.entity_instance) -> Optional[int]:
+        definition_id = definition.id()
+        if definition_id in definitions:
+            return definition_id if definitions[definition_id] else None
+        name = definition.Name
+        if (
+            (psets_only and not definition.is_a("IfcPropertySet"))
+            or (qtos_only and not definition.is_a("IfcElementQuantity"))
+            or (psets is not None and name not in psets)
+        ):
+            definitions[definition_id] = None
+            return None
+        props = get_property_definition(definition)
+        del props["id"]
+        if psets is not None and (names := psets[name]) is not None:
+            props = {k: v for k, v in props.items() if k in names}
+        definitions[definition_id] = (name, props)
+        return definition_id
+
+    element_ids = None if elements is None else {e.id() for e in elements}
+
+    # Element ID -> list of definition IDs, in the order that get_psets() would apply them
+    occurrence_definitions: dict[int, list[int]] = {}
+    for rel in ifc_file.by_type("IfcRelDefinesByProperties"):
+        relating_definitions = rel.RelatingPropertyDefinition
+        if not isinstance(relating_definitions, tuple):
+            # IFC4 allows an IfcPropertySetDefinitionSet
+            relating_definitions = (relating_definitions,)
+        relating_ids = [i for d in relating_definitions if (i := parse_definition(d)) is not None]
+        if not relating_ids:
+            continue
+        for related_object in rel.RelatedObjects:
+            related_id = related_object.id()
+            if element_ids is None or related_id in element_ids:
+                occurrence_definitions.setdefault(related_id, []).extend(relating_ids)
+
+    type_definitions: dict[int, list[int]] = {}
+    for element_type in ifc_file.by_type("IfcTypeObject"):
+        # Like get_psets(), types only consider HasPropertySets
+        occurrence_definitions.pop(element_type.id(), None)
+        type_ids = [i for d in element_type.HasPropertySets or [] if (i := parse_definition(d)) is not None]
+        if type_ids:
+            type_definitions[element_type.id()] = type_ids
+
+    occurrence_types: dict[int, int] = {}
+    if should_inherit:
+        for rel in ifc_file.by_type("IfcRelDefinesByType"):
+            relating_type_id = rel.RelatingType.id()
+            if relating_type_id not in type_definitions:
+                continue
+            for related_object in rel.RelatedObjects:
+                related_id = related_object.id()
+                if element_ids is None or related_id in element_ids:
+                    occurrence_types[related_id] = relating_type_id
+
+    table = {"id": [], "pset": [], "property": [], "value": [], "definition_id": [], "is_inherited": []}
+
+    def add_rows(element_id, values: dict[tuple[str, str], tuple[Any, int, bool]]):
+        for (pset_name, prop_name), (value, definition_id, is_inherited) in values.items():
+            table["id"].append(element_id)
+            table["pset"].append(pset_name)
+            table["property"].append(prop_name)
+            table["value"].append(value)
+            table["definition_id"].append(definition_id)
+            table["is_inherited"].append(is_inherited)
+
+    def collect(values, definition_ids: list[int], is_inherited: bool):
+        for definition_id in definition_ids:
+            name, props = definitions[definition_id]
+            for prop_name, value in props.items():
+                values[(name, prop_name)] = (value, definition_id, is_inherited)
+
+    for type_id, definition_ids in type_definitions.items():
+        if element_ids is None or type_id in element_ids:
+            values = {}
+            collect(values, definition_ids, False)
+            add_rows(type_id, values)
+
+    for element_id in dict.fromkeys([*occurrence_definitions.keys(), *occurrence_types.keys()]):
+        values = {}
+        if type_id := occurrence_types.get(element_id):
+            collect(values, type_definitions[type_id], True)
+        collect(values, occurrence_definitions.get(element_id, []), False)
+        add_rows(element_id, values)
+
+    return table
+
+
 @overload
 def get_properties(
     properties: list[ifcopenshell.entity_instance], verbose: Literal[False] = False
@@ -1304,6 +1449,9 @@ def remove_deep2(
     The do_not_delete argument contains all elements that may be part of the
     subgraph but are protected from deletion.
 
+    When purging the subgraphs of many elements, use remove_subgraphs instead,
+    which is much faster than calling remove_deep2 for each element.
+
     :param ifc_file: The IFC file object
     :type ifc_file: ifcopenshell.file
     :param also_consider: elements to also consider as a part of a subgraph
@@ -1313,42 +1461,141 @@ def remove_deep2(
     :param element: The starting element that defines the subgraph
     :type element: ifcopenshell.entity_instance
     """
-    # ifc_file.batch()
-    to_delete = set()
-    subgraph = list(ifc_file.traverse(element, breadth_first=True))
-    subgraph.extend(also_consider)
-    subgraph_set = set(subgraph)
-    subelement_queue = ifc_file.traverse(element, max_levels=1)
-    while subelement_queue:
-        subelement = subelement_queue.pop(0)
-        if (
-            subelement.id()
-            and subelement not in do_not_delete
-            and len(set(ifc_file.get_inverse(subelement)) - subgraph_set) == 0
-        ):
-            to_delete.add(subelement)
-            subelement_queue.extend(ifc_file.traverse(subelement, max_levels=1)[1:])
-            # See #3052. IfcOpenShell is extremely slow in removing elements if
-            # the element has an inverse, and that inverse references that
-            # element in a big list. The most common example is an
-            # IfcPolygonalFaceSet with a Faces attribute of tens of thousands
-            # of IfcIndexedPolygonalFace. In this situation, removing a
-            # IfcIndexedPolygonalFace will take very, very long. If we are
-            # going to delete an element (i.e. added to the to_delete set), we
-            # clear any large lists (10 is an arbitrary threshold) to prevent
-            # this issue.
-            for i, attribute in enumerate(subelement):
-                if isinstance(attribute, tuple) and len(attribute) > 10:
-                    subelement[i] = []
+    remove_subgraphs(
+        ifc_file, [element], also_consider=also_consider, do_not_delete=do_not_delete, batch_threshold=None
+    )
+
+
+def remove_subgraphs(
+    ifc_file: ifcopenshell.file,
+    elements: Iterable[ifcopenshell.entity_instance],
+    also_consider: Iterable[ifcopenshell.entity_instance] = (),
+    do_not_delete: Iterable[ifcopenshell.entity_instance] = (),
+    batch_threshold: Optional[int] = 1000,
+) -> None:
+    """Recursively purges the subgraphs of many elements safely in one go
+
+    This is the bulk equivalent of remove_deep2, and is much faster than
+    calling remove_deep2 for each element, such as when removing thousands of
+    products.
+
+    The subgraphs of all elements are traversed once using their forward
+    relationships. For each subelement, references from within the subgraphs
+    are counted and compared to its total number of inverses. A subelement
+    which is referenced from outside the subgraphs, or is protected from
+    deletion, is kept along with all of its own subelements. Everything else
+    is purged. The elements themselves are also kept if referenced elsewhere.
+
+    As with remove_deep2, references from elements in ``also_consider`` are
+    treated as being part of the subgraphs, but those elements are not
+    removed.
+
+    When at least ``batch_threshold`` elements are purged, they are removed
+    as a single batch. Ending a batch scans all references in the file, so it
+    is only worthwhile for large purges.
+
+    :param ifc_file: The IFC file object
+    :type ifc_file: ifcopenshell.file
+    :param elements: The starting elements that define the subgraphs
+    :type elements: Iterable[ifcopenshell.entity_instance]
+    :param also_consider: elements to also consider as a part of the subgraphs
+    :type also_consider: Iterable[ifcopenshell.entity_instance], optional
+    :param do_not_delete: elements to protect from deletion
+    :type do_not_delete: Iterable[ifcopenshell.entity_instance], optional
+    :param batch_threshold: The number of elements to purge from which
+        removal is batched, or None to never batch
+    :type batch_threshold: int, optional
+    :rtype: None
+
+    Example:
+
+    .. code:: python
+
+        # Purge all styling, along with any styles no longer used elsewhere
+        ifcopenshell.util.element.remove_subgraphs(model, model.by_type("IfcStyledItem"))
+    """
+    # Maps the ID of each subelement to the IDs it references, including duplicates
+    references: dict[int, list[int]] = {}
+    # Subelement IDs ordered so that referenced subelements always come first
+    order: list[int] = []
+    for element in elements:
+        if not element.id() or element.id() in references:
+            continue
+        references[element.id()] = element_references = _get_referenced_ids(element)
+        stack = [(element.id(), iter(element_references))]
+        while stack:
+            element_id, element_references = stack[-1]
+            for reference in element_references:
+                if reference not in references:
+                    references[reference] = reference_references = _get_referenced_ids(ifc_file.by_id(reference))
+                    stack.append((reference, iter(reference_references)))
+                    break
+            else:
+                stack.pop()
+                order.append(element_id)
+
+    internal_references = Counter()
+    for element_references in references.values():
+        internal_references.update(element_references)
+    for element in also_consider:
+        if element.id() and element.id() not in references:
+            internal_references.update(r for r in _get_referenced_ids(element) if r in references)
+
+    queue = [e.id() for e in do_not_delete if e.id() in references]
+    for element_id in order:
+        if ifc_file.get_total_inverses(ifc_file.by_id(element_id)) > internal_references[element_id]:
+            queue.append(element_id)
+
+    # Subelements of kept elements remain referenced, so are kept too
+    to_keep = set()
+    while queue:
+        element_id = queue.pop()
+        if element_id not in to_keep:
+            to_keep.add(element_id)
+            queue.extend(references[element_id])
+
+    to_delete = [ifc_file.by_id(i) for i in order if i not in to_keep]
 
     if getattr(ifc_file, "to_delete", None) is not None:
         ifc_file.to_delete.update(to_delete)
         return
 
-    # We delete elements from subgraph in reverse order to allow batching to work
-    for subelement in filter(lambda e: e in to_delete, subgraph[::-1]):
-        ifc_file.remove(subelement)
-    # ifc_file.unbatch()
+    if batch_threshold is None or len(to_delete) < batch_threshold:
+        # Referencing elements are removed first, so that no other element
+        # needs to be updated to remove its reference to a removed element.
+        for element in reversed(to_delete):
+            ifc_file.remove(element)
+        return
+
+    # See #3052. In a batch, referenced elements have to be removed first, so
+    # large lists of references to them, such as the Faces of an
+    # IfcPolygonalFaceSet, are cleared beforehand to avoid updating them.
+    for element in to_delete:
+        for i, attribute in enumerate(element):
+            if isinstance(attribute, tuple) and len(attribute) > 10:
+                element[i] = []
+
+    ifc_file.batch()
+    try:
+        for element in to_delete:
+            ifc_file.remove(element)
+    finally:
+        ifc_file.unbatch()
+
+
+def _get_referenced_ids(element: ifcopenshell.entity_instance) -> list[int]:
+    results = []
+    queue = list(element)
+    while queue:
+        value = queue.pop()
+        if isinstance(value, ifcopenshell.entity_instance):
+            if value.id():
+                results.append(value.id())
+            else:
+                queue.append(value.wrappedValue)
+        elif isinstance(value, (tuple, list)):
+            queue.extend(value)
+    return results
 
 
 def copy(ifc_file: ifcopenshell.file, element: ifcopenshell.entity_instance) -> ifcopenshell.entity_instance:
@@ -131,6 +131,218 @@ def get_local_placement(placement: Optional[ifcopenshell.entity_instance] = None
     return np.dot(parent, get_axis2placement(placement.RelativePlacement))
 
 
+def get_axis2placements(placements: Iterable[ifcopenshell.entity_instance]) -> npt.NDArray[np.float64]:
+    """Parses many IfcAxis2Placements into an array of 4x4 transformation matrices
+
+    IfcAxis2Placement3Ds with cartesian point locations (the vast majority of
+    placements) are converted in a single vectorised operation. Any other
+    placement falls back to ``get_axis2placement``.
+
+    :param placements: A list of IfcAxis2Placement (2D or 3D) entities
+    :type placements: iterable[ifcopenshell.entity_instance]
+    :return: An (N, 4, 4) numpy array of matrices, in the same order as the
+        placements provided.
+    :rtype: npt.NDArray[np.float64]
+    """
+    placements = list(placements)
+    results = np.empty((len(placements), 4, 4))
+    indices, o, z, x = [], [], [], []
+    for i, placement in enumerate(placements):
+        if placement.is_a("IfcAxis2Placement3D") and placement.Location.is_a("IfcCartesianPoint"):
+            indices.append(i)
+            o.append(placement.Location.Coordinates)
+            z.append(placement.Axis.DirectionRatios if placement.Axis else (0.0, 0.0, 1.0))
+            x.append(placement.RefDirection.DirectionRatios if placement.RefDirection else (1.0, 0.0, 0.0))
+        else:
+            results[i] = get_axis2placement(placement)
+    if indices:
+        o, z, x = np.array(o, dtype=float), np.array(z, dtype=float), np.array(x, dtype=float)
+        x /= np.linalg.norm(x, axis=1)[:, None]
+        z /= np.linalg.norm(z, axis=1)[:, None]
+        y = np.cross(z, x)
+        y /= np.linalg.norm(y, axis=1)[:, None]
+        matrices = np.zeros((len(indices), 4, 4))
+        matrices[:, 0:3, 0] = x
+        matrices[:, 0:3, 1] = y
+        matrices[:, 0:3, 2] = z
+        matrices[:, 0:3, 3] = o
+        matrices[:, 3, 3] = 1.0
+        results[indices] = matrices
+    return results
+
+
+def get_local_placements(
+    placements: Iterable[Optional[ifcopenshell.entity_instance]], cache: Optional[dict[int, MatrixType]] = None
+) -> npt.NDArray[np.float64]:
+    """Parse many local placements into an array of 4x4 transformation matrices
+
+    This is the batch equivalent of ``get_local_placement``. Instead of walking
+    up the ``PlacementRelTo`` chain for every single placement, each unique
+    placement in the combined hierarchy is only parsed and multiplied once, so
+    shared parents (e.g. sites, buildings and storeys) are resolved a single
+    time. Matrices are resolved level by level as stacked numpy operations.
+
+    Either IfcLocalPlacements or elements (which have an ObjectPlacement) may
+    be provided. Elements without a local placement get an identity matrix.
+
+    Example:
+
+    .. code:: python
+
+        elements = file.by_type("IfcElement")
+        matrices = ifcopenshell.util.placement.get_local_placements(elements)
+        # The same result as individually calling get_local_placement
+        assert np.allclose(matrices[0], ifcopenshell.util.placement.get_local_placement(elements[0].ObjectPlacement))
+
+    :param placements: A list of IfcLocalPlacement entities or elements
+    :type placements: iterable[ifcopenshell.entity_instance]
+    :param cache: An optional dictionary of placement IDs to absolute matrices
+        which is read from and populated. Pass the same dictionary to
+        subsequent calls to reuse previously resolved parents. If the model is
+        edited, the cache must be invalidated. See ``PlacementCache``.
+    :type cache: dict[int, MatrixType], optional
+    :return: An (N, 4, 4) numpy array of matrices, in the same order as the
+        placements provided.
+    :rtype: npt.NDArray[np.float64]
+    """
+    if cache is None:
+        cache = {}
+
+    resolved = []
+    for placement in placements:
+        if placement is not None and not placement.is_a("IfcObjectPlacement"):
+            placement = getattr(placement, "ObjectPlacement", None)
+        resolved.append(placement if placement is not None and placement.is_a("IfcLocalPlacement") else None)
+
+    pending = {}
+    parent_ids = {}
+    queue = [p for p in resolved if p is not None]
+    while queue:
+        placement = queue.pop()
+        placement_id = placement.id()
+        if placement_id in cache or placement_id in pending:
+            continue
+        pending[placement_id] = placement
+        parent = placement.PlacementRelTo
+        if parent is not None and parent.is_a("IfcLocalPlacement"):
+            parent_ids[placement_id] = parent.id()
+            queue.append(parent)
+
+    if pending:
+        ids = list(pending.keys())
+        index = {placement_id: i for i, placement_id in enumerate(ids)}
+
+        depths = {}
+        for placement_id in ids:
+            chain = []
+            while placement_id not in depths:
+                parent_id = parent_ids.get(placement_id)
+                if parent_id is None or parent_id not in pending:
+                    depths[placement_id] = 0
+                    break
+                chain.append(placement_id)
+                placement_id = parent_id
+            depth = depths[placement_id]
+            for child_id in reversed(chain):
+                depth += 1
+                depths[child_id] = depth
+
+        levels = {}
+        for placement_id, depth in depths.items():
+            levels.setdefault(depth, []).append(index[placement_id])
+
+        relative = get_axis2placements([pending[i].RelativePlacement for i in ids])
+        absolute = np.empty_like(relative)
+        parents = np.empty_like(relative)
+        for i in levels.get(0, []):
+            parent_id = parent_ids.get(ids[i])
+            parents[i] = np.eye(4) if parent_id is None else cache[parent_id]
+
+        for depth in sorted(levels.keys()):
+            level = np.array(levels[depth])
+            if depth:
+                parents[level] = absolute[[index[parent_ids[ids[i]]] for i in level]]
+            absolute[level] = parents[level] @ relative[level]
+
+        for i, placement_id in enumerate(ids):
+            cache[placement_id] = absolute[i]
+
+    results = np.empty((len(resolved), 4, 4))
+    for i, placement in enumerate(resolved):
+        results[i] = np.eye(4) if placement is None else cache[placement.id()]
+    return results
+
+
+class PlacementCache:
+    """Memoises absolute placement matrices across many batch queries
+
+    Matrices of parent placements resolved in one call are reused by later
+    calls. If ``watch`` is called, the cache also listens to
+    ``geometry.edit_object_placement`` API calls and invalidates the edited
+    placement and every placement relative to it. Any other edits to
+    placements must be followed by a manual call to ``invalidate``.
+
+    Example:
+
+    .. code:: python
+
+        cache = ifcopenshell.util.placement.PlacementCache(file)
+        cache.watch()
+        walls = cache.get_local_placements(file.by_type("IfcWall"))
+        slabs = cache.get_local_placements(file.by_type("IfcSlab")) # Storeys are not recalculated
+        ifcopenshell.api.run("geometry.edit_object_placement", file, product=storey, matrix=matrix)
+        walls = cache.get_local_placements(file.by_type("IfcWall")) # Correctly moves with the storey
+        cache.unwatch()
+    """
+
+    def __init__(self, ifc_file: Optional[ifcopenshell.file] = None):
+        self.file = ifc_file
+        self.matrices: dict[int, MatrixType] = {}
+        self.listener_name = f"PlacementCache.{id(self)}"
+
+    def get_local_placements(
+        self, placements: Iterable[Optional[ifcopenshell.entity_instance]]
+    ) -> npt.NDArray[np.float64]:
+        return get_local_placements(placements, cache=self.matrices)
+
+    def get_local_placement(self, placement: Optional[ifcopenshell.entity_instance] = None) -> MatrixType:
+        return self.get_local_placements([placement])[0]
+
+    def invalidate(self, placement: Optional[ifcopenshell.entity_instance] = None) -> None:
+        """Forgets a placement and all placements relative to it
+
+        :param placement: The IfcObjectPlacement that was, or is about to be,
+            changed. If not provided, the entire cache is cleared.
+        :type placement: ifcopenshell.entity_instance, optional
+        """
+        if placement is None:
+            self.matrices.clear()
+            return
+        queue = [placement]
+        while queue:
+            placement = queue.pop()
+            self.matrices.pop(placement.id(), None)
+            queue.extend(getattr(placement, "ReferencedByPlacements", None) or ())
+
+    def watch(self) -> None:
+        import ifcopenshell.api
+
+        ifcopenshell.api.add_pre_listener("geometry.edit_object_placement", self.listener_name, self.on_edit_placement)
+
+    def unwatch(self) -> None:
+        import ifcopenshell.api
+
+        ifcopenshell.api.remove_pre_listener(
+            "geometry.edit_object_placement", self.listener_name, self.on_edit_placement
+        )
+
+    def on_edit_placement(self, usecase_path: str, ifc_file: ifcopenshell.file, settings: dict) -> None:
+        if self.file is not None and ifc_file != self.file:
+            return
+        if placement := getattr(settings.get("product", None), "ObjectPlacement", None):
+            self.invalidate(placement)
+
+
 def get_cartesiantransformationoperator3d(inst: ifcopenshell.entity_instance) -> MatrixType:
     """Parses an IfcCartesianTransformationOperator into a 4x4 transformation matrix
 
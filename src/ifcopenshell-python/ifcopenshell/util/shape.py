@@ -62,23 +62,29 @@ def get_volume(geometry) -> float:
     """
 
     # https://stackoverflow.com/questions/1406029/how-to-calculate-the-volume-of-a-3d-mesh-object-the-surface-of-which-is-made-up
-    def signed_triangle_volume(p1, p2, p3):
-        v321 = p3[0] * p2[1] * p1[2]
-        v231 = p2[0] * p3[1] * p1[2]
-        v312 = p3[0] * p1[1] * p2[2]
-        v132 = p1[0] * p3[1] * p2[2]
-        v213 = p2[0] * p1[1] * p3[2]
-        v123 = p1[0] * p2[1] * p3[2]
-        return (1.0 / 6.0) * (-v321 + v231 + v312 - v132 - v213 + v123)
-
-    verts = geometry.verts
-    faces = geometry.faces
-    grouped_verts = [[verts[i], verts[i + 1], verts[i + 2]] for i in range(0, len(verts), 3)]
-    volumes = [
-        signed_triangle_volume(grouped_verts[faces[i]], grouped_verts[faces[i + 1]], grouped_verts[faces[i + 2]])
-        for i in range(0, len(faces), 3)
-    ]
-    return abs(sum(volumes))
+    vertices = get_vertices(geometry)
+    faces = get_faces(geometry)
+    if not len(faces):
+        return 0.0
+    return abs(float(np.sum(get_signed_volumes_vf(vertices, faces))))
+
+
+def get_signed_volumes_vf(vertices: npt.NDArray[np.float64], faces: npt.NDArray[np.int32]) -> npt.NDArray[np.float64]:
+    """Calculates the signed volume of the tetrahedron formed by each face and the origin
+
+    The sum of all signed volumes of a closed mesh is its volume.
+
+    :param vertices: A list of 3D vertices, such as returned from get_vertices.
+    :type: np.array[iterable[float]]
+    :param faces: A list of faces, such as returned from get_faces.
+    :type: np.array[iterable[int]]
+    :return: A signed volume per face.
+    :rtype: np.array[float]
+    """
+    p1 = vertices[faces[:, 0]]
+    p2 = vertices[faces[:, 1]]
+    p3 = vertices[faces[:, 2]]
+    return np.einsum("ij,ij->i", p1, np.cross(p2, p3)) / 6.0
 
 
 def get_x(geometry) -> float:
@@ -89,8 +95,7 @@ def get_x(geometry) -> float:
     :return: The X dimension
     :rtype: float
     """
-    x_values = [geometry.verts[i] for i in range(0, len(geometry.verts), 3)]
-    return max(x_values) - min(x_values)
+    return float(np.ptp(get_vertices(geometry)[:, 0]))
 
 
 def get_y(geometry) -> float:
@@ -101,8 +106,7 @@ def get_y(geometry) -> float:
     :return: The Y dimension
     :rtype: float
     """
-    y_values = [geometry.verts[i + 1] for i in range(0, len(geometry.verts), 3)]
-    return max(y_values) - min(y_values)
+    return float(np.ptp(get_vertices(geometry)[:, 1]))
 
 
 def get_z(geometry) -> float:
@@ -113,8 +117,7 @@ def get_z(geometry) -> float:
     :return: The Z dimension
     :rtype: float
     """
-    z_values = [geometry.verts[i + 2] for i in range(0, len(geometry.verts), 3)]
-    return max(z_values) - min(z_values)
+    return float(np.ptp(get_vertices(geometry)[:, 2]))
 
 
 def get_shape_matrix(shape) -> MatrixType:
@@ -129,6 +132,35 @@ def get_shape_matrix(shape) -> MatrixType:
     return np.array(([m[0], m[3], m[6], m[9]], [m[1], m[4], m[7], m[10]], [m[2], m[5], m[8], m[11]], [0, 0, 0, 1]))
 
 
+def get_buffer(geometry, name: str, dtype: npt.DTypeLike) -> npt.NDArray:
+    """Gets a flat geometry buffer as a numpy array
+
+    If the geometry exposes raw buffers (such as ``verts_buffer``), the array
+    is a read-only view of the buffer and no Python lists are created. Use
+    ``get_vertices``, ``get_edges``, or ``get_faces`` if you need to modify
+    the array.
+
+    :param geometry: Geometry output calculated by IfcOpenShell
+    :type geometry: geometry
+    :param name: The name of the buffer, such as verts, faces, or edges.
+    :type name: str
+    :param dtype: The numpy data type of the buffer values
+    :type dtype: npt.DTypeLike
+    :return: A flat numpy array
+    :rtype: npt.NDArray
+    """
+    buffer = getattr(geometry, f"{name}_buffer", None)
+    if buffer is not None:
+        return np.frombuffer(buffer, dtype=dtype)
+    return np.array(getattr(geometry, name), dtype=dtype)
+
+
+def _get_writeable_buffer(geometry, name: str, dtype: npt.DTypeLike) -> npt.NDArray:
+    buffer = get_buffer(geometry, name, dtype)
+    # Callers may modify the results in place, which a view of the geometry's buffer doesn't allow
+    return buffer if buffer.flags.writeable else buffer.copy()
+
+
 def get_bbox_centroid(geometry) -> tuple[float, float, float]:
     """Calculates the bounding box centroid of the geometry
 
@@ -139,19 +171,9 @@ def get_bbox_centroid(geometry) -> tuple[float, float, float]:
     :return: A tuple representing the XYZ centroid
     :rtype: tuple[float, float, float]
     """
-    x_values = [geometry.verts[i] for i in range(0, len(geometry.verts), 3)]
-    y_values = [geometry.verts[i + 1] for i in range(0, len(geometry.verts), 3)]
-    z_values = [geometry.verts[i + 2] for i in range(0, len(geometry.verts), 3)]
-    x_values: list[float]
-    y_values: list[float]
-    z_values: list[float]
-    minx = min(x_values)
-    maxx = max(x_values)
-    miny = min(y_values)
-    maxy = max(y_values)
-    minz = min(z_values)
-    maxz = max(z_values)
-    return (minx + ((maxx - minx) / 2), miny + ((maxy - miny) / 2), minz + ((maxz - minz) / 2))
+    vertices = get_vertices(geometry)
+    centroid = (vertices.min(axis=0) + vertices.max(axis=0)) / 2
+    return (float(centroid[0]), float(centroid[1]), float(centroid[2]))
 
 
 def get_element_bbox_centroid(element: ifcopenshell.entity_instance, geometry) -> npt.NDArray[np.float64]:
@@ -203,8 +225,7 @@ def get_vertices(geometry) -> npt.NDArray[np.float64]:
     :return: A numpy array listing all the vertices. Each vertex is a numpy array with XYZ coordinates.
     :rtype: np.array[np.array[float]]
     """
-    verts = geometry.verts
-    return np.array([np.array([verts[i], verts[i + 1], verts[i + 2]]) for i in range(0, len(verts), 3)])
+    return _get_writeable_buffer(geometry, "verts", np.float64).reshape((-1, 3))
 
 
 def get_edges(geometry) -> npt.NDArray[np.int32]:
@@ -221,8 +242,7 @@ def get_edges(geometry) -> npt.NDArray[np.int32]:
     :return: A numpy array listing all the edges. Each edge is a numpy array with two vertex indices.
     :rtype: np.array[np.array[int]]
     """
-    edges = geometry.edges
-    return np.array([[edges[i], edges[i + 1]] for i in range(0, len(edges), 2)])
+    return _get_writeable_buffer(geometry, "edges", np.int32).reshape((-1, 2))
 
 
 def get_faces(geometry) -> npt.NDArray[np.int32]:
@@ -238,8 +258,7 @@ def get_faces(geometry) -> npt.NDArray[np.int32]:
     :return: A numpy array listing all the faces. Each face is a numpy array with three vertex indices.
     :rtype: np.array[np.array[int]]
     """
-    faces = geometry.faces
-    return np.array([[faces[i], faces[i + 1], faces[i + 2]] for i in range(0, len(faces), 3)])
+    return _get_writeable_buffer(geometry, "faces", np.int32).reshape((-1, 3))
 
 
 def get_shape_vertices(shape, geometry) -> npt.NDArray[np.float64]:
@@ -259,7 +278,7 @@ def get_shape_vertices(shape, geometry) -> npt.NDArray[np.float64]:
     """
     verts = get_vertices(geometry)
     mat = get_shape_matrix(shape)
-    return np.delete((mat @ np.hstack((verts, np.ones((len(verts), 1)))).T).T, -1, axis=1)
+    return verts @ mat[0:3, 0:3].T + mat[0:3, 3]
 
 
 def get_element_vertices(element: ifcopenshell.entity_instance, geometry) -> npt.NDArray[np.float64]:
@@ -281,7 +300,7 @@ def get_element_vertices(element: ifcopenshell.entity_instance, geometry) -> npt
     if not element.ObjectPlacement or not element.ObjectPlacement.is_a("IfcLocalPlacement"):
         return verts
     mat = ifcopenshell.util.placement.get_local_placement(element.ObjectPlacement)
-    return np.delete((mat @ np.hstack((verts, np.ones((len(verts), 1)))).T).T, -1, axis=1)
+    return verts @ mat[0:3, 0:3].T + mat[0:3, 3]
 
 
 def get_bottom_elevation(geometry) -> float:
@@ -292,8 +311,7 @@ def get_bottom_elevation(geometry) -> float:
     :return: The Z value
     :rtype: float
     """
-    z_values = [geometry.verts[i + 2] for i in range(0, len(geometry.verts), 3)]
-    return min(z_values)
+    return float(get_vertices(geometry)[:, 2].min())
 
 
 def get_top_elevation(geometry) -> float:
@@ -304,8 +322,7 @@ def get_top_elevation(geometry) -> float:
     :return: The Z value
     :rtype: float
     """
-    z_values = [geometry.verts[i + 2] for i in range(0, len(geometry.verts), 3)]
-    return max(z_values)
+    return float(get_vertices(geometry)[:, 2].max())
 
 
 def get_shape_bottom_elevation(shape, geometry) -> float:
@@ -321,7 +338,7 @@ def get_shape_bottom_elevation(shape, geometry) -> float:
     :return: The Z value
     :rtype: float
     """
-    return min([v[2] for v in get_shape_vertices(shape, geometry)])
+    return float(get_shape_vertices(shape, geometry)[:, 2].min())
 
 
 def get_shape_top_elevation(shape, geometry) -> float:
@@ -337,7 +354,7 @@ def get_shape_top_elevation(shape, geometry) -> float:
     :return: The Z value
     :rtype: float
     """
-    return max([v[2] for v in get_shape_vertices(shape, geometry)])
+    return float(get_shape_vertices(shape, geometry)[:, 2].max())
 
 
 def get_element_bottom_elevation(element: ifcopenshell.entity_instance, geometry) -> float:
@@ -353,7 +370,7 @@ def get_element_bottom_elevation(element: ifcopenshell.entity_instance, geometry
     :return: The Z value
     :rtype: float
     """
-    return min([v[2] for v in get_element_vertices(element, geometry)])
+    return float(get_element_vertices(element, geometry)[:, 2].min())
 
 
 def get_element_top_elevation(element: ifcopenshell.entity_instance, geometry) -> float:
@@ -369,7 +386,7 @@ def get_element_top_elevation(element: ifcopenshell.entity_instance, geometry) -
     :return: The Z value
     :rtype: float
     """
-    return max([v[2] for v in get_element_vertices(element, geometry)])
+    return float(get_element_vertices(element, geometry)[:, 2].max())
 
 
 def get_bbox(vertices: Iterable[VECTOR_3D]) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
@@ -383,16 +400,10 @@ def get_bbox(vertices: Iterable[VECTOR_3D]) -> tuple[npt.NDArray[np.float64], np
         maxz]))
     :rtype: tuple[np.array[float]]
     """
-    x_values = [v[0] for v in vertices]
-    y_values = [v[1] for v in vertices]
-    z_values = [v[2] for v in vertices]
-    minx = min(x_values)
-    maxx = max(x_values)
-    miny = min(y_values)
-    maxy = max(y_values)
-    minz = min(z_values)
-    maxz = max(z_values)
-    return (np.array([minx, miny, minz]), np.array([maxx, maxy, maxz]))
+    if not isinstance(vertices, np.ndarray):
+        vertices = np.array(list(vertices), dtype=np.float64)
+    vertices = vertices[:, 0:3]
+    return (vertices.min(axis=0), vertices.max(axis=0))
 
 
 def get_area_vf(vertices: npt.NDArray[np.float64], faces: npt.NDArray[np.int32]) -> float:
@@ -427,10 +438,8 @@ def get_area(geometry) -> float:
     :return: The surface area.
     :rtype: float
     """
-    verts = geometry.verts
-    faces = geometry.faces
-    vertices = np.array([[verts[i], verts[i + 1], verts[i + 2]] for i in range(0, len(verts), 3)])
-    faces = np.array([[faces[i], faces[i + 1], faces[i + 2]] for i in range(0, len(faces), 3)])
+    vertices = get_vertices(geometry)
+    faces = get_faces(geometry)
     return get_area_vf(vertices, faces)
 
 
@@ -463,10 +472,8 @@ def get_side_area(
     if direction is None:
         direction = {"X": (1.0, 0.0, 0.0), "Y": (0.0, 1.0, 0.0), "Z": (0.0, 0.0, 1.0)}[axis]
 
-    verts = geometry.verts
-    faces = geometry.faces
-    vertices = np.array([[verts[i], verts[i + 1], verts[i + 2]] for i in range(0, len(verts), 3)])
-    faces = np.array([[faces[i], faces[i + 1], faces[i + 2]] for i in range(0, len(faces), 3)])
+    vertices = get_vertices(geometry)
+    faces = get_faces(geometry)
 
     # Calculate the triangle normal vectors
     v1 = vertices[faces[:, 1]] - vertices[faces[:, 0]]
@@ -517,10 +524,8 @@ def get_footprint_area(
     if direction is None:
         direction = {"X": (1.0, 0.0, 0.0), "Y": (0.0, 1.0, 0.0), "Z": (0.0, 0.0, 1.0)}[axis]
 
-    verts = geometry.verts
-    faces = geometry.faces
-    vertices = np.array([[verts[i], verts[i + 1], verts[i + 2]] for i in range(0, len(verts), 3)])
-    faces = np.array([[faces[i], faces[i + 1], faces[i + 2]] for i in range(0, len(faces), 3)])
+    vertices = get_vertices(geometry)
+    faces = get_faces(geometry)
 
     # Calculate the triangle normal vectors
     v1 = vertices[faces[:, 1]] - vertices[faces[:, 0]]
@@ -539,8 +544,7 @@ def get_footprint_area(
     filtered_faces = faces[filtered_face_indices]
 
     # Flatten vertices along the direction
-    for idx in range(len(vertices)):
-        vertices[idx] = vertices[idx] - np.dot(vertices[idx], direction) * direction
+    vertices = vertices - np.outer(vertices @ direction, direction)
 
     # Now flatten 3D vertices into 2D polygons which can be unioned to find a footprint.
 
@@ -562,7 +566,7 @@ def get_footprint_area(
     c = np.cross(d, b)
 
     # Project the flattened vertices onto the basis to get 2D coordinates
-    vertices_2d = np.array([[np.dot(v, b), np.dot(v, c)] for v in vertices])
+    vertices_2d = np.column_stack((vertices @ b, vertices @ c))
 
     polygons = [shapely.Polygon(vertices_2d[face]) for face in filtered_faces]
     unioned_polygon = shapely.ops.unary_union(polygons)
@@ -581,10 +585,8 @@ def get_outer_surface_area(geometry) -> float:
     :return: The surface area.
     :rtype: float
     """
-    verts = geometry.verts
-    faces = geometry.faces
-    vertices = np.array([[verts[i], verts[i + 1], verts[i + 2]] for i in range(0, len(verts), 3)])
-    faces = np.array([[faces[i], faces[i + 1], faces[i + 2]] for i in range(0, len(faces), 3)])
+    vertices = get_vertices(geometry)
+    faces = get_faces(geometry)
 
     # Calculate the triangle normal vectors
     v1 = vertices[faces[:, 1]] - vertices[faces[:, 0]]
@@ -611,10 +613,8 @@ def get_footprint_perimeter(geometry) -> float:
     :return: The perimeter length
     :rtype: float
     """
-    verts = geometry.verts
-    faces = geometry.faces
-    vertices = np.array([[verts[i], verts[i + 1], verts[i + 2]] for i in range(0, len(verts), 3)])
-    faces = np.array([[faces[i], faces[i + 1], faces[i + 2]] for i in range(0, len(faces), 3)])
+    vertices = get_vertices(geometry)
+    faces = get_faces(geometry)
 
     # Calculate the triangle normal vectors
     v1 = vertices[faces[:, 1]] - vertices[faces[:, 0]]
@@ -628,25 +628,110 @@ def get_footprint_perimeter(geometry) -> float:
     negative_z_face_indices = np.where(triangle_normals[:, 2] < -tol)[0]
     negative_z_faces = faces[negative_z_face_indices]
 
-    # Initialize the set of counted edges and the perimeter
-    all_edges = set()
-    shared_edges = set()
-    perimeter = 0
-
-    # Loop through each face
-    for face in negative_z_faces:
-        # Loop through each edge of the face
-        for i in range(3):
-            # Get the indices of the two vertices that define the edge
-            edge = (face[i], face[(i + 1) % 3])
-            # Keep track of shared edges. Perimeter edges are unshared.
-            if (edge[1], edge[0]) in all_edges or (edge[0], edge[1]) in all_edges:
-                shared_edges.add((edge[0], edge[1]))
-                shared_edges.add((edge[1], edge[0]))
-            else:
-                all_edges.add(edge)
+    # Perimeter edges are edges which are not shared by two faces, regardless of their winding
+    edges = np.sort(negative_z_faces[:, [0, 1, 1, 2, 2, 0]].reshape((-1, 2)), axis=1)
+    edges, counts = np.unique(edges, axis=0, return_counts=True)
+    edges = edges[counts == 1]
+    return float(np.sum(np.linalg.norm(vertices[edges[:, 0]] - vertices[edges[:, 1]], axis=1)))
+
+
+def get_geometries_statistics(
+    geometries: Iterable,
+    side_axis: AXIS_LITERAL = "Y",
+    footprint_axis: AXIS_LITERAL = "Z",
+) -> dict[str, npt.NDArray[np.float64]]:
+    """Calculates volumes, areas, and bounding boxes of many geometries at once
+
+    All geometries are concatenated into a single mesh so that each quantity
+    is calculated for all faces in one vectorised pass and then summed per
+    geometry. This is significantly faster than calling ``get_volume``,
+    ``get_area``, etc for each geometry when doing takeoff of many shapes.
+
+    All values are in local coordinates relative to the object's placement.
+
+    The side area matches ``get_side_area``. The footprint area is the sum of
+    the projected areas of faces visible from the footprint axis, which
+    matches ``get_footprint_area`` unless visible faces overlap when
+    projected, such as in geometry with overhangs.
+
+    Example:
+
+    .. code:: python
+
+        geometries = [shape.geometry for shape in shapes]
+        stats = ifcopenshell.util.shape.get_geometries_statistics(geometries)
+        for shape, volume in zip(shapes, stats["volume"]):
+            print(shape.guid, volume)
+
+    :param geometries: Geometry outputs calculated by IfcOpenShell
+    :type geometries: iterable[geometry]
+    :param side_axis: Either X, Y, or Z. Defaults to Y, which is used for
+        standard walls.
+    :type side_axis: str
+    :param footprint_axis: Either X, Y, or Z. Defaults to Z.
+    :type footprint_axis: str
+    :return: A dictionary of arrays with one row per geometry. Keys are
+        volume, area, side_area, footprint_area, bbox_min, and bbox_max. The
+        bounding box arrays have XYZ columns, which are NaN for geometry
+        without vertices.
+    :rtype: dict[str, np.array]
+    """
+    vertices = []
+    faces = []
+    for geometry in geometries:
+        vertices.append(get_vertices(geometry))
+        faces.append(get_faces(geometry))
+
+    total = len(vertices)
+    vertex_counts = np.array([len(v) for v in vertices], dtype=np.int64)
+    face_counts = np.array([len(f) for f in faces], dtype=np.int64)
+    vertex_offsets = np.cumsum(vertex_counts) - vertex_counts
+
+    if total:
+        all_vertices = np.concatenate(vertices)
+        all_faces = np.concatenate(faces).astype(np.int64) + np.repeat(vertex_offsets, face_counts)[:, np.newaxis]
+    else:
+        all_vertices = np.empty((0, 3), dtype=np.float64)
+        all_faces = np.empty((0, 3), dtype=np.int64)
+    face_geometries = np.repeat(np.arange(total), face_counts)
+
+    p1 = all_vertices[all_faces[:, 0]]
+    p2 = all_vertices[all_faces[:, 1]]
+    p3 = all_vertices[all_faces[:, 2]]
+    triangle_normals = np.cross(p2 - p1, p3 - p1)
+    # Twice the area of each triangle
+    triangle_lengths = np.linalg.norm(triangle_normals, axis=1)
+
+    def sum_per_geometry(values):
+        return np.bincount(face_geometries, weights=values, minlength=total).astype(np.float64)
 
-    return sum([np.linalg.norm(vertices[e[0]] - vertices[e[1]]) for e in (all_edges - shared_edges)])
+    signed_volumes = np.einsum("ij,ij->i", p1, np.cross(p2, p3)) / 6.0
+
+    # normal_tol < 0 is pointing away, = 0 is perpendicular, and > 0 is pointing towards.
+    normal_tol = 0.01  # Close to perpendicular, but with a fuzz for numerical tolerance
+    axes = {"X": 0, "Y": 1, "Z": 2}
+    side_dots = triangle_normals[:, axes[side_axis]]
+    side_areas = np.where(side_dots > normal_tol * triangle_lengths, triangle_lengths / 2, 0.0)
+    footprint_dots = triangle_normals[:, axes[footprint_axis]]
+    footprint_areas = np.where(footprint_dots > normal_tol * triangle_lengths, footprint_dots / 2, 0.0)
+
+    bbox_min = np.full((total, 3), np.nan)
+    bbox_max = np.full((total, 3), np.nan)
+    has_vertices = vertex_counts > 0
+    if has_vertices.any():
+        # Empty geometries have no vertices, so each offset segment spans exactly one geometry's vertices
+        offsets = vertex_offsets[has_vertices]
+        bbox_min[has_vertices] = np.minimum.reduceat(all_vertices, offsets, axis=0)
+        bbox_max[has_vertices] = np.maximum.reduceat(all_vertices, offsets, axis=0)
+
+    return {
+        "volume": np.abs(sum_per_geometry(signed_volumes)),
+        "area": sum_per_geometry(triangle_lengths / 2),
+        "side_area": sum_per_geometry(side_areas),
+        "footprint_area": sum_per_geometry(footprint_areas),
+        "bbox_min": bbox_min,
+        "bbox_max": bbox_max,
+    }
 
 
 def get_profiles(element: ifcopenshell.entity_instance) -> list[ifcopenshell.entity_instance]:
@@ -17,12 +17,14 @@
 # along with IfcOpenShell.  If not, see <http://www.gnu.org/licenses/>.
 
 from fractions import Fraction
+from functools import lru_cache
 from math import pi
 from typing import Iterable, Any, Union, Literal, Optional
 
 import ifcopenshell
 import ifcopenshell.ifcopenshell_wrapper as ifcopenshell_wrapper
 import ifcopenshell.api
+import ifcopenshell.util.element
 
 prefixes = {
     "EXA": 1e18,
@@ -580,9 +582,9 @@ def convert(value: float, from_prefix: Optional[str], from_unit: str, to_prefix:
         return value * (1 / si_conversions[to_unit.lower()])
     elif to_prefix:
         value *= 1 / get_prefix_multiplier(to_prefix)
-        if "SQUARE" in from_unit:
+        if "SQUARE" in to_unit:
             value *= 1 / get_prefix_multiplier(to_prefix)
-        elif "CUBIC" in from_unit:
+        elif "CUBIC" in to_unit:
             value *= 1 / get_prefix_multiplier(to_prefix)
             value *= 1 / get_prefix_multiplier(to_prefix)
     return value
@@ -746,40 +748,167 @@ def iter_element_and_attributes_per_type(
             yield element, attr, val
 
 
-def convert_file_length_units(ifc_file: ifcopenshell.file, target_units: str = "METER") -> ifcopenshell.file:
-    """Converts all units in an IFC file to the specified target units. Returns a new file."""
+@lru_cache(maxsize=None)
+def get_measure_attributes(schema_identifier: str, unit_type: str) -> dict[str, tuple[int, ...]]:
+    """Returns the attributes of each entity which are measured in a unit type
+
+    Measures of a unit type include their specialisations, such as
+    IfcPositiveLengthMeasure and IfcNonNegativeLengthMeasure for a
+    LENGTHUNIT. Aggregates of measures, such as the CoordList of an
+    IfcCartesianPointList3D, are also included. Attributes that select a
+    measure, such as the NominalValue of an IfcPropertySingleValue, are not.
+
+    The result is cached per schema, so it is cheap to call repeatedly.
+
+    :param schema_identifier: The schema, such as "IFC4"
+    :type schema_identifier: str
+    :param unit_type: The type of unit, such as "LENGTHUNIT" or "AREAUNIT"
+    :type unit_type: str
+    :return: A dictionary of entity names mapped to the indices of their
+        non-derived attributes which are measured in the unit type. Entities
+        without any such attributes are omitted.
+    :rtype: dict[str, tuple[int, ...]]
+    """
+    schema = ifcopenshell_wrapper.schema_by_name(schema_identifier)
+    measure_classes = [
+        t.name()
+        for t in schema.declarations()
+        if isinstance(t, ifcopenshell_wrapper.type_declaration)
+        and t.name().endswith("Measure")
+        and get_measure_unit_type(t.name()) == unit_type
+    ]
+    results = {}
+    for entity in schema.entities():
+        indices = []
+        for i, (attr, is_derived) in enumerate(zip(entity.all_attributes(), entity.derived())):
+            if is_derived:
+                continue
+            attr_type = attr.type_of_attribute()
+            if any(is_attr_type(attr_type, measure_class) for measure_class in measure_classes):
+                indices.append(i)
+        if indices:
+            results[entity.name()] = tuple(indices)
+    return results
+
+
+def convert_file_units(
+    ifc_file: ifcopenshell.file, unit_type: str = "LENGTHUNIT", target_units: str = "METER", in_place: bool = False
+) -> ifcopenshell.file:
+    """Converts all values of a unit type in an IFC file to the target units
+
+    All attributes measured in the unit type, as determined by
+    get_measure_attributes, are scaled. Large aggregates of values, such as
+    point lists, are scaled as arrays. The project unit of that type is then
+    replaced by the target units.
+
+    Only units related by a scale factor are supported, so temperatures
+    can't be converted.
+
+    :param ifc_file: The IFC file.
+    :type ifc_file: ifcopenshell.file
+    :param unit_type: The type of unit to convert, such as "LENGTHUNIT",
+        "AREAUNIT", "VOLUMEUNIT", or "PLANEANGLEUNIT".
+    :type unit_type: str
+    :param target_units: The SI unit name with an optional prefix, such as
+        "MILLIMETRE" or "SQUARE_METRE", or a conversion based unit name, such
+        as "foot" or "degree".
+    :type target_units: str
+    :param in_place: If true, the file is converted in place. Otherwise, a
+        converted copy is returned and the original file is left untouched.
+    :type in_place: bool
+    :return: The converted file
+    :rtype: ifcopenshell.file
+
+    Example:
+
+    .. code:: python
+
+        model = ifcopenshell.util.unit.convert_file_units(model, "LENGTHUNIT", "MILLIMETRE", in_place=True)
+        model = ifcopenshell.util.unit.convert_file_units(model, "PLANEANGLEUNIT", "degree", in_place=True)
+    """
+    if unit_type == "THERMODYNAMICTEMPERATUREUNIT":
+        raise Exception("Temperatures can't be converted as their units may have offsets.")
+
     prefix = get_prefix(target_units)
-    si_unit = get_unit_name(target_units)
+    si_name = target_units.upper().replace("METER", "METRE").replace(" ", "_")
+    if prefix:
+        si_name = si_name.replace(prefix, "", 1)
 
-    # Copy all elements from the original file to the patched file
-    file_patched = ifcopenshell.file.from_string(ifc_file.wrapped_data.to_string())
+    if in_place:
+        file_patched = ifc_file
+    else:
+        file_patched = ifcopenshell.file.from_string(ifc_file.wrapped_data.to_string())
 
     unit_assignment = get_unit_assignment(file_patched)
+    old_unit = next((u for u in unit_assignment.Units if getattr(u, "UnitType", None) == unit_type), None)
+    if old_unit is None:
+        raise Exception(f"Couldn't find a {unit_type} assigned to the project.")
 
-    old_length = next(u for u in unit_assignment.Units if getattr(u, "UnitType", None) == "LENGTHUNIT")
-    if si_unit:
-        new_length = ifcopenshell.api.run("unit.add_si_unit", file_patched, unit_type="LENGTHUNIT", prefix=prefix)
+    if si_name == si_type_names.get(unit_type):
+        new_unit = ifcopenshell.api.run("unit.add_si_unit", file_patched, unit_type=unit_type, prefix=prefix)
     else:
         target_units = target_units.lower()
-        if imperial_types.get(target_units) != "LENGTHUNIT":
+        if imperial_types.get(target_units) != unit_type:
             raise Exception(
-                f'Couldn\'t identify target units "{target_units}". '
+                f'Couldn\'t identify target units "{target_units}" for {unit_type}. '
                 'The method supports singular unit names like "CENTIMETER", "METER", "FOOT", etc.'
             )
-        new_length = ifcopenshell.api.run("unit.add_conversion_based_unit", file_patched, name=target_units)
+        new_unit = ifcopenshell.api.run("unit.add_conversion_based_unit", file_patched, name=target_units)
 
-    # support tuple of tuples, as in IfcCartesianPointList3D.CoordList
-    def convert_value(value):
-        if not isinstance(value, tuple):
-            return convert_unit(value, old_length, new_length)
-        return tuple(convert_value(v) for v in value)
+    scale = convert_unit(1.0, old_unit, new_unit)
 
-    # Traverse all elements and their nested attributes in the file and convert them
-    for element, attr, val in iter_element_and_attributes_per_type(file_patched, "IfcLengthMeasure"):
-        new_value = convert_value(val)
-        setattr(element, attr.name(), new_value)
+    for ifc_class, indices in get_measure_attributes(file_patched.schema, unit_type).items():
+        for element in file_patched.by_type(ifc_class, include_subtypes=False):
+            for i in indices:
+                value = element[i]
+                if value is None:
+                    continue
+                element[i] = scale_value(value, scale)
 
-    file_patched.remove(old_length)
-    unit_assignment.Units = tuple([new_length, *unit_assignment.Units])
+    unit_assignment.Units = tuple([new_unit, *(u for u in unit_assignment.Units if u != old_unit)])
+    ifcopenshell.util.element.remove_deep2(file_patched, old_unit)
 
     return file_patched
+
+
+def scale_value(value: Union[float, tuple], scale: float) -> Union[float, tuple, list]:
+    """Scales a value, or an aggregate of values of any depth
+
+    :param value: A number, or a possibly nested tuple of numbers
+    :type value: Union[float, tuple]
+    :param scale: The factor to scale by
+    :type scale: float
+    :return: The scaled value. Aggregates are returned as lists.
+    :rtype: Union[float, tuple, list]
+    """
+    if not isinstance(value, tuple):
+        return value * scale
+    # Imported here so that importing this module stays cheap
+    import numpy as np
+
+    try:
+        return (np.array(value, dtype=float) * scale).tolist()
+    except ValueError:
+        # Aggregates of aggregates may be ragged
+        return [scale_value(v, scale) for v in value]
+
+
+def convert_file_length_units(
+    ifc_file: ifcopenshell.file, target_units: str = "METER", in_place: bool = False
+) -> ifcopenshell.file:
+    """Converts all length units in an IFC file to the specified target units
+
+    See convert_file_units for details.
+
+    :param ifc_file: The IFC file.
+    :type ifc_file: ifcopenshell.file
+    :param target_units: The target length units, such as "MILLIMETRE" or
+        "foot".
+    :type target_units: str
+    :param in_place: If true, the file is converted in place. Otherwise, a
+        converted copy is returned and the original file is left untouched.
+    :type in_place: bool
+    :return: The converted file
+    :rtype: ifcopenshell.file
+    """
+    return convert_file_units(ifc_file, "LENGTHUNIT", target_units, in_place=in_place)
@@ -30,12 +30,14 @@ Available flags:
 - ``--rules``: Also check express rules.
 - ``--json``: Produce JSON output.
 - ``--fields``: Output more detailed information about failed entities (available only with ``--json``).
+- ``--jobs=N``: Validate instances using N processes.
 """
 
 import os
 import sys
 import json
 import functools
+import multiprocessing
 
 from collections import namedtuple
 from typing import Union, Iterator, Any, Optional
@@ -43,7 +45,6 @@ from logging import Logger
 
 import ifcopenshell
 import ifcopenshell.ifcopenshell_wrapper
-import ifcopenshell.express.rule_executor
 
 named_type = ifcopenshell.ifcopenshell_wrapper.named_type
 aggregation_type = ifcopenshell.ifcopenshell_wrapper.aggregation_type
@@ -83,6 +84,32 @@ class json_logger:
         return functools.partial(self.log, level)
 
 
+class recording_logger:
+    """Records formatted log messages, so that they can be replayed by another logger"""
+
+    def __init__(self):
+        self.records = []
+
+    def log(self, level, message, *args):
+        self.records.append((level, message % args if args else message))
+
+    # Explicit levels, as unlike the json_logger this logger must not appear to support set_state
+    def debug(self, message, *args):
+        self.log("debug", message, *args)
+
+    def info(self, message, *args):
+        self.log("info", message, *args)
+
+    def warning(self, message, *args):
+        self.log("warning", message, *args)
+
+    def error(self, message, *args):
+        self.log("error", message, *args)
+
+    def critical(self, message, *args):
+        self.log("critical", message, *args)
+
+
 simple_type_python_mapping = {
     # @todo should include unicode for Python2
     "string": str,
@@ -305,99 +332,45 @@ def get_entity_attributes(schema: schema_definition, entity: str) -> tuple[entit
     return entity_attrs
 
 
-def validate(f: Union[ifcopenshell.file, str], logger: Logger, express_rules=False) -> None:
-    """
-    For an IFC population model `f` (or filepath to such a file) validate whether the entity attribute values are correctly supplied. As this
-    is a function that is applied after a file has been parsed, certain types of errors in syntax, duplicate
-    numeric identifiers or invalidate entity names are not caught by this function. Some of these might have been
-    logged and can be retrieved by calling `ifcopenshell.get_log()`. A verification of the type, entity and global
-    WHERE rules is also not implemented.
-
-    For every entity instance in the model, it is checked that the entity is not abstract that every attribute value
-    is of the correct type and that the inverse attributes are of the correct cardinality.
-
-    Express simple types are checked for their valuation type. For select types it is asserted that the value conforms
-    to one of the leaves. For enumerations it is checked that the value is indeed on of the items. For aggregations it
-    is checked that the elements and the cardinality conforms. Type declarations (IfcInteger which is an integer) are
-    unpacked until one of the above cases is reached.
+def get_simple_type_python(attr_type: attribute_types) -> Union[type, set, None]:
+    """Gets the Python type of an attribute type which resolves to a simple type, if any
 
-    It is recommended to supply the path to the file, so that internal C++ errors reported during the parse stage
-    are also captured.
-
-    Example:
-
-    .. code:: python
-
-        logger = ifcopenshell.validate.json_logger()
-        ifcopenshell.validate.validate("/path/to/model.ifc", logger, express_rules=True)
-        from pprint import pprint
-        pprint(logger.statements)
+    This is only valid for values which are not entity instances, for which
+    type declarations are unpacked as well.
     """
+    while isinstance(attr_type, (named_type, type_declaration)):
+        attr_type = attr_type.declared_type()
+    if isinstance(attr_type, simple_type):
+        return simple_type_python_mapping[attr_type.declared_type()]
 
-    # Originally there was no way in Python to distinguish on an entity instance attribute value whether the
-    # value supplied in the model was NIL ($) or 'missing because derived in subtype' (*). For validation this
-    # however this may be important, and hence a feature switch has been implemented to return *-values as
-    # instances of a dedicated type `ifcopenshell.ifcopenshell_wrapper.attribute_value_derived`.
-    attribute_value_derived_org = ifcopenshell.ifcopenshell_wrapper.get_feature("use_attribute_value_derived")
-    ifcopenshell.ifcopenshell_wrapper.set_feature("use_attribute_value_derived", True)
-
-    filename = None
-
-    if hasattr(logger, "set_state"):
-        logger.set_state("type", "schema")
-
-    if not isinstance(f, ifcopenshell.file):
-        # get_log() clears log existing output
-        ifcopenshell.get_log()
-        # @todo restore log format
-        ifcopenshell.ifcopenshell_wrapper.set_log_format_json()
-
-        filename = f
-        try:
-            f = ifcopenshell.open(f)
-        except ifcopenshell.SchemaError as e:
-            current_dir_files = {fn.lower(): fn for fn in os.listdir(".")}
-            schema_name = str(e).split(" ")[-1].lower()
-            exists = current_dir_files.get(schema_name + ".exp")
-            if exists:
-                schema = ifcopenshell.express.parse(exists)
-                ifcopenshell.register_schema(schema)
-
-                f = ifcopenshell.open(f)
-            else:
-                logger.error(f"Unsupported schema: {schema_name}")
-                return
-
-        log_internal_cpp_errors(filename, logger)
-
-    schema = ifcopenshell.ifcopenshell_wrapper.schema_by_name(f.schema_identifier)
-    used_guids: dict[str, ifcopenshell.entity_instance] = dict()
-
-    for inst in f:
-        if hasattr(logger, "set_state"):
-            logger.set_state("instance", inst)
 
-        if hasattr(inst, "GlobalId"):
-            guid = inst.GlobalId
-            if guid is not None and guid in used_guids:
-                rule = "Rule IfcRoot.UR1:\n    The attribute GlobalId should be unique"
-                previous_element = used_guids[guid]
-                logger.error(
-                    "On instance:\n    %s\n   %s\n%s\nViolated by:\n    %s\n    %s",
-                    inst,
-                    annotate_inst_attr_pos(inst, 0),
-                    rule,
-                    previous_element,
-                    annotate_inst_attr_pos(previous_element, 0),
-                )
-            else:
-                used_guids[guid] = inst
+class entity_checker:
+    """Validates instances of a single entity
 
-        entity, attrs = get_entity_attributes(schema, inst.is_a())
+    Everything derived from the schema, such as the attributes, which of them
+    are derived, their types and simple type fast paths, is computed once per
+    entity and reused for every instance.
+    """
 
-        if entity.is_abstract():
+    def __init__(self, schema: schema_definition, entity_name: str):
+        self.schema = schema
+        self.entity, self.attrs = get_entity_attributes(schema, entity_name)
+        self.is_abstract = self.entity.is_abstract()
+        self.derived = self.entity.derived()
+        self.attr_names = [f"{self.entity.name()}.{attr.name()}" for attr in self.attrs]
+        self.attr_types = [attr.type_of_attribute() for attr in self.attrs]
+        self.simple_types = [get_simple_type_python(attr_type) for attr_type in self.attr_types]
+        self.inverse_attrs = [
+            (attr, attr.name(), f"{self.entity.name()}.{attr.name()}") for attr in self.entity.all_inverse_attributes()
+        ]
+
+    def validate(self, inst: ifcopenshell.entity_instance, logger: Logger) -> None:
+        entity, attrs, schema = self.entity, self.attrs, self.schema
+        has_state = hasattr(logger, "set_state")
+
+        if self.is_abstract:
             e = "Entity %s is abstract" % entity.name()
-            if hasattr(logger, "set_state"):
+            if has_state:
                 logger.set_state("attribute", None)
                 logger.error(e)
             else:
@@ -410,8 +383,8 @@ def validate(f: Union[ifcopenshell.file, str], logger: Logger, express_rules=Fal
                 values[i] = inst[i]
                 pass
             except:
-                if hasattr(logger, "set_state"):
-                    logger.set_state("attribute", f"{entity.name()}.{attrs[i].name()}")
+                if has_state:
+                    logger.set_state("attribute", self.attr_names[i])
                     logger.error("Invalid attribute value")
                 else:
                     logger.error(
@@ -424,10 +397,10 @@ def validate(f: Union[ifcopenshell.file, str], logger: Logger, express_rules=Fal
                 has_invalid_value = True
 
         if not has_invalid_value:
-            for i, (attr, val, is_derived) in enumerate(zip(attrs, values, entity.derived())):
+            for i, (attr, val, is_derived) in enumerate(zip(attrs, values, self.derived)):
                 if is_derived and not isinstance(val, ifcopenshell.ifcopenshell_wrapper.attribute_value_derived):
-                    if hasattr(logger, "set_state"):
-                        logger.set_state("attribute", f"{entity.name()}.{attr.name()}")
+                    if has_state:
+                        logger.set_state("attribute", self.attr_names[i])
                         logger.error("Attribute is derived in subtype")
                     else:
                         logger.error(
@@ -438,8 +411,8 @@ def validate(f: Union[ifcopenshell.file, str], logger: Logger, express_rules=Fal
                         )
 
                 if val is None and not attr.optional() and not is_derived:
-                    if hasattr(logger, "set_state"):
-                        logger.set_state("attribute", f"{entity.name()}.{attr.name()}")
+                    if has_state:
+                        logger.set_state("attribute", self.attr_names[i])
                         logger.error("Attribute not optional")
                     else:
                         logger.error(
@@ -450,11 +423,18 @@ def validate(f: Union[ifcopenshell.file, str], logger: Logger, express_rules=Fal
                         )
 
                 if val is not None and not is_derived:
-                    attr_type = attr.type_of_attribute()
+                    # Most values are simple, which can be checked without walking the schema
+                    simple_type_python = self.simple_types[i]
+                    if simple_type_python is not None and not isinstance(val, ifcopenshell.entity_instance):
+                        if type(simple_type_python) == set:
+                            if val in simple_type_python:
+                                continue
+                        elif type(val) == simple_type_python:
+                            continue
                     try:
-                        assert_valid(attr_type, val, schema, attr=attr)
+                        assert_valid(self.attr_types[i], val, schema, attr=attr)
                     except ValidationError as e:
-                        if hasattr(logger, "set_state"):
+                        if has_state:
                             logger.set_state("attribute", e.attribute)
                             logger.error(str(e))
                         else:
@@ -465,12 +445,12 @@ def validate(f: Union[ifcopenshell.file, str], logger: Logger, express_rules=Fal
                                 e,
                             )
 
-        for attr in entity.all_inverse_attributes():
+        for attr, name, qualified_name in self.inverse_attrs:
             try:
-                val = getattr(inst, attr.name())
+                val = getattr(inst, name)
             except Exception as e:
-                if hasattr(logger, "set_state"):
-                    logger.set_state("attribute", f"{entity.name()}.{attr.name()}")
+                if has_state:
+                    logger.set_state("attribute", qualified_name)
                     logger.error(str(e))
                 else:
                     logger.error("For instance:\n    %s\n%s", inst, e)
@@ -478,13 +458,218 @@ def validate(f: Union[ifcopenshell.file, str], logger: Logger, express_rules=Fal
             try:
                 assert_valid_inverse(attr, val, schema)
             except ValidationError as e:
-                if hasattr(logger, "set_state"):
-                    logger.set_state("attribute", f"{entity.name()}.{attr.name()}")
+                if has_state:
+                    logger.set_state("attribute", qualified_name)
                     logger.error(str(e))
                 else:
                     logger.error("For instance:\n    %s\n%s", inst, e)
 
+
+entity_checker_map: dict[tuple[str, str], entity_checker] = {}
+
+
+def get_entity_checker(schema: schema_definition, entity: str) -> entity_checker:
+    cache_key = schema.name(), entity
+    checker = entity_checker_map.get(cache_key)
+    if checker is None:
+        checker = entity_checker_map[cache_key] = entity_checker(schema, entity)
+    return checker
+
+
+def validate_instances(
+    instances: Iterator[ifcopenshell.entity_instance],
+    schema: schema_definition,
+    logger: Logger,
+    used_guids: dict[str, ifcopenshell.entity_instance],
+) -> None:
+    """Validates the attributes and inverses of instances
+
+    :param used_guids: The first instance using each GlobalId. Instances using
+        a GlobalId which belongs to another instance are logged as errors. New
+        GlobalIds are added as they are encountered.
+    """
+    has_state = hasattr(logger, "set_state")
+    for inst in instances:
+        if has_state:
+            logger.set_state("instance", inst)
+
+        if hasattr(inst, "GlobalId"):
+            guid = inst.GlobalId
+            if guid is not None and (previous_element := used_guids.setdefault(guid, inst)) != inst:
+                rule = "Rule IfcRoot.UR1:\n    The attribute GlobalId should be unique"
+                logger.error(
+                    "On instance:\n    %s\n   %s\n%s\nViolated by:\n    %s\n    %s",
+                    inst,
+                    annotate_inst_attr_pos(inst, 0),
+                    rule,
+                    previous_element,
+                    annotate_inst_attr_pos(previous_element, 0),
+                )
+
+        get_entity_checker(schema, inst.is_a()).validate(inst, logger)
+
+
+# Set in the parent before forking so that workers inherit the model
+_worker_validation = None
+
+
+def create_worker_logger(logger: Logger, **state) -> Union[json_logger, recording_logger]:
+    """Creates a logger for a worker process, matching the kind of logger of the parent"""
+    if not hasattr(logger, "set_state"):
+        return recording_logger()
+    worker_logger = json_logger()
+    for key, value in state.items():
+        worker_logger.set_state(key, value)
+    return worker_logger
+
+
+def get_worker_log(worker_logger: Union[json_logger, recording_logger]) -> list:
+    """Gets the log of a worker logger in a form which can be sent to the parent process"""
+    if isinstance(worker_logger, recording_logger):
+        return worker_logger.records
+    # Instances cannot be sent between processes, so they are sent as IDs
+    for statement in worker_logger.statements:
+        if isinstance(statement.get("instance"), ifcopenshell.entity_instance):
+            statement["instance"] = statement["instance"].id()
+    return worker_logger.statements
+
+
+def replay_worker_log(f: ifcopenshell.file, logger: Logger, log: list) -> None:
+    """Logs the results of get_worker_log from a worker process to the parent logger"""
+    if not hasattr(logger, "set_state"):
+        for level, message in log:
+            getattr(logger, level)(message)
+        return
+    for statement in log:
+        if isinstance(statement.get("instance"), int):
+            statement["instance"] = f.by_id(statement["instance"])
+        if isinstance(logger, json_logger):
+            logger.statements.append(statement)
+        else:
+            for key, value in statement.items():
+                if key not in ("level", "message"):
+                    logger.set_state(key, value)
+            getattr(logger, statement["level"])(statement["message"])
+
+
+def _validate_chunk(chunk: tuple[int, int]) -> list:
+    f, ids, schema, used_guids, filename, logger = _worker_validation
+    worker_logger = create_worker_logger(logger, type="schema")
+    validate_instances((f.by_id(i) for i in ids[chunk[0] : chunk[1]]), schema, worker_logger, used_guids)
     if filename:
+        log_internal_cpp_errors(filename, worker_logger)
+    return get_worker_log(worker_logger)
+
+
+def validate_parallel(
+    f: ifcopenshell.file, logger: Logger, schema: schema_definition, filename: Optional[str], processes: int
+) -> None:
+    """Validates instances in a pool of processes, each validating a range of IDs
+
+    Results are logged in the same order as a sequential validation, except
+    that errors found by the parser are logged per range.
+    """
+    global _worker_validation
+
+    ids = []
+    used_guids = {}
+    for inst in f:
+        ids.append(inst.id())
+        if hasattr(inst, "GlobalId") and (guid := inst.GlobalId) is not None:
+            used_guids.setdefault(guid, inst)
+
+    if filename:
+        # Flush parser errors so far, so that workers only report their own
+        log_internal_cpp_errors(filename, logger)
+
+    chunk_size = -(-len(ids) // processes)
+    chunks = [(i, min(i + chunk_size, len(ids))) for i in range(0, len(ids), chunk_size)]
+
+    _worker_validation = (f, ids, schema, used_guids, filename, logger)
+    try:
+        with multiprocessing.get_context("fork").Pool(processes) as pool:
+            for log in pool.imap(_validate_chunk, chunks):
+                replay_worker_log(f, logger, log)
+    finally:
+        _worker_validation = None
+
+
+def validate(f: Union[ifcopenshell.file, str], logger: Logger, express_rules=False, processes=1) -> None:
+    """
+    For an IFC population model `f` (or filepath to such a file) validate whether the entity attribute values are correctly supplied. As this
+    is a function that is applied after a file has been parsed, certain types of errors in syntax, duplicate
+    numeric identifiers or invalidate entity names are not caught by this function. Some of these might have been
+    logged and can be retrieved by calling `ifcopenshell.get_log()`. A verification of the type, entity and global
+    WHERE rules is also not implemented.
+
+    For every entity instance in the model, it is checked that the entity is not abstract that every attribute value
+    is of the correct type and that the inverse attributes are of the correct cardinality.
+
+    Express simple types are checked for their valuation type. For select types it is asserted that the value conforms
+    to one of the leaves. For enumerations it is checked that the value is indeed on of the items. For aggregations it
+    is checked that the elements and the cardinality conforms. Type declarations (IfcInteger which is an integer) are
+    unpacked until one of the above cases is reached.
+
+    It is recommended to supply the path to the file, so that internal C++ errors reported during the parse stage
+    are also captured.
+
+    Validation may be split across multiple `processes`, each validating a range of instances, where the platform
+    supports forking processes. Results are merged into the logger in the same order as a sequential validation.
+
+    Example:
+
+    .. code:: python
+
+        logger = ifcopenshell.validate.json_logger()
+        ifcopenshell.validate.validate("/path/to/model.ifc", logger, express_rules=True)
+        from pprint import pprint
+        pprint(logger.statements)
+    """
+
+    # Originally there was no way in Python to distinguish on an entity instance attribute value whether the
+    # value supplied in the model was NIL ($) or 'missing because derived in subtype' (*). For validation this
+    # however this may be important, and hence a feature switch has been implemented to return *-values as
+    # instances of a dedicated type `ifcopenshell.ifcopenshell_wrapper.attribute_value_derived`.
+    attribute_value_derived_org = ifcopenshell.ifcopenshell_wrapper.get_feature("use_attribute_value_derived")
+    ifcopenshell.ifcopenshell_wrapper.set_feature("use_attribute_value_derived", True)
+
+    filename = None
+
+    if hasattr(logger, "set_state"):
+        logger.set_state("type", "schema")
+
+    if not isinstance(f, ifcopenshell.file):
+        # get_log() clears log existing output
+        ifcopenshell.get_log()
+        # @todo restore log format
+        ifcopenshell.ifcopenshell_wrapper.set_log_format_json()
+
+        filename = f
+        try:
+            f = ifcopenshell.open(f)
+        except ifcopenshell.SchemaError as e:
+            current_dir_files = {fn.lower(): fn for fn in os.listdir(".")}
+            schema_name = str(e).split(" ")[-1].lower()
+            exists = current_dir_files.get(schema_name + ".exp")
+            if exists:
+                schema = ifcopenshell.express.parse(exists)
+                ifcopenshell.register_schema(schema)
+
+                f = ifcopenshell.open(f)
+            else:
+                logger.error(f"Unsupported schema: {schema_name}")
+                return
+
+        log_internal_cpp_errors(filename, logger)
+
+    schema = ifcopenshell.ifcopenshell_wrapper.schema_by_name(f.schema_identifier)
+    is_parallel = processes > 1 and "fork" in multiprocessing.get_all_start_methods()
+    if is_parallel:
+        validate_parallel(f, logger, schema, filename, processes)
+    else:
+        validate_instances(f, schema, logger, {})
+
+    if filename and not is_parallel:
         # IfcOpenShell uses lazy-loading, so entity instance
         # attributes aren't parsed yet, and counts aren't verified yet.
         # Re capturing the log when validate() is finished
@@ -496,10 +681,13 @@ def validate(f: Union[ifcopenshell.file, str], logger: Logger, express_rules=Fal
     ifcopenshell.ifcopenshell_wrapper.set_feature("use_attribute_value_derived", attribute_value_derived_org)
 
     if express_rules:
+        # The rule executor and the compiled rules of the schema are only loaded when needed
+        import ifcopenshell.express.rule_executor
+
         if hasattr(logger, "set_state"):
             logger.set_state("instance", None)
             logger.set_state("attribute", None)
-        ifcopenshell.express.rule_executor.run(f, logger)
+        ifcopenshell.express.rule_executor.run(f, logger, processes=processes)
 
 
 if __name__ == "__main__":
@@ -517,7 +705,8 @@ if __name__ == "__main__":
             logger.setLevel(logging.DEBUG)
 
         print("Validating", fn, file=sys.stderr)
-        validate(fn, logger, "--rules" in flags)
+        jobs = [int(x.split("=")[1]) for x in flags if x.startswith("--jobs=")]
+        validate(fn, logger, "--rules" in flags, processes=jobs[0] if jobs else 1)
 
         if "--json" in flags:
             sys.stdout.reconfigure(encoding="utf-8")
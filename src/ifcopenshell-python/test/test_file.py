@@ -119,6 +119,54 @@ class TestTransaction(test.bootstrap.IFC4):
         self.file.set_history_size(1)
         assert len(self.file.history) == 1
 
+    def test_setting_the_history_memory_limit(self):
+        for i in range(3):
+            self.file.begin_transaction()
+            self.file.createIfcWall(Name="Foobar")
+            self.file.end_transaction()
+        assert len(self.file.history) == 3
+        self.file.set_history_memory_limit(self.file.history[-1].size)
+        assert len(self.file.history) == 1
+        self.file.set_history_memory_limit(0)
+        assert len(self.file.history) == 1
+
+    def test_coalescing_repeated_edits_of_an_attribute(self):
+        element = self.file.createIfcWall(Name="foo")
+        self.file.begin_transaction()
+        element.Name = "bar"
+        element.Name = "baz"
+        self.file.end_transaction()
+        assert len([o for o in self.file.history[0].operations if o]) == 1
+        self.file.undo()
+        assert element.Name == "foo"
+        self.file.redo()
+        assert element.Name == "baz"
+
+    def test_not_coalescing_edits_across_deletions(self):
+        element = self.file.createIfcWall(GlobalId="id")
+        rel = self.file.createIfcRelAggregates(RelatingObject=element)
+        wall = self.file.createIfcWall()
+        self.file.begin_transaction()
+        rel.RelatingObject = wall
+        self.file.remove(element)
+        rel.RelatingObject = self.file.createIfcSlab()
+        self.file.end_transaction()
+        self.file.undo()
+        assert rel.RelatingObject.id() == 1
+
+    def test_that_you_can_undo_and_redo_deletion_of_numeric_aggregates(self):
+        point = self.file.createIfcCartesianPoint((1.0, 2.0, 3.0))
+        point_list = self.file.createIfcCartesianPointList3D(((0.0, 0.0, 0.0), (1.0, 1.0, 1.0)))
+        self.file.begin_transaction()
+        self.file.remove(point)
+        self.file.remove(point_list)
+        self.file.end_transaction()
+        self.file.undo()
+        assert self.file.by_id(1).Coordinates == (1.0, 2.0, 3.0)
+        assert self.file.by_id(2).CoordList == ((0.0, 0.0, 0.0), (1.0, 1.0, 1.0))
+        self.file.redo()
+        assert len(list(self.file)) == 0
+
     def test_discarding_the_active_transaction(self):
         self.file.begin_transaction()
         self.file.discard_transaction()
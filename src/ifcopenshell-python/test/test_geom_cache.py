@@ -0,0 +1,90 @@
+# IfcOpenShell - IFC toolkit and geometry engine
+# Copyright (C) 2021 Thomas Krijnen <thomas@aecgeeks.com>
+#
+# This file is part of IfcOpenShell.
+#
+# IfcOpenShell is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IfcOpenShell is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IfcOpenShell.  If not, see <http://www.gnu.org/licenses/>.
+
+import ifcopenshell
+import ifcopenshell.api
+import ifcopenshell.geom
+import ifcopenshell.geom.cache
+import ifcopenshell.util.unit
+
+
+def create_model(height=3.0, padding=0):
+    model = ifcopenshell.api.run("project.create_file")
+    # Shift STEP ids so that identical geometry has different ids across models
+    for i in range(padding):
+        model.createIfcPerson()
+    ifcopenshell.api.run("root.create_entity", model, ifc_class="IfcProject")
+    ifcopenshell.api.run("unit.assign_unit", model)
+    context = ifcopenshell.api.run("context.add_context", model, context_type="Model")
+    body = ifcopenshell.api.run(
+        "context.add_context",
+        model,
+        context_type="Model",
+        context_identifier="Body",
+        target_view="MODEL_VIEW",
+        parent=context,
+    )
+    wall = ifcopenshell.api.run("root.create_entity", model, ifc_class="IfcWall")
+    ifcopenshell.api.run("geometry.edit_object_placement", model, product=wall)
+    representation = ifcopenshell.api.run(
+        "geometry.add_wall_representation", model, context=body, length=5, height=height, thickness=0.2
+    )
+    ifcopenshell.api.run("geometry.assign_representation", model, product=wall, representation=representation)
+    return model, wall
+
+
+class TestGeometryCache:
+    def test_keys_are_independent_of_step_ids(self):
+        cache = ifcopenshell.geom.cache.geometry_cache(":memory:")
+        settings = ifcopenshell.geom.settings()
+        model1, wall1 = create_model()
+        model2, wall2 = create_model(padding=10)
+        model3, wall3 = create_model(height=4.0)
+        assert wall1.id() != wall2.id()
+        assert cache.get_key(wall1, settings) == cache.get_key(wall2, settings)
+        assert cache.get_key(wall1, settings) != cache.get_key(wall3, settings)
+
+    def test_keys_depend_on_the_length_unit(self):
+        cache = ifcopenshell.geom.cache.geometry_cache(":memory:")
+        settings = ifcopenshell.geom.settings()
+        model1, wall1 = create_model()
+        model2, wall2 = create_model()
+        ifcopenshell.util.unit.get_project_unit(model1, "LENGTHUNIT").Prefix = "MILLI"
+        ifcopenshell.util.unit.get_project_unit(model2, "LENGTHUNIT").Prefix = None
+        assert cache.get_key(wall1, settings) != cache.get_key(wall2, settings)
+
+    def test_reusing_tessellations_across_models(self):
+        cache = ifcopenshell.geom.cache.geometry_cache(":memory:")
+        settings = ifcopenshell.geom.settings()
+        model1, wall1 = create_model()
+        original = list(cache.iterate(settings, model1))
+        assert cache.get_statistics()["misses"] == 1
+        model2, wall2 = create_model(padding=10)
+        cached = list(cache.iterate(settings, model2))
+        assert cache.get_statistics()["hits"] == 1
+        assert cached[0].id == wall2.id()
+        assert cached[0].geometry.verts == original[0].geometry.verts
+        assert cached[0].transformation.matrix.data == original[0].transformation.matrix.data
+
+    def test_evicting_least_recently_used_shapes(self):
+        cache = ifcopenshell.geom.cache.geometry_cache(":memory:", max_size=1)
+        settings = ifcopenshell.geom.settings()
+        model, wall = create_model()
+        list(cache.iterate(settings, model))
+        assert cache.get_statistics()["evictions"] == 1
+        assert cache.get_statistics()["shapes"] == 0
@@ -0,0 +1,62 @@
+# IfcOpenShell - IFC toolkit and geometry engine
+# Copyright (C) 2024 Thomas Krijnen <thomas@aecgeeks.com>
+#
+# This file is part of IfcOpenShell.
+#
+# IfcOpenShell is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IfcOpenShell is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IfcOpenShell.  If not, see <http://www.gnu.org/licenses/>.
+
+import sys
+import subprocess
+
+
+def get_import_times(statement):
+    """Runs a statement in a new interpreter and returns the cumulative import time of each module in seconds"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_time, cumulative, module = line[len("import time:") :].split("|")
+        times[module.strip()] = int(cumulative) / 1e6
+    return times
+
+
+class TestImport:
+    def test_heavy_modules_are_loaded_lazily(self):
+        times = get_import_times("import ifcopenshell, ifcopenshell.api, ifcopenshell.util")
+        for module in ("numpy", "lark", "ifcopenshell.express", "ifcopenshell.api.root", "ifcopenshell.util.element"):
+            assert module not in times
+
+    def test_lazy_modules_are_loaded_on_access(self):
+        statement = "import ifcopenshell; ifcopenshell.api.root; ifcopenshell.util.element"
+        times = get_import_times(statement)
+        assert "ifcopenshell.api.root" in times
+        assert "ifcopenshell.util.element" in times
+
+    def test_lazy_attributes_are_not_shadowed_by_their_module(self):
+        statement = (
+            "import ifcopenshell; stream = ifcopenshell.stream; ifcopenshell.indexed_stream; "
+            "assert ifcopenshell.stream is stream and isinstance(stream, type)"
+        )
+        subprocess.run([sys.executable, "-c", statement], check=True)
+
+    def test_lazy_attributes_are_not_shadowed_by_importing_their_module(self):
+        statement = (
+            "import ifcopenshell.stream; import ifcopenshell; "
+            "assert isinstance(ifcopenshell.stream, type) and isinstance(ifcopenshell.stream_entity, type)"
+        )
+        subprocess.run([sys.executable, "-c", statement], check=True)
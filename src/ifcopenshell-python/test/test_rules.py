@@ -40,5 +40,19 @@ def test_file(filename):
         assert len(results) == 0
 
 
+@pytest.mark.parametrize(
+    "filename",
+    sorted(glob.glob(os.path.join(os.path.dirname(__file__), "fixtures/rules/fail-*.ifc")))[:5],
+)
+def test_file_in_parallel(filename):
+    file = ifcopenshell.open(filename)
+    logger = ifcopenshell.validate.json_logger()
+    timings = ifcopenshell.express.rule_executor.run(file, logger)
+    parallel_logger = ifcopenshell.validate.json_logger()
+    ifcopenshell.express.rule_executor.run(file, parallel_logger, processes=2)
+    assert logger.statements == parallel_logger.statements
+    assert all(calls > 0 for calls, duration in timings.values())
+
+
 if __name__ == "__main__":
     pytest.main(["-sx", __file__])
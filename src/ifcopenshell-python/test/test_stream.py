@@ -0,0 +1,69 @@
+# IfcOpenShell - IFC toolkit and geometry engine
+# Copyright (C) 2021 Thomas Krijnen <thomas@aecgeeks.com>
+#
+# This file is part of IfcOpenShell.
+#
+# IfcOpenShell is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IfcOpenShell is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IfcOpenShell.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import ifcopenshell
+import ifcopenshell.api
+
+
+def create_model(filepath):
+    model = ifcopenshell.api.run("project.create_file")
+    ifcopenshell.api.run("root.create_entity", model, ifc_class="IfcProject")
+    wall = ifcopenshell.api.run("root.create_entity", model, ifc_class="IfcWall", name="Foo")
+    wall_type = ifcopenshell.api.run("root.create_entity", model, ifc_class="IfcWallType")
+    ifcopenshell.api.run("type.assign_type", model, related_objects=[wall], relating_type=wall_type)
+    model.write(str(filepath))
+    return model
+
+
+class TestIndexedStream:
+    def test_matching_the_in_memory_file(self, tmp_path):
+        filepath = tmp_path / "model.ifc"
+        model = create_model(filepath)
+        stream = ifcopenshell.indexed_stream(filepath)
+        assert len(stream) == len(list(model))
+        assert {e.id() for e in stream.by_type("IfcRoot")} == {e.id() for e in model.by_type("IfcRoot")}
+        wall = model.by_type("IfcWall")[0]
+        assert stream.by_id(wall.id()).Name == "Foo"
+        assert {e.id() for e in stream.get_inverse(stream.by_id(wall.id()))} == {
+            e.id() for e in model.get_inverse(wall)
+        }
+
+    def test_persisting_and_reusing_a_sidecar_index(self, tmp_path):
+        filepath = tmp_path / "model.ifc"
+        create_model(filepath)
+        ifcopenshell.indexed_stream(filepath).close()
+        assert os.path.isfile(f"{filepath}.idx")
+        stream = ifcopenshell.indexed_stream(filepath)
+        assert stream.by_type("IfcWall")[0].is_a() == "IfcWall"
+
+    def test_reading_non_ascii_strings(self, tmp_path):
+        filepath = tmp_path / "model.ifc"
+        model = create_model(filepath)
+        wall = model.by_type("IfcWall")[0]
+        with open(filepath, "rb") as f:
+            data = f.read()
+        # Some exporters write raw UTF-8 or Latin-1 bytes instead of encoded STEP strings
+        for encoding in ("utf-8", "latin-1"):
+            filepath = tmp_path / f"{encoding}.ifc"
+            with open(filepath, "wb") as f:
+                f.write(data.replace(b"'Foo'", "'F\u00f6o'".encode(encoding)))
+            stream = ifcopenshell.indexed_stream(filepath)
+            assert repr(stream.by_id(wall.id())).startswith(f"#{wall.id()}=IFCWALL(")
+            stream.close()
+        assert "F\u00f6o" in repr(ifcopenshell.indexed_stream(tmp_path / "utf-8.ifc").by_id(wall.id()))
@@ -18,6 +18,7 @@
 
 import os
 import glob
+import json
 
 import pytest
 
@@ -41,5 +42,22 @@ def test_file(file):
         assert len(logger.statements) == 0
 
 
+@pytest.mark.parametrize(
+    "file",
+    glob.glob(os.path.join(os.path.dirname(__file__), "fixtures/validate/*.ifc")),
+)
+def test_file_in_parallel(file):
+    def get_statements(processes):
+        logger = ifcopenshell.validate.json_logger()
+        ifcopenshell.validate.validate(file, logger, processes=processes)
+        return sorted(json.dumps(s, default=str, sort_keys=True) for s in logger.statements)
+
+    try:
+        statements = get_statements(1)
+    except ifcopenshell.SchemaError as e:
+        pytest.skip()
+    assert get_statements(2) == statements
+
+
 if __name__ == "__main__":
     pytest.main(["-sx", __file__])
@@ -179,6 +179,62 @@ class TestGetPsetsIFC4(test.bootstrap.IFC4):
         assert subject.get_psets(element, qtos_only=True) == {"qto": {"x": 42, "id": qto.id()}}
 
 
+class TestGetPsetsTableIFC4(test.bootstrap.IFC4):
+    def get_rows(self, table):
+        return {(r[0], r[1], r[2]): (r[3], r[4], r[5]) for r in zip(*table.values())}
+
+    def test_getting_the_psets_of_all_elements_as_columns(self):
+        element = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        element2 = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcSlab")
+        pset = ifcopenshell.api.run("pset.add_pset", self.file, product=element, name="name")
+        ifcopenshell.api.run("pset.edit_pset", self.file, pset=pset, properties={"a": "b", "c": 1})
+        qto = ifcopenshell.api.run("pset.add_qto", self.file, product=element2, name="qto")
+        ifcopenshell.api.run("pset.edit_qto", self.file, qto=qto, properties={"x": 42.0})
+        table = subject.get_psets_table(self.file)
+        assert list(table.keys()) == ["id", "pset", "property", "value", "definition_id", "is_inherited"]
+        assert self.get_rows(table) == {
+            (element.id(), "name", "a"): ("b", pset.id(), False),
+            (element.id(), "name", "c"): (1, pset.id(), False),
+            (element2.id(), "qto", "x"): (42.0, qto.id(), False),
+        }
+        assert self.get_rows(subject.get_psets_table(self.file, psets_only=True)).keys() == {
+            (element.id(), "name", "a"),
+            (element.id(), "name", "c"),
+        }
+        assert self.get_rows(subject.get_psets_table(self.file, qtos_only=True)).keys() == {(element2.id(), "qto", "x")}
+
+    def test_getting_inherited_psets(self):
+        element = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        type_element = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWallType")
+        ifcopenshell.api.run("type.assign_type", self.file, related_objects=[element], relating_type=type_element)
+        type_pset = ifcopenshell.api.run("pset.add_pset", self.file, product=type_element, name="name")
+        ifcopenshell.api.run("pset.edit_pset", self.file, pset=type_pset, properties={"a": 1, "x": 1})
+        pset = ifcopenshell.api.run("pset.add_pset", self.file, product=element, name="name")
+        ifcopenshell.api.run("pset.edit_pset", self.file, pset=pset, properties={"a": 2, "b": 3})
+        assert self.get_rows(subject.get_psets_table(self.file)) == {
+            (type_element.id(), "name", "a"): (1, type_pset.id(), False),
+            (type_element.id(), "name", "x"): (1, type_pset.id(), False),
+            (element.id(), "name", "a"): (2, pset.id(), False),
+            (element.id(), "name", "x"): (1, type_pset.id(), True),
+            (element.id(), "name", "b"): (3, pset.id(), False),
+        }
+        assert self.get_rows(subject.get_psets_table(self.file, should_inherit=False, elements=[element])) == {
+            (element.id(), "name", "a"): (2, pset.id(), False),
+            (element.id(), "name", "b"): (3, pset.id(), False),
+        }
+
+    def test_filtering_by_pset_and_property_names(self):
+        element = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        pset = ifcopenshell.api.run("pset.add_pset", self.file, product=element, name="name")
+        ifcopenshell.api.run("pset.edit_pset", self.file, pset=pset, properties={"a": "b", "c": "d"})
+        pset2 = ifcopenshell.api.run("pset.add_pset", self.file, product=element, name="name2")
+        ifcopenshell.api.run("pset.edit_pset", self.file, pset=pset2, properties={"e": "f"})
+        assert self.get_rows(subject.get_psets_table(self.file, psets={"name": ["c"], "name2": None})).keys() == {
+            (element.id(), "name", "c"),
+            (element.id(), "name2", "e"),
+        }
+
+
 class TestGetPropertyDefinitionIFC4(test.bootstrap.IFC4):
     def test_getting_the_properties_of_a_pset(self):
         element = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
@@ -921,6 +977,76 @@ class TestRemoveDeep2IFC4(test.bootstrap.IFC4):
         assert self.file.by_id(1)
         assert self.file.by_guid("id1")
 
+    def test_not_removing_subelements_of_an_element_still_referenced_somewhere(self):
+        person = self.file.createIfcPerson()
+        user = self.file.createIfcPersonAndOrganization(ThePerson=person)
+        owner = self.file.createIfcOwnerHistory(OwningUser=user)
+        element = self.file.createIfcWall(GlobalId="id1", OwnerHistory=owner)
+        self.file.createIfcWall(GlobalId="id2", OwnerHistory=owner)
+        subject.remove_deep2(self.file, element)
+        assert owner.OwningUser.ThePerson == person
+
+    def test_removing_an_element_except_elements_that_should_not_be_deleted(self):
+        owner = self.file.createIfcOwnerHistory()
+        element = self.file.createIfcWall(GlobalId="id", OwnerHistory=owner)
+        subject.remove_deep2(self.file, element, do_not_delete=[owner])
+        with pytest.raises(RuntimeError):
+            self.file.by_guid("id")
+        assert self.file.by_id(owner.id())
+
+
+class TestRemoveSubgraphsIFC4(test.bootstrap.IFC4):
+    def test_removing_many_elements_along_with_all_direct_attributes_recursively(self):
+        loops = []
+        for i in range(3):
+            points = [self.file.createIfcCartesianPoint((0.0, 0.0, float(j))) for j in range(20)]
+            loops.append(self.file.createIfcPolyLoop(points))
+        subject.remove_subgraphs(self.file, loops)
+        assert len(list(self.file)) == 0
+
+    def test_removing_many_elements_in_a_batch(self):
+        loops = []
+        for i in range(3):
+            points = [self.file.createIfcCartesianPoint((0.0, 0.0, float(j))) for j in range(20)]
+            loops.append(self.file.createIfcPolyLoop(points))
+        subject.remove_subgraphs(self.file, loops, batch_threshold=1)
+        assert len(list(self.file)) == 0
+
+    def test_not_removing_elements_shared_with_an_element_that_is_kept(self):
+        owner = self.file.createIfcOwnerHistory()
+        element = self.file.createIfcWall(GlobalId="id1", OwnerHistory=owner)
+        element2 = self.file.createIfcWall(GlobalId="id2", OwnerHistory=owner)
+        element3 = self.file.createIfcWall(GlobalId="id3", OwnerHistory=owner)
+        subject.remove_subgraphs(self.file, [element, element2])
+        with pytest.raises(RuntimeError):
+            self.file.by_guid("id1")
+        with pytest.raises(RuntimeError):
+            self.file.by_guid("id2")
+        assert element3.OwnerHistory == owner
+
+    def test_removing_elements_only_referenced_within_the_subgraphs(self):
+        owner = self.file.createIfcOwnerHistory()
+        element = self.file.createIfcWall(GlobalId="id1", OwnerHistory=owner)
+        element2 = self.file.createIfcWall(GlobalId="id2", OwnerHistory=owner)
+        subject.remove_subgraphs(self.file, [element, element2])
+        assert len(list(self.file)) == 0
+
+    def test_not_removing_an_element_still_referenced_somewhere(self):
+        owner = self.file.createIfcOwnerHistory()
+        element = self.file.createIfcWall(GlobalId="id1", OwnerHistory=owner)
+        subject.remove_subgraphs(self.file, [owner])
+        assert self.file.by_id(owner.id())
+        assert element.OwnerHistory == owner
+
+    def test_considering_references_from_other_elements_as_part_of_the_subgraphs(self):
+        material = self.file.createIfcMaterial()
+        layer = self.file.createIfcMaterialLayer(Material=material)
+        rel = self.file.createIfcRelAssociatesMaterial(GlobalId="id", RelatingMaterial=material)
+        subject.remove_subgraphs(self.file, [layer], also_consider=[rel])
+        with pytest.raises(RuntimeError):
+            self.file.by_id(material.id())
+        assert self.file.by_guid("id")
+
 
 class TestBatchRemoveDeep2IFC4(test.bootstrap.IFC4):
     def test_run(self):
@@ -16,7 +16,9 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with IfcOpenShell.  If not, see <http://www.gnu.org/licenses/>.
 
+import numpy as np
 import ifcopenshell
+import ifcopenshell.api
 import test.bootstrap
 import ifcopenshell.util.placement as subject
 
@@ -41,3 +43,55 @@ class TestGetStoreyElevationIFC4(test.bootstrap.IFC4):
         assert subject.get_storey_elevation(storey) == 0.0
         building = self.file.createIfcBuilding()
         assert subject.get_storey_elevation(building) == 0.0
+
+
+class TestGetLocalPlacementsIFC4(test.bootstrap.IFC4):
+    def create_placement(self, location, parent=None):
+        return self.file.createIfcLocalPlacement(
+            parent,
+            self.file.createIfcAxis2Placement3D(
+                self.file.createIfcCartesianPoint(location),
+                self.file.createIfcDirection((0.0, 0.0, 1.0)),
+                self.file.createIfcDirection((0.0, 1.0, 0.0)),
+            ),
+        )
+
+    def test_run(self):
+        storey = self.create_placement((0.0, 0.0, 3.0), self.create_placement((10.0, 0.0, 0.0)))
+        placements = [self.create_placement((float(i), 1.0, 0.0), storey) for i in range(3)]
+        wall = self.file.createIfcWall(ObjectPlacement=placements[0])
+        matrices = subject.get_local_placements([wall, None, *placements])
+        assert matrices.shape == (5, 4, 4)
+        assert np.allclose(matrices[0], subject.get_local_placement(placements[0]))
+        assert np.allclose(matrices[1], np.eye(4))
+        for i, placement in enumerate(placements):
+            assert np.allclose(matrices[i + 2], subject.get_local_placement(placement))
+
+    def test_reusing_a_cache_of_parent_placements(self):
+        storey = self.create_placement((0.0, 0.0, 3.0))
+        placement = self.create_placement((1.0, 0.0, 0.0), storey)
+        cache = {}
+        subject.get_local_placements([storey], cache=cache)
+        assert list(cache.keys()) == [storey.id()]
+        cache[storey.id()] = np.eye(4)  # Prove that the cache is used
+        assert np.allclose(subject.get_local_placements([placement], cache=cache)[0][0:3, 3], (1.0, 0.0, 0.0))
+
+
+class TestPlacementCacheIFC4(test.bootstrap.IFC4):
+    def test_invalidating_placements_edited_through_the_api(self):
+        ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcProject")
+        storey = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcBuildingStorey")
+        wall = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        ifcopenshell.api.run("geometry.edit_object_placement", self.file, product=storey)
+        ifcopenshell.api.run("spatial.assign_container", self.file, products=[wall], relating_structure=storey)
+        ifcopenshell.api.run("geometry.edit_object_placement", self.file, product=wall)
+        cache = subject.PlacementCache(self.file)
+        cache.watch()
+        assert np.allclose(cache.get_local_placement(wall)[0:3, 3], (0.0, 0.0, 0.0))
+        matrix = np.eye(4)
+        matrix[2][3] = 3.0
+        ifcopenshell.api.run(
+            "geometry.edit_object_placement", self.file, product=storey, matrix=matrix, should_transform_children=True
+        )
+        assert np.allclose(cache.get_local_placement(wall)[0:3, 3], (0.0, 0.0, 3.0))
+        cache.unwatch()
@@ -282,6 +282,69 @@ class TestFilterElements(test.bootstrap.IFC4):
         assert new_set == original_set
 
 
+class TestFilterElementsWithIndex(test.bootstrap.IFC4):
+    def test_selecting_by_property(self):
+        element = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        element2 = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        pset = ifcopenshell.api.run("pset.add_pset", self.file, product=element, name="Foobar")
+        ifcopenshell.api.run("pset.edit_pset", self.file, pset=pset, properties={"Foo": "Bar"})
+        index = subject.FacetIndex(self.file)
+        assert subject.filter_elements(self.file, "IfcWall, Foobar.Foo=Bar", index=index) == {element}
+        assert subject.filter_elements(self.file, "IfcWall, Foobar./Fo.*/=Bar", index=index) == {element}
+        assert subject.filter_elements(self.file, "IfcWall, /Foo.*/.Foo=Bar", index=index) == {element}
+        assert subject.filter_elements(self.file, "IfcWall, Foobar.Foo!=Bar", index=index) == {element2}
+
+    def test_selecting_by_material(self):
+        element = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        element2 = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        element_type = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWallType")
+        ifcopenshell.api.run("type.assign_type", self.file, related_objects=[element2], relating_type=element_type)
+        material = ifcopenshell.api.run("material.add_material", self.file, name="CON01")
+        ifcopenshell.api.run("material.assign_material", self.file, products=[element, element_type], material=material)
+        index = subject.FacetIndex(self.file)
+        assert subject.filter_elements(self.file, "IfcWall, material=CON01", index=index) == {element, element2}
+
+    def test_selecting_by_location(self):
+        project = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcProject")
+        site = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcSite", name="Site")
+        storey = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcBuildingStorey", name="Storey")
+        element = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        element2 = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        ifcopenshell.api.run("aggregate.assign_object", self.file, products=[site], relating_object=project)
+        ifcopenshell.api.run("aggregate.assign_object", self.file, products=[storey], relating_object=site)
+        ifcopenshell.api.run("spatial.assign_container", self.file, products=[element], relating_structure=storey)
+        index = subject.FacetIndex(self.file)
+        assert subject.filter_elements(self.file, "IfcWall, location=Storey", index=index) == {element}
+        assert subject.filter_elements(self.file, "IfcWall, location=Site", index=index) == {element}
+        assert subject.filter_elements(self.file, "IfcWall, location!=Storey", index=index) == {element2}
+
+
+class TestCompileQuery:
+    def test_ordering_filters_by_cost_between_class_facets(self):
+        plan = subject.compile_query("IfcWall, Foo.Bar=Baz, Name=Foo, IfcSlab, material=Concrete, Name=Bar")
+        assert [f.name for f in plan[0]] == ["entity", "attribute", "property", "entity", "attribute", "material"]
+
+    def test_caching_plans_by_query(self):
+        assert subject.compile_query("IfcWall, Name=Foo") is subject.compile_query("IfcWall, Name=Foo")
+
+
+class TestExplain(test.bootstrap.IFC4):
+    def test_run(self):
+        element = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        element.Name = "Foo"
+        ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        result = subject.explain(self.file, "IfcWall, Foo.Bar=Baz, Name=Foo")
+        lines = result.split("\n")
+        assert lines[0] == "facet_list 1"
+        assert lines[1].startswith("  entity IfcWall: ")
+        assert lines[1].endswith("0 -> 2 elements")
+        assert lines[2].startswith("  attribute Name = Foo: ")
+        assert lines[2].endswith("2 -> 1 elements")
+        assert lines[3].startswith("  property Foo.Bar = Baz: ")
+        assert lines[3].endswith("1 -> 0 elements")
+        assert lines[4].endswith(", 0 elements")
+
+
 class TestSetElementValue(test.bootstrap.IFC4):
     def test_set_xyz_coordinates(self):
         ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcProject")
@@ -0,0 +1,95 @@
+# IfcOpenShell - IFC toolkit and geometry engine
+# Copyright (C) 2023 Dion Moult <dion@thinkmoult.com>
+#
+# This file is part of IfcOpenShell.
+#
+# IfcOpenShell is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IfcOpenShell is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IfcOpenShell.  If not, see <http://www.gnu.org/licenses/>.
+
+import types
+import numpy as np
+import ifcopenshell.util.shape as subject
+
+
+def create_box(x, y, z, offset=(0.0, 0.0, 0.0)):
+    verts = np.array([[a, b, c] for a in (0, x) for b in (0, y) for c in (0, z)], dtype=np.float64) + offset
+    faces = [
+        [0, 2, 3], [0, 3, 1], [4, 5, 7], [4, 7, 6], [0, 1, 5], [0, 5, 4],
+        [2, 6, 7], [2, 7, 3], [0, 4, 6], [0, 6, 2], [1, 3, 7], [1, 7, 5],
+    ]  # fmt: skip
+    return types.SimpleNamespace(
+        verts=tuple(verts.ravel().tolist()),
+        faces=tuple(np.array(faces).ravel().tolist()),
+        verts_buffer=verts.tobytes(),
+        faces_buffer=np.array(faces, dtype=np.int32).tobytes(),
+    )
+
+
+class TestGetVolume:
+    def test_run(self):
+        assert np.isclose(subject.get_volume(create_box(1.0, 2.0, 3.0)), 6.0)
+
+
+class TestGetArea:
+    def test_run(self):
+        assert np.isclose(subject.get_area(create_box(1.0, 2.0, 3.0)), 22.0)
+
+
+class TestGetXYZ:
+    def test_run(self):
+        geometry = create_box(1.0, 2.0, 3.0, offset=(1.0, 1.0, 1.0))
+        assert np.isclose(subject.get_x(geometry), 1.0)
+        assert np.isclose(subject.get_y(geometry), 2.0)
+        assert np.isclose(subject.get_z(geometry), 3.0)
+        assert np.isclose(subject.get_bottom_elevation(geometry), 1.0)
+        assert np.isclose(subject.get_top_elevation(geometry), 4.0)
+        assert np.allclose(subject.get_bbox_centroid(geometry), (1.5, 2.0, 2.5))
+
+
+class TestGetVertices:
+    def test_run(self):
+        geometry = create_box(1.0, 2.0, 3.0)
+        vertices = subject.get_vertices(geometry)
+        assert vertices.shape == (8, 3)
+        vertices += 1.0
+        assert np.allclose(subject.get_vertices(geometry).min(axis=0), (0.0, 0.0, 0.0))
+
+    def test_faces_can_be_modified(self):
+        faces = subject.get_faces(create_box(1.0, 2.0, 3.0))
+        faces[0] = (1, 2, 3)
+        assert faces[0].tolist() == [1, 2, 3]
+
+
+class TestGetFootprintPerimeter:
+    def test_run(self):
+        assert np.isclose(subject.get_footprint_perimeter(create_box(1.0, 2.0, 3.0)), 6.0)
+
+
+class TestGetGeometriesStatistics:
+    def test_run(self):
+        geometries = [create_box(1.0, 2.0, 3.0), types.SimpleNamespace(verts=(), faces=()), create_box(2.0, 2.0, 2.0)]
+        results = subject.get_geometries_statistics(geometries)
+        assert np.allclose(results["volume"], [6.0, 0.0, 8.0])
+        assert np.allclose(results["area"], [22.0, 0.0, 24.0])
+        assert np.allclose(results["side_area"], [3.0, 0.0, 4.0])
+        assert np.allclose(results["footprint_area"], [2.0, 0.0, 4.0])
+        assert np.allclose(results["bbox_min"][[0, 2]], [[0.0, 0.0, 0.0], [0.0, 0.0, 0.0]])
+        assert np.allclose(results["bbox_max"][[0, 2]], [[1.0, 2.0, 3.0], [2.0, 2.0, 2.0]])
+        assert np.isnan(results["bbox_min"][1]).all()
+
+    def test_matching_individual_calculations(self):
+        geometry = create_box(1.0, 2.0, 3.0, offset=(1.0, 2.0, 3.0))
+        results = subject.get_geometries_statistics([geometry], side_axis="X")
+        assert np.isclose(results["volume"][0], subject.get_volume(geometry))
+        assert np.isclose(results["area"][0], subject.get_area(geometry))
+        assert np.isclose(results["side_area"][0], subject.get_side_area(geometry, axis="X"))
@@ -37,6 +37,21 @@ class TestCalculateUnitScale(test.bootstrap.IFC4):
         assert subject.calculate_unit_scale(self.file, "PLANEANGLEUNIT") == pi / 180 * 0.001
 
 
+class TestConvert:
+    def test_converting_prefixed_areas_and_volumes(self):
+        assert subject.convert(1.0, None, "SQUARE_METRE", "MILLI", "SQUARE_METRE") == pytest.approx(1e6)
+        assert subject.convert(1e6, "MILLI", "SQUARE_METRE", None, "SQUARE_METRE") == pytest.approx(1.0)
+        assert subject.convert(1.0, None, "CUBIC_METRE", "CENTI", "CUBIC_METRE") == pytest.approx(1e6)
+
+    def test_converting_conversion_based_units(self):
+        assert subject.convert(1.0, None, "cubic foot", None, "CUBIC_METRE") == pytest.approx(0.028316846)
+        assert subject.convert(1.0, None, "square foot", "MILLI", "SQUARE_METRE") == pytest.approx(92903.04)
+
+    def test_converting_to_a_prefixed_unit_uses_the_dimension_of_the_target_unit(self):
+        # A litre is not named as a cubic unit, but a cubic centimetre is
+        assert subject.convert(1.0, None, "litre", "CENTI", "CUBIC_METRE") == pytest.approx(1000.0)
+
+
 class TestFormatLength(test.bootstrap.IFC4):
     def test_run(self):
         assert subject.format_length(1, 1, decimal_places=0, unit_system="metric") == "1"
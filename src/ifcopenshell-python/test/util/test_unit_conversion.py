@@ -17,6 +17,7 @@
 # along with IfcOpenShell.  If not, see <http://www.gnu.org/licenses/>.
 import pathlib
 import pytest
+import ifcopenshell.api
 import ifcopenshell.util.unit
 import numpy as np
 
@@ -65,3 +66,40 @@ def test_file_units_length_convert(ifc_file: str):
     for target_unit in target_units:
         new_f = convert_file_and_test(f, base_project_unit, target_unit)
         convert_file_and_test(new_f, target_unit, base_project_unit)
+
+
+def test_get_measure_attributes():
+    length_attributes = ifcopenshell.util.unit.get_measure_attributes("IFC4", "LENGTHUNIT")
+    assert length_attributes["IfcCartesianPointList3D"] == (0,)
+    assert length_attributes["IfcExtrudedAreaSolid"] == (3,)
+    assert "IfcPropertySingleValue" not in length_attributes
+    assert ifcopenshell.util.unit.get_measure_attributes("IFC4", "AREAUNIT")["IfcQuantityArea"] == (3,)
+    assert ifcopenshell.util.unit.get_measure_attributes("IFC4", "PLANEANGLEUNIT")["IfcRevolvedAreaSolid"] == (3,)
+
+
+def test_file_units_convert_in_place():
+    f = ifcopenshell.file(schema="IFC4")
+    ifcopenshell.api.run("root.create_entity", f, ifc_class="IfcProject")
+    units = [
+        ifcopenshell.api.run("unit.add_si_unit", f, unit_type="LENGTHUNIT", prefix="MILLI"),
+        ifcopenshell.api.run("unit.add_si_unit", f, unit_type="AREAUNIT"),
+        ifcopenshell.api.run("unit.add_si_unit", f, unit_type="PLANEANGLEUNIT"),
+    ]
+    ifcopenshell.api.run("unit.assign_unit", f, units=units)
+    points = f.createIfcCartesianPointList3D(((1000.0, 2000.0, 3000.0), (4000.0, 5000.0, 6000.0)))
+    quantity = f.createIfcQuantityArea("Area", AreaValue=0.09290304)
+    solid = f.createIfcRevolvedAreaSolid(Angle=np.pi)
+
+    assert ifcopenshell.util.unit.convert_file_length_units(f, "METRE", in_place=True) is f
+    assert np.allclose(points.CoordList, ((1.0, 2.0, 3.0), (4.0, 5.0, 6.0)))
+    assert (
+        ifcopenshell.util.unit.get_full_unit_name(ifcopenshell.util.unit.get_project_unit(f, "LENGTHUNIT")) == "METRE"
+    )
+
+    ifcopenshell.util.unit.convert_file_units(f, "AREAUNIT", "square foot", in_place=True)
+    assert np.isclose(quantity.AreaValue, 1.0)
+    assert ifcopenshell.util.unit.get_project_unit(f, "AREAUNIT").Name == "square foot"
+
+    ifcopenshell.util.unit.convert_file_units(f, "PLANEANGLEUNIT", "degree", in_place=True)
+    assert np.isclose(solid.Angle, 180.0)
+    assert len(f.by_type("IfcNamedUnit")) == 5
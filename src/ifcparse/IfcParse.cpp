@@ -2184,7 +2184,7 @@ void IfcFile::process_deletion_() {
 			for (aggregate_of_instance::it iit = references->begin(); iit != references->end(); ++iit) {
 				IfcUtil::IfcBaseEntity* related_instance = (IfcUtil::IfcBaseEntity*) *iit;
 
-				if (std::find(batch_deletion_ids_.begin(), batch_deletion_ids_.end(), related_instance->data().id()) != batch_deletion_ids_.end()) {
+				if (batch_deletion_ids_.get<1>().find(related_instance->data().id()) != batch_deletion_ids_.get<1>().end()) {
 					continue;
 				}
 
@@ -32,6 +32,7 @@ import ifcopenshell.util.shape
 import ifcopenshell.util.schema
 import ifcopenshell.util.attribute
 import ifcopenshell.util.placement
+from typing import Optional
 
 try:
     import sqlite3
@@ -44,6 +45,14 @@ except:
     print("No MySQL support")
 
 
+# The patcher shared with forked worker processes
+_worker_patcher = None
+
+
+def _get_chunk_rows(task):
+    return _worker_patcher.get_rows(*task)
+
+
 class Patcher:
     def __init__(
         self,
@@ -55,15 +64,16 @@ class Patcher:
         username: str = "root",
         password: str = "pass",
         database: str = "test",
+        full_schema: bool = False,
+        processes: Optional[int] = None,
+        chunk_size: int = 10000,
+        resume: bool = False,
     ):
         """Convert an IFC-SPF model to SQLite or MySQL.
 
         There are certain controls which are hardcoded in this recipe that you
         may modify, including:
 
-        - full_schema: if True, will create tables for all IFC classes,
-          regardless if they are used or not in the dataset. If False, will
-          only create tables for classes in the dataset.
         - is_strict: whether or not to enforce null or not null. If your
           dataset might contain invalid data, set this to False.
         - should_expand: if True, entities with attributes containing lists of
@@ -79,8 +89,31 @@ class Patcher:
           IfcRepresentation and IfcRepresentationItem classes. These tables are
           unnecessary if you are not interested in geometry.
 
+        Rows are extracted in chunks of elements of the same class, which are
+        distributed over a pool of worker processes. The main process writes
+        each chunk in its own transaction. Geometry is tessellated by the
+        multithreaded geometry iterator and written in chunks as it streams
+        in.
+
         :param sql_type: Choose between "sqlite" or "mysql"
         :type sql_type: str
+        :param full_schema: if True, will create tables for all IFC classes,
+            regardless if they are used or not in the dataset. If False, will
+            only create tables for classes in the dataset, which is sufficient
+            for ifcopenshell.sqlite.
+        :type full_schema: bool
+        :param processes: The number of worker processes to extract rows
+            with. Defaults to the number of CPUs. Parallel extraction requires
+            the "fork" start method, otherwise rows are extracted by the main
+            process.
+        :type processes: int
+        :param chunk_size: The number of elements written per transaction.
+        :type chunk_size: int
+        :param resume: if True, progress is recorded with every chunk so that
+            an interrupted export can be continued by running the patch again.
+            For SQLite, the database is built next to the input file with a
+            ``.sqlite.partial`` suffix instead of in a temporary file.
+        :type resume: bool
 
         Example:
 
@@ -88,6 +121,16 @@ class Patcher:
 
             # Convert to SQLite
             ifcpatch.execute({"input": "input.ifc", "file": model, "recipe": "Ifc2Sql", "arguments": ["sqlite"]})
+
+            # Convert using 8 processes, continuing from any previously interrupted export
+            ifcpatch.execute(
+                {
+                    "input": "input.ifc",
+                    "file": model,
+                    "recipe": "Ifc2Sql",
+                    "arguments": ["sqlite", "localhost", "root", "pass", "test", False, 8, 10000, True],
+                }
+            )
         """
         self.src = src
         self.file = file
@@ -97,9 +140,14 @@ class Patcher:
         self.username = username
         self.password = password
         self.database = database
+        self.full_schema = full_schema
+        self.processes = processes or multiprocessing.cpu_count()
+        self.chunk_size = chunk_size
+        self.resume = resume
 
     def patch(self):
-        self.full_schema = True  # Set true for ifcopenshell.sqlite
+        global _worker_patcher
+
         self.is_strict = False
         self.should_expand = False  # Set false for ifcopenshell.sqlite
         self.should_get_inverses = True  # Set true for ifcopenshell.sqlite
@@ -110,17 +158,26 @@ class Patcher:
         self.schema = ifcopenshell.ifcopenshell_wrapper.schema_by_name(self.file.schema)
 
         if self.sql_type == "sqlite":
-            tmp = tempfile.NamedTemporaryFile(delete=False)
-            db_file = tmp.name
+            if self.resume:
+                db_file = self.src + ".sqlite.partial"
+            else:
+                tmp = tempfile.NamedTemporaryFile(delete=False)
+                db_file = tmp.name
             self.db = sqlite3.connect(db_file)
             self.c = self.db.cursor()
             self.file_patched = db_file
+            self.placeholder = "?"
+            self.optimise_sqlite()
         elif self.sql_type == "mysql":
             self.db = mysql.connector.connect(
                 host=self.host, user=self.username, password=self.password, database=self.database
             )
             self.c = self.db.cursor()
             self.file_patched = None
+            self.placeholder = "%s"
+
+        self.create_progress_table()
+        self.completed_tasks = self.get_completed_tasks()
 
         self.create_id_map()
         self.create_metadata()
@@ -128,15 +185,85 @@ class Patcher:
         if self.should_get_psets:
             self.create_pset_table()
 
-        if self.should_get_geometry:
-            self.create_geometry_table()
-            self.create_geometry()
+        tasks = self.get_tasks()
+
+        # Fork before the geometry iterator starts any threads
+        pool = None
+        processes = min(self.processes, len(tasks))
+        if processes > 1 and "fork" in multiprocessing.get_all_start_methods():
+            _worker_patcher = self
+            pool = multiprocessing.get_context("fork").Pool(processes)
+
+        try:
+            self.shape_ids = set()
+            if self.should_get_geometry:
+                self.create_geometry_table()
+                # Include elements written by a previously interrupted export
+                self.c.execute("SELECT ifc_id FROM shape;")
+                self.shape_ids = {row[0] for row in self.c.fetchall()}
+                if "geometry" not in self.completed_tasks:
+                    self.create_geometry()
+
+            if pool:
+                results = pool.imap(_get_chunk_rows, tasks)
+            else:
+                results = (self.get_rows(*task) for task in tasks)
+
+            for task, result in zip(tasks, results):
+                self.write_rows(task[0], task[1], *result)
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+            _worker_patcher = None
+
+        self.drop_progress_table()
+        if self.sql_type == "sqlite":
+            # Fold the write ahead log back in so the database is a single file
+            self.c.execute("PRAGMA journal_mode=DELETE;")
+        self.db.close()
+
+    def optimise_sqlite(self):
+        self.c.execute("PRAGMA journal_mode=WAL;")
+        # Each chunk is its own transaction, and a crash at worst loses the chunk in progress
+        self.c.execute("PRAGMA synchronous=NORMAL;")
+        self.c.execute("PRAGMA temp_store=MEMORY;")
+        self.c.execute("PRAGMA cache_size=-262144;")
+
+    def create_progress_table(self):
+        if not self.resume:
+            return
+        self.c.execute("CREATE TABLE IF NOT EXISTS export_progress (task varchar(255) NOT NULL);")
+        self.db.commit()
 
+    def get_completed_tasks(self):
+        if not self.resume:
+            return set()
+        self.c.execute("SELECT task FROM export_progress;")
+        return {row[0] for row in self.c.fetchall()}
+
+    def complete_task(self, task):
+        # Must be called before the commit of the task's data, so both happen atomically
+        if self.resume:
+            self.c.execute(f"INSERT INTO export_progress VALUES ({self.placeholder});", (task,))
+
+    def drop_progress_table(self):
+        if self.resume:
+            self.c.execute("DROP TABLE IF EXISTS export_progress;")
+            self.db.commit()
+
+    def get_tasks(self):
+        """Creates tables and splits their elements into chunks to be extracted
+
+        :return: A list of ``(ifc_class, chunk_index, ids)`` tuples for chunks
+            which have not yet been written.
+        """
         if self.full_schema:
             ifc_classes = [d.name() for d in self.schema.declarations() if str(d).startswith("<entity")]
         else:
-            ifc_classes = self.file.wrapped_data.types()
+            ifc_classes = sorted(self.file.wrapped_data.types())
 
+        tasks = []
         for ifc_class in ifc_classes:
             declaration = self.schema.declaration_by_name(ifc_class)
 
@@ -150,35 +277,41 @@ class Patcher:
                 self.create_sqlite_table(ifc_class, declaration)
             elif self.sql_type == "mysql":
                 self.create_mysql_table(ifc_class, declaration)
-            self.insert_data(ifc_class)
 
+            ids = sorted(e.id() for e in self.file.by_type(ifc_class, include_subtypes=False))
+            for i, chunk_start in enumerate(range(0, len(ids), self.chunk_size)):
+                if f"{ifc_class}:{i}" not in self.completed_tasks:
+                    tasks.append((ifc_class, i, ids[chunk_start : chunk_start + self.chunk_size]))
+        self.db.commit()
+        return tasks
+
+    def write_rows(self, ifc_class, chunk_index, rows, id_map_rows, pset_rows, placement_rows):
+        print("Writing data for", ifc_class, "chunk", chunk_index)
+        p = self.placeholder
+        if rows:
+            self.c.executemany(f"INSERT INTO {ifc_class} VALUES ({','.join([p]*len(rows[0]))});", rows)
+            self.c.executemany(f"INSERT INTO id_map VALUES ({p}, {p});", id_map_rows)
+        if pset_rows:
+            self.c.executemany(f"INSERT INTO psets VALUES ({p}, {p}, {p}, {p});", pset_rows)
         if self.should_get_geometry:
-            if self.sql_type == "sqlite":
-                if self.shape_rows:
-                    self.c.executemany("INSERT INTO shape VALUES (?, ?, ?, ?, ?, ?);", self.shape_rows.values())
-                if self.geometry_rows:
-                    self.c.executemany("INSERT INTO geometry VALUES (?, ?, ?, ?, ?, ?);", self.geometry_rows.values())
-            elif self.sql_type == "mysql":
-                if self.shape_rows:
-                    self.c.executemany("INSERT INTO shape VALUES (%s, %s, %s, %s, %s, %s);", self.shape_rows.values())
-                # Do row by row in case of max_allowed_packet
-                for row in self.geometry_rows.values():
-                    self.c.execute("INSERT INTO geometry VALUES (%s, %s, %s, %s, %s, %s);", row)
-
+            placement_rows = [r for r in placement_rows if r[0] not in self.shape_ids]
+            if placement_rows:
+                self.c.executemany(f"INSERT INTO shape VALUES ({p}, {p}, {p}, {p}, {p}, {p});", placement_rows)
+        self.complete_task(f"{ifc_class}:{chunk_index}")
         self.db.commit()
-        self.db.close()
 
     def create_geometry(self):
         self.unit_scale = ifcopenshell.util.unit.calculate_unit_scale(self.file)
 
-        self.shape_rows = {}
-        self.geometry_rows = {}
-
         if self.file.schema in ("IFC2X3", "IFC4"):
             self.elements = self.file.by_type("IfcElement") + self.file.by_type("IfcProxy")
         else:
             self.elements = self.file.by_type("IfcElement")
 
+        # Geometry written by a previously interrupted export
+        self.c.execute("SELECT id FROM geometry;")
+        geometry_ids = {row[0] for row in self.c.fetchall()}
+
         self.settings = ifcopenshell.geom.settings()
         self.settings.set(self.settings.STRICT_TOLERANCE, True)
 
@@ -197,13 +330,20 @@ class Patcher:
         )
         self.settings.set_context_ids(self.body_contexts)
 
-        products = self.elements
-        iterator = ifcopenshell.geom.iterator(self.settings, self.file, multiprocessing.cpu_count(), include=products)
-        valid_file = iterator.initialize()
+        products = [e for e in self.elements if e.id() not in self.shape_ids]
+        shape_rows = []
+        geometry_rows = []
+        if products:
+            iterator = ifcopenshell.geom.iterator(
+                self.settings, self.file, multiprocessing.cpu_count(), include=products
+            )
+            valid_file = iterator.initialize()
+        else:
+            valid_file = False
         checkpoint = time.time()
         progress = 0
         total = len(products)
-        while True:
+        while valid_file:
             progress += 1
             if progress % 250 == 0:
                 percent_created = round(progress / total * 100)
@@ -217,23 +357,47 @@ class Patcher:
                 checkpoint = time.time()
             shape = iterator.get()
             if shape:
-                if shape.geometry.id not in self.geometry_rows:
-                    v = np.array(shape.geometry.verts).tobytes()
-                    e = np.array(shape.geometry.edges).tobytes()
-                    f = np.array(shape.geometry.faces).tobytes()
-                    mids = np.array(shape.geometry.material_ids).tobytes()
-                    m = json.dumps([int(m.name.split("-")[2]) for m in shape.geometry.materials])
-                    self.geometry_rows[shape.geometry.id] = [shape.geometry.id, v, e, f, mids, m]
+                geometry = shape.geometry
+                if geometry.id not in geometry_ids:
+                    # Blobs are stored as float64 and int64 arrays, as expected by ifcopenshell.sqlite
+                    v = np.frombuffer(geometry.verts_buffer, dtype=np.float64).tobytes()
+                    e = np.frombuffer(geometry.edges_buffer, dtype=np.int32).astype(np.int64).tobytes()
+                    f = np.frombuffer(geometry.faces_buffer, dtype=np.int32).astype(np.int64).tobytes()
+                    mids = np.frombuffer(geometry.material_ids_buffer, dtype=np.int32).astype(np.int64).tobytes()
+                    m = json.dumps([int(m.name.split("-")[2]) for m in geometry.materials])
+                    geometry_ids.add(geometry.id)
+                    geometry_rows.append([geometry.id, v, e, f, mids, m])
                 m = ifcopenshell.util.shape.get_shape_matrix(shape)
                 m[0][3] /= self.unit_scale
                 m[1][3] /= self.unit_scale
                 m[2][3] /= self.unit_scale
                 x, y, z = m[:, 3][0:3]
-                self.shape_rows[shape.id] = [shape.id, float(x), float(y), float(z), m.tobytes(), shape.geometry.id]
+                self.shape_ids.add(shape.id)
+                shape_rows.append([shape.id, float(x), float(y), float(z), m.tobytes(), geometry.id])
+                if len(shape_rows) >= self.chunk_size:
+                    self.write_geometry_rows(shape_rows, geometry_rows)
+                    shape_rows = []
+                    geometry_rows = []
             if not iterator.next():
                 break
+        self.write_geometry_rows(shape_rows, geometry_rows)
+        self.complete_task("geometry")
+        self.db.commit()
         print("Done creating geometry")
 
+    def write_geometry_rows(self, shape_rows, geometry_rows):
+        p = self.placeholder
+        if shape_rows:
+            self.c.executemany(f"INSERT INTO shape VALUES ({p}, {p}, {p}, {p}, {p}, {p});", shape_rows)
+        if self.sql_type == "sqlite":
+            if geometry_rows:
+                self.c.executemany("INSERT INTO geometry VALUES (?, ?, ?, ?, ?, ?);", geometry_rows)
+        elif self.sql_type == "mysql":
+            # Do row by row in case of max_allowed_packet
+            for row in geometry_rows:
+                self.c.execute("INSERT INTO geometry VALUES (%s, %s, %s, %s, %s, %s);", row)
+        self.db.commit()
+
     def create_id_map(self):
         if self.sql_type == "sqlite":
             statement = (
@@ -241,7 +405,7 @@ class Patcher:
             )
         elif self.sql_type == "mysql":
             statement = """
-            CREATE TABLE `id_map` (
+            CREATE TABLE IF NOT EXISTS `id_map` (
               `ifc_id` int(10) unsigned NOT NULL,
               `ifc_class` varchar(255) NOT NULL,
               PRIMARY KEY (`ifc_id`)
@@ -261,17 +425,21 @@ class Patcher:
         if self.sql_type == "sqlite":
             statement = "CREATE TABLE IF NOT EXISTS metadata (preprocessor text, schema text, mvd text);"
             self.c.execute(statement)
-            self.c.execute("INSERT INTO metadata VALUES (?, ?, ?);", metadata)
+            self.c.execute("SELECT COUNT(*) FROM metadata;")
+            if not self.c.fetchone()[0]:
+                self.c.execute("INSERT INTO metadata VALUES (?, ?, ?);", metadata)
         elif self.sql_type == "mysql":
             statement = """
-            CREATE TABLE `metadata` (
+            CREATE TABLE IF NOT EXISTS `metadata` (
               `preprocessor` varchar(255) NOT NULL,
               `schema` varchar(255) NOT NULL,
               `mvd` varchar(255) NOT NULL
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3 COLLATE=utf8mb3_general_ci;
             """
             self.c.execute(statement)
-            self.c.execute("INSERT INTO metadata VALUES (%s, %s, %s);", metadata)
+            self.c.execute("SELECT COUNT(*) FROM metadata;")
+            if not self.c.fetchone()[0]:
+                self.c.execute("INSERT INTO metadata VALUES (%s, %s, %s);", metadata)
 
     def create_pset_table(self):
         statement = """
@@ -399,15 +567,16 @@ class Patcher:
         print(statement)
         self.c.execute(statement)
 
-    def insert_data(self, ifc_class):
-        print("Extracting data for", ifc_class)
-        elements = self.file.by_type(ifc_class, include_subtypes=False)
+    def get_rows(self, ifc_class, chunk_index, ids):
+        print("Extracting data for", ifc_class, "chunk", chunk_index)
 
         rows = []
         id_map_rows = []
         pset_rows = []
+        placement_rows = []
 
-        for element in elements:
+        for element_id in ids:
+            element = self.file.by_id(element_id)
             nested_indices = []
             values = [element.id()]
             for i, attribute in enumerate(element):
@@ -455,23 +624,13 @@ class Patcher:
                         pset_rows.append([element.id(), pset_name, prop_name, value])
 
             if self.should_get_geometry:
-                if element.id() not in self.shape_rows and getattr(element, "ObjectPlacement", None):
+                # Only written if the element has no tessellated shape
+                if getattr(element, "ObjectPlacement", None):
                     m = ifcopenshell.util.placement.get_local_placement(element.ObjectPlacement)
                     x, y, z = m[:, 3][0:3]
-                    self.shape_rows[element.id()] = [element.id(), float(x), float(y), float(z), m.tobytes(), None]
+                    placement_rows.append([element.id(), float(x), float(y), float(z), m.tobytes(), None])
 
-        if self.sql_type == "sqlite":
-            if rows:
-                self.c.executemany(f"INSERT INTO {ifc_class} VALUES ({','.join(['?']*len(rows[0]))});", rows)
-                self.c.executemany("INSERT INTO id_map VALUES (?, ?);", id_map_rows)
-            if pset_rows:
-                self.c.executemany("INSERT INTO psets VALUES (?, ?, ?, ?);", pset_rows)
-        elif self.sql_type == "mysql":
-            if rows:
-                self.c.executemany(f"INSERT INTO {ifc_class} VALUES ({','.join(['%s']*len(rows[0]))});", rows)
-                self.c.executemany("INSERT INTO id_map VALUES (%s, %s);", id_map_rows)
-            if pset_rows:
-                self.c.executemany("INSERT INTO psets VALUES (%s, %s, %s, %s);", pset_rows)
+        return rows, id_map_rows, pset_rows, placement_rows
 
     def serialise_value(self, element, value):
         return element.walk(
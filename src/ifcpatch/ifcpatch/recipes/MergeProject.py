@@ -16,45 +16,106 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with IfcPatch.  If not, see <http://www.gnu.org/licenses/>.
 
+import re
+import tempfile
 import ifcopenshell
 import ifcopenshell.util.element
 import ifcopenshell.util.unit
 from typing import Union
 from logging import Logger
 
+# Resources which are commonly duplicated between federated models. When
+# streaming, identical resources and everything they reference are written
+# once and shared by all models.
+SHARED_CLASSES = (
+    "IfcNamedUnit",
+    "IfcDerivedUnit",
+    "IfcMonetaryUnit",
+    "IfcRepresentationContext",
+    "IfcOwnerHistory",
+    "IfcMaterial",
+    "IfcPresentationStyle",
+)
+
+# Matches either a string, which is left untouched, or an instance reference
+REFERENCE = re.compile(r"'(?:[^']|'')*'|#(\d+)")
+
 
 class Patcher:
-    def __init__(self, src: str, file: ifcopenshell.file, logger: Logger, filepath: str):
-        """Merge two IFC models into one
+    def __init__(
+        self,
+        src: str,
+        file: ifcopenshell.file,
+        logger: Logger,
+        filepath: Union[str, list[str]],
+        stream: bool = False,
+    ):
+        """Merge two or more IFC models into one
 
-        Note that other than combining the two IfcProject elements into one, no
+        Note that other than combining the IfcProject elements into one, no
         further processing will be done. This means that you may end up with
         duplicate spatial hierarchies (i.e. 2 sites, 2 buildings, etc).
 
-        Will automatically convert length units in the second model to the main
-        model's unit before merging.
+        Will automatically convert length units in the other models to the
+        main model's unit before merging.
+
+        By default, the other models are added into the main model in memory,
+        and representation contexts are reused where possible.
+
+        Federating many models this way requires a lot of memory. In streaming
+        mode, the main model is written to a temporary file and each other
+        model is then opened, appended to it and closed in turn, so only one
+        other model is held in memory at a time. Instance IDs of each model are
+        shifted by a fixed offset rather than added one by one. Units,
+        representation contexts, owner histories, materials and styles which
+        are identical to one already written are shared instead of duplicated.
+        The result is the filepath of the merged model.
 
         :param filepath: The filepath of the second IFC model to merge into the
-            first. The first model is already specified as the input to
-            IfcPatch.
-        :type filepath: str
+            first, or a list of filepaths of IFC models. The first model is
+            already specified as the input to IfcPatch.
+        :type filepath: Union[str, list[str]]
+        :param stream: Whether or not to stream the merged model to a file
+            instead of merging in memory.
+        :type stream: bool
+        :return: The merged model, or the filepath to it when streaming.
 
         Example:
 
         .. code:: python
 
             ifcpatch.execute({"input": "input.ifc", "file": model, "recipe": "MergeProject", "arguments": ["/path/to/model2.ifc"]})
+
+            # Federate many models, streaming the result to a file
+            output = ifcpatch.execute(
+                {
+                    "input": "input.ifc",
+                    "file": model,
+                    "recipe": "MergeProject",
+                    "arguments": [["/path/to/model2.ifc", "/path/to/model3.ifc"], True],
+                }
+            )
+            ifcpatch.write(output, "/path/to/federated.ifc")
         """
         self.src = src
         self.file = file
         self.logger = logger
-        self.filepath = filepath
+        self.filepaths = [filepath] if isinstance(filepath, str) else list(filepath)
+        # Arguments from the command line are strings
+        self.stream = stream.lower() == "true" if isinstance(stream, str) else stream
 
     def patch(self):
-        source = ifcopenshell.open(self.filepath)
+        if self.stream:
+            self.file_patched = self.stream_merge()
+            return
+        for filepath in self.filepaths:
+            self.merge(filepath)
+
+    def merge(self, filepath: str) -> None:
+        source = ifcopenshell.open(filepath)
         # make sure models units will match
         if (main_unit := self.get_unit_name(self.file)) != self.get_unit_name(source):
-            source = ifcopenshell.util.unit.convert_file_length_units(source, main_unit)
+            source = ifcopenshell.util.unit.convert_file_length_units(source, main_unit, in_place=True)
 
         self.existing_contexts: list[ifcopenshell.entity_instance] = self.file.by_type(
             "IfcGeometricRepresentationContext"
@@ -77,6 +138,113 @@ class Patcher:
 
         self.reuse_existing_contexts()
 
+    def stream_merge(self) -> str:
+        main_unit = self.get_unit_name(self.file)
+        project = self.file.by_type("IfcProject")[0]
+        unit_assignment = ifcopenshell.util.unit.get_unit_assignment(self.file)
+
+        # Maps the key of a shared resource to its ID in the merged model
+        self.key_to_id = {}
+        self.map_shared_resources(self.file, {}, 0)
+
+        output_path = tempfile.NamedTemporaryFile(suffix=".ifc", delete=False).name
+        self.file.write(output_path)
+
+        # Reopen the data section, which is closed by the written model
+        with open(output_path, "rb+") as output:
+            output.seek(max(0, output.seek(0, 2) - 64))
+            tail = output.read()
+            output.seek(output.tell() - len(tail) + tail.rindex(b"ENDSEC;"))
+            output.truncate()
+
+        offset = self.file.wrapped_data.getMaxId()
+        with open(output_path, "a", encoding="utf-8", newline="\n") as output:
+            for filepath in self.filepaths:
+                source = ifcopenshell.open(filepath)
+                if source.schema_identifier != self.file.schema_identifier:
+                    raise Exception(f"Can't merge {filepath} as it uses schema {source.schema_identifier}.")
+                if self.get_unit_name(source) != main_unit:
+                    source = ifcopenshell.util.unit.convert_file_length_units(source, main_unit, in_place=True)
+
+                # Maps the ID of an instance in the source to an instance already in the merged model
+                mapping = {source.by_type("IfcProject")[0].id(): project.id()}
+                source_unit_assignment = ifcopenshell.util.unit.get_unit_assignment(source)
+                if unit_assignment and source_unit_assignment:
+                    mapping[source_unit_assignment.id()] = unit_assignment.id()
+                skipped = self.map_shared_resources(source, mapping, offset)
+                self.write_instances(output, source, mapping, offset, skipped)
+
+                self.logger.info(f"Merged {filepath} with {len(mapping)} instances shared")
+                offset += source.wrapped_data.getMaxId()
+                del source
+            output.write("ENDSEC;\nEND-ISO-10303-21;\n")
+        return output_path
+
+    def map_shared_resources(self, source: ifcopenshell.file, mapping: dict[int, int], offset: int) -> set[int]:
+        """Maps resources identical to one already written to the existing resource
+
+        :return: The IDs of instances which must not be written, as they only
+            describe resources which are mapped.
+        """
+        keys = {}
+        visited = set()
+        for ifc_class in SHARED_CLASSES:
+            for resource in source.by_type(ifc_class):
+                if resource.id() in visited:
+                    continue
+                for element in source.traverse(resource):
+                    if not element.id() or element.id() in visited:
+                        continue
+                    visited.add(element.id())
+                    if element.id() in mapping:
+                        continue
+                    key = self.get_key(element, keys)
+                    if (existing_id := self.key_to_id.get(key)) is None:
+                        self.key_to_id[key] = element.id() + offset
+                    else:
+                        mapping[element.id()] = existing_id
+
+        # The existing material already has its own definition representations
+        skipped = set()
+        for material in source.by_type("IfcMaterial"):
+            if material.id() not in mapping:
+                continue
+            for definition in material.HasRepresentation or ():
+                skipped.update(e.id() for e in source.traverse(definition) if e.id() and e.id() not in visited)
+        return skipped
+
+    def write_instances(
+        self, output, source: ifcopenshell.file, mapping: dict[int, int], offset: int, skipped: set[int]
+    ) -> None:
+        def remap(match):
+            if match.group(1) is None:
+                return match.group(0)
+            element_id = int(match.group(1))
+            return f"#{mapping.get(element_id, element_id + offset)}"
+
+        for element in source:
+            if element.id() not in mapping and element.id() not in skipped:
+                output.write(REFERENCE.sub(remap, element.to_string()) + "\n")
+
+    def get_key(self, element: ifcopenshell.entity_instance, keys: dict[int, tuple]) -> tuple:
+        key = keys.get(element.id())
+        if key is None:
+            if element.is_a("IfcGeometricRepresentationContext"):
+                key = self.get_context_key(element)
+            else:
+                key = (element.is_a(), tuple(self.get_value_key(v, keys) for v in element))
+            keys[element.id()] = key
+        return key
+
+    def get_value_key(self, value, keys: dict[int, tuple]):
+        if isinstance(value, ifcopenshell.entity_instance):
+            if value.id():
+                return self.get_key(value, keys)
+            return (value.is_a(), self.get_value_key(value.wrappedValue, keys))
+        elif isinstance(value, tuple):
+            return tuple(self.get_value_key(v, keys) for v in value)
+        return value
+
     def get_unit_name(self, ifc_file: ifcopenshell.file) -> str:
         length_unit = ifcopenshell.util.unit.get_project_unit(ifc_file, "LENGTHUNIT")
         return ifcopenshell.util.unit.get_full_unit_name(length_unit)
@@ -97,18 +265,12 @@ class Patcher:
     def get_equivalent_existing_context(
         self, added_context: ifcopenshell.entity_instance
     ) -> Union[ifcopenshell.entity_instance, None]:
+        added_key = self.get_context_key(added_context)
         for context in self.existing_contexts:
-            if context.is_a() != added_context.is_a():
-                continue
-            if context.is_a("IfcGeometricRepresentationSubContext"):
-                if (
-                    context.ContextType == added_context.ContextType
-                    and context.ContextIdentifier == added_context.ContextIdentifier
-                    and context.TargetView == added_context.TargetView
-                ):
-                    return context
-            elif (
-                context.ContextType == added_context.ContextType
-                and context.ContextIdentifier == added_context.ContextIdentifier
-            ):
+            if self.get_context_key(context) == added_key:
                 return context
+
+    def get_context_key(self, context: ifcopenshell.entity_instance) -> tuple:
+        if context.is_a("IfcGeometricRepresentationSubContext"):
+            return (context.is_a(), context.ContextType, context.ContextIdentifier, context.TargetView)
+        return (context.is_a(), context.ContextType, context.ContextIdentifier)
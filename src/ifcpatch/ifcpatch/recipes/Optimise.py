@@ -17,11 +17,11 @@
 # along with IfcPatch.  If not, see <http://www.gnu.org/licenses/>.
 
 import ifcopenshell
-import ifcopenshell.util.element
+from logging import Logger
 
 
 class Patcher:
-    def __init__(self, src, file, logger):
+    def __init__(self, src: str, file: ifcopenshell.file, logger: Logger, tolerance: float = 0.0):
         """Optimise the filesize of an IFC model
 
         It is possible to non-losslessly optimise the filesize of an IFC model.
@@ -37,64 +37,105 @@ class Patcher:
         can usually be solved through other means. Consult the BlenderBIM Add-on
         documentation on dealing with large models for more details.
 
-        Warning: this optimise recipe is very, very slow. Please consider using
-        RecycleNonRootedElements instead.
+        Instances with identical attributes, including references to
+        identical instances, are merged into a single instance. Instances are
+        visited bottom up, so each instance is compared using only its direct
+        attributes, with references already replaced by their merged instance.
+
+        Optionally, a tolerance may be given so that cartesian points and
+        directions whose coordinates round to the same multiple of the
+        tolerance are also merged, keeping the first coordinates found.
+
+        :param tolerance: The coordinate tolerance to merge near-duplicate
+            cartesian points and directions. Defaults to 0.0, which only
+            merges exact duplicates.
+        :type tolerance: float
 
         Example:
 
         .. code:: python
 
             ifcpatch.execute({"input": "input.ifc", "file": model, "recipe": "Optimise", "arguments": []})
+
+            # Also merge points and directions within 0.01mm, for a model in millimeters
+            ifcpatch.execute({"input": "input.ifc", "file": model, "recipe": "Optimise", "arguments": [0.01]})
         """
         self.src = src
         self.file = file
         self.logger = logger
+        self.tolerance = float(tolerance or 0.0)
         self.optimized_file = ifcopenshell.file(schema=self.file.schema)
 
     def patch(self):
-        from toposort import toposort_flatten as toposort
-
-        def generate_instances_and_references():
-            """
-            Generator which yields an entity id and
-            the set of all of its references contained in its attributes.
-            """
-            for inst in self.file:
-                yield inst.id(), set(i.id() for i in self.file.traverse(inst)[1:] if i.id())
-
-        instance_mapping = {}
-
-        def map_value(v):
-            """
-            Recursive function which replicates an entity instance, with
-            its attributes, mapping references to already registered
-            instances. Indeed, because of the toposort we know that
-            forward attribute value instances are mapped before the instances
-            that reference them.
-            """
-            if isinstance(v, (list, tuple)):
-                # lists are recursively traversed
-                return type(v)(map(map_value, v))
-            elif isinstance(v, ifcopenshell.entity_instance):
-                if v.id() == 0:
-                    # express simple types are not part of the toposort and just copied
-                    return self.optimized_file.create_entity(v.is_a(), v[0])
-
-                return instance_mapping[v]
-            else:
-                # a plain python value can just be returned
-                return v
-
-        info_to_id = {}
-
-        for id in toposort(dict(generate_instances_and_references())):
-            inst = self.file[id]
-            info = inst.get_info(include_identifier=False, recursive=True, return_type=frozenset)
-            if info in info_to_id:
-                mapped = instance_mapping[inst] = instance_mapping[self.file[info_to_id[info]]]
-
-            else:
-                info_to_id[info] = id
-                instance_mapping[inst] = self.optimized_file.create_entity(inst.is_a(), *map(map_value, inst))
-
+        # Maps the ID of an instance in the original file to the ID of its merged instance in the optimised file
+        self.instance_mapping = {}
+        # Maps the key of an instance, made of its class and direct attributes, to the ID of its merged instance
+        self.key_to_id = {}
+        in_progress = set()
+
+        for root in self.file:
+            if root.id() in self.instance_mapping:
+                continue
+            # An iterative depth first traversal, so that references are always merged before their referrers
+            in_progress.add(root.id())
+            stack = [(root, list(root), self.get_references(root))]
+            while stack:
+                inst, values, references = stack[-1]
+                for reference in references:
+                    reference_id = reference.id()
+                    if reference_id not in self.instance_mapping and reference_id not in in_progress:
+                        in_progress.add(reference_id)
+                        stack.append((reference, list(reference), self.get_references(reference)))
+                        break
+                else:
+                    stack.pop()
+                    in_progress.discard(inst.id())
+                    self.instance_mapping[inst.id()] = self.merge(inst, values)
+
+        self.logger.info(f"Merged {len(self.instance_mapping)} instances into {len(self.key_to_id)} instances")
         self.file = self.optimized_file
+
+    def get_references(self, inst):
+        for value in inst:
+            yield from self.get_value_references(value)
+
+    def get_value_references(self, value):
+        if isinstance(value, ifcopenshell.entity_instance):
+            # Express simple types, such as IfcLabel, have no ID and are copied rather than referenced
+            if value.id():
+                yield value
+        elif isinstance(value, (list, tuple)):
+            for v in value:
+                yield from self.get_value_references(v)
+
+    def merge(self, inst, values):
+        ifc_class = inst.is_a()
+        if self.tolerance and ifc_class in ("IfcCartesianPoint", "IfcDirection"):
+            key = (ifc_class, tuple(round(v / self.tolerance) for v in values[0]))
+        else:
+            key = (ifc_class, tuple(map(self.get_key, values)))
+        merged_id = self.key_to_id.get(key)
+        if merged_id is None:
+            merged_id = self.key_to_id[key] = self.optimized_file.create_entity(
+                ifc_class, *map(self.map_value, values)
+            ).id()
+        return merged_id
+
+    def get_key(self, value):
+        # The schema fixes the type of each attribute, so a merged ID can never be confused with an integer value
+        if isinstance(value, ifcopenshell.entity_instance):
+            if value.id():
+                return self.instance_mapping[value.id()]
+            return (value.is_a(), self.get_key(value[0]))
+        elif isinstance(value, (list, tuple)):
+            return tuple(map(self.get_key, value))
+        return value
+
+    def map_value(self, value):
+        if isinstance(value, ifcopenshell.entity_instance):
+            if value.id():
+                return self.optimized_file.by_id(self.instance_mapping[value.id()])
+            return self.optimized_file.create_entity(value.is_a(), value[0])
+        elif isinstance(value, (list, tuple)):
+            return type(value)(map(self.map_value, value))
+        return value
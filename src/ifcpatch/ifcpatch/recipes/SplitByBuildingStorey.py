@@ -17,68 +17,233 @@
 # along with IfcPatch.  If not, see <http://www.gnu.org/licenses/>.
 
 
+import os
+import ifcopenshell
+import ifcopenshell.util.element
+import ifcopenshell.util.selector
+from logging import Logger
+from typing import Optional
+
+# Instances which refer to the instances of a split model without being
+# referenced by them, such as relationships and styles, and so have to be
+# found through their references.
+LINK_CLASSES = (
+    "IfcRelationship",
+    "IfcPresentationLayerAssignment",
+    "IfcStyledItem",
+    "IfcMaterialDefinitionRepresentation",
+)
+
+# The aggregates of these links list related instances, of which only the
+# instances which are part of the split model are kept.
+FILTERED_LINK_CLASSES = ("IfcRelationship", "IfcPresentationLayerAssignment")
+
+
 class Patcher:
-    def __init__(self, src, file, logger, output_dir=None):
+    def __init__(
+        self,
+        src: str,
+        file: ifcopenshell.file,
+        logger: Logger,
+        output_dir: Optional[str] = None,
+        query: str = "IfcBuildingStorey",
+        group_by: Optional[str] = None,
+    ):
         """Split an IFC model into multiple models based on building storey
 
         The new IFC model names will be named after the storey name in the
         format of {i}-{name}.ifc, where {i} is an ascending number starting from
         0 and {name} is the name of the storey.
 
+        Each model includes the elements contained in the storey, including
+        elements in its spaces, their parts, openings and fillings, and all
+        the data they rely on, such as geometry, styles, types, properties,
+        materials and relationships. The spatial structure and other non-element
+        products are included in every model.
+
+        Instead of storeys, the model may also be split by any spatial element,
+        selected using a query. Alternatively, elements may be split into
+        groups by any value, such as a discipline property, in which case the
+        query selects the elements to split.
+
+        The model is traversed once for all outputs, so the split scales with
+        the size of the model rather than the number of outputs.
+
         :param output_dir: Specifies an output directory where the new IFC models will be saved.
         :type output_dir: str
+        :param query: A query to select the spatial elements to split by, or
+            if group_by is specified, the elements to split. Defaults to
+            "IfcBuildingStorey".
+        :type query: str
+        :param group_by: An optional query for a value to group elements by,
+            such as "Pset_Discipline.Name" or "class". Each unique value
+            results in a model named after the value.
+        :type group_by: str
 
         Example:
 
         .. code:: python
 
             ifcpatch.execute({"input": "input.ifc", "file": model, "recipe": "SplitByBuildingStorey", "arguments": ["C:/.../output_files"]})
+
+            # Split by space instead
+            ifcpatch.execute({"input": "input.ifc", "file": model, "recipe": "SplitByBuildingStorey", "arguments": ["C:/.../output_files", "IfcSpace"]})
+
+            # Split all elements by their type name
+            ifcpatch.execute({"input": "input.ifc", "file": model, "recipe": "SplitByBuildingStorey", "arguments": ["C:/.../output_files", "IfcElement", "type.Name"]})
         """
         self.src = src
         self.file = file
         self.logger = logger
         self.output_dir = output_dir
+        self.query = query
+        self.group_by = group_by
 
     def patch(self):
-        import ifcopenshell
-        from shutil import copyfile
-
-        storeys = self.file.by_type("IfcBuildingStorey")
-        for i, storey in enumerate(storeys):
-            dest = (
-                "{}-{}.ifc".format(i, storey.Name)
-                if self.output_dir == None
-                else "{}/{}-{}.ifc".format(self.output_dir, i, storey.Name)
-            )
-            copyfile(self.src, dest)
-            old_ifc = ifcopenshell.open(dest)
-            new_ifc = ifcopenshell.file(schema=self.file.schema)
-            if self.file.schema == "IFC2X3":
-                elements = old_ifc.by_type("IfcProject") + old_ifc.by_type("IfcProduct")
-            else:
-                elements = old_ifc.by_type("IfcContext") + old_ifc.by_type("IfcProduct")
-            inverse_elements = []
+        self.direct_references = {}
+        self.products = {p.id() for p in self.file.by_type("IfcProduct")}
+        self.index_links()
+
+        # Products which aren't elements, like the spatial structure, are included in every model
+        base = [p for p in self.file.by_type("IfcProduct") if not p.is_a("IfcElement")]
+        base.extend(self.file.by_type("IfcProject" if self.file.schema == "IFC2X3" else "IfcContext"))
+
+        groups = self.get_groups()
+        # Maps the ID of an instance to the indices of the groups it is part of
+        memberships = {}
+        for i, (name, elements) in enumerate(groups):
+            products = {p.id() for p in base}
             for element in elements:
-                if element.is_a("IfcElement") and not self.is_in_storey(element, storey):
-                    element.Representation = None
+                products.add(element.id())
+                products.update(e.id() for e in ifcopenshell.util.element.get_decomposition(element))
+            for inst_id in self.get_closure(products):
+                memberships.setdefault(inst_id, []).append(i)
+
+        outputs = [ifcopenshell.file(schema=self.file.schema) for group in groups]
+        self.write_outputs(memberships, outputs)
+
+        for i, ((name, elements), output) in enumerate(zip(groups, outputs)):
+            dest = "{}-{}.ifc".format(i, name)
+            if self.output_dir is not None:
+                dest = os.path.join(self.output_dir, dest)
+            output.write(dest)
+
+    def get_groups(self) -> list[tuple[str, list[ifcopenshell.entity_instance]]]:
+        elements = ifcopenshell.util.selector.filter_elements(self.file, self.query)
+        if not self.group_by:
+            return [(container.Name, [container]) for container in sorted(elements, key=lambda e: e.id())]
+        groups = {}
+        for element in sorted(elements, key=lambda e: e.id()):
+            value = ifcopenshell.util.selector.get_element_value(element, self.group_by)
+            groups.setdefault(str(value), []).append(element)
+        return list(groups.items())
+
+    def get_references(self, value, is_top_level=True, results=None):
+        if results is None:
+            results = []
+        if isinstance(value, ifcopenshell.entity_instance):
+            if value.id():
+                results.append(value.id())
+            else:
+                # Express simple types may wrap aggregates of instances, such as IfcPropertySetDefinitionSet
+                self.get_references(value[0], False, results)
+        elif isinstance(value, (list, tuple)):
+            for v in value:
+                self.get_references(v, False, results)
+        return results
+
+    def get_direct_references(self, inst_id: int) -> list[int]:
+        references = self.direct_references.get(inst_id)
+        if references is None:
+            references = self.direct_references[inst_id] = self.get_references(list(self.file.by_id(inst_id)))
+        return references
+
+    def index_links(self) -> None:
+        # Maps the ID of an instance to the links which may be included when it is
+        self.links = {}
+        # Maps the ID of a link to the references it relies on, which are included with it
+        self.link_dependencies = {}
+        for link in set().union(*[self.file.by_type(ifc_class) for ifc_class in LINK_CLASSES]):
+            dependencies = []
+            members = []
+            is_filtered = any(link.is_a(ifc_class) for ifc_class in FILTERED_LINK_CLASSES)
+            for value in link:
+                if is_filtered and isinstance(value, (list, tuple)):
+                    self.get_references(value, results=members)
+                else:
+                    self.get_references(value, results=dependencies)
+            self.link_dependencies[link.id()] = dependencies
+            if link.is_a("IfcStyledItem"):
+                # Styles are shared by many items, so only the styled item triggers the link
+                triggers = [link.Item.id()] if link.Item else []
+            else:
+                # A link with related instances is only relevant if one of them is included
+                triggers = members or dependencies
+            for inst_id in triggers:
+                self.links.setdefault(inst_id, []).append(link.id())
+
+    def get_closure(self, products: set[int]) -> set[int]:
+        """Gets the IDs of all instances needed to include the products
+
+        Products which are not part of the split model are never traversed,
+        and links relying on them are left out.
+        """
+        results = set()
+        checked_links = set()
+        queue = list(products)
+        while queue:
+            inst_id = queue.pop()
+            if inst_id in results:
+                continue
+            results.add(inst_id)
+            references = self.link_dependencies.get(inst_id)
+            if references is None:
+                references = self.get_direct_references(inst_id)
+            for reference in references:
+                if reference not in results and (reference in products or reference not in self.products):
+                    queue.append(reference)
+            for link in self.links.get(inst_id, ()):
+                if link in checked_links:
                     continue
-                if element.is_a("IfcElement"):
-                    styled_rep_items = [
-                        i for i in old_ifc.traverse(element) if i.is_a("IfcRepresentationItem") and i.StyledByItem
-                    ]
-                    [new_ifc.add(i.StyledByItem[0]) for i in styled_rep_items]
-                new_ifc.add(element)
-                inverse_elements.extend(old_ifc.get_inverse(element))
-            for inverse_element in inverse_elements:
-                new_ifc.add(inverse_element)
-            for element in new_ifc.by_type("IfcElement"):
-                if not self.is_in_storey(element, storey):
-                    new_ifc.remove(element)
-            new_ifc.write(dest)
-
-    def is_in_storey(self, element, storey):
-        return (
-            element.ContainedInStructure
-            and element.ContainedInStructure[0].RelatingStructure.is_a("IfcBuildingStorey")
-            and element.ContainedInStructure[0].RelatingStructure.GlobalId == storey.GlobalId
-        )
+                checked_links.add(link)
+                if all(d in products for d in self.link_dependencies[link] if d in self.products):
+                    queue.append(link)
+        return results
+
+    def write_outputs(self, memberships: dict[int, list[int]], outputs: list[ifcopenshell.file]) -> None:
+        # Maps the ID of an instance to its ID in each output model
+        self.output_ids = [{} for output in outputs]
+        written = set()
+        for root in memberships:
+            if root in written:
+                continue
+            # An iterative depth first traversal, so that references are always written first
+            written.add(root)
+            stack = [(root, iter(self.get_direct_references(root)))]
+            while stack:
+                inst_id, references = stack[-1]
+                for reference in references:
+                    if reference not in written and reference in memberships:
+                        written.add(reference)
+                        stack.append((reference, iter(self.get_direct_references(reference))))
+                        break
+                else:
+                    stack.pop()
+                    inst = self.file.by_id(inst_id)
+                    values = list(inst)
+                    for i in memberships[inst_id]:
+                        output = outputs[i]
+                        attributes = [self.map_value(v, output, self.output_ids[i]) for v in values]
+                        self.output_ids[i][inst_id] = output.create_entity(inst.is_a(), *attributes).id()
+
+    def map_value(self, value, output: ifcopenshell.file, output_ids: dict[int, int]):
+        if isinstance(value, ifcopenshell.entity_instance):
+            if value.id():
+                # References to instances which are not part of the output are left out
+                output_id = output_ids.get(value.id())
+                return None if output_id is None else output.by_id(output_id)
+            return output.create_entity(value.is_a(), self.map_value(value[0], output, output_ids))
+        elif isinstance(value, (list, tuple)):
+            results = [self.map_value(v, output, output_ids) for v in value]
+            return type(value)(v for v in results if v is not None)
+        return value
@@ -0,0 +1,72 @@
+# IfcOpenShell - IFC toolkit and geometry engine
+# Copyright (C) 2023 Dion Moult <dion@thinkmoult.com>
+#
+# This file is part of IfcOpenShell.
+#
+# IfcOpenShell is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IfcOpenShell is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IfcOpenShell.  If not, see <http://www.gnu.org/licenses/>.
+
+import sqlite3
+import ifcpatch
+import ifcopenshell
+import ifcopenshell.api
+import test.bootstrap
+
+
+class TestIfc2Sql(test.bootstrap.IFC4):
+    def get_output(self, tmp_path, **kwargs):
+        src = str(tmp_path / "input.ifc")
+        self.file.write(src)
+        arguments = ["sqlite", "localhost", "root", "pass", "test"]
+        arguments.extend([kwargs.get("full_schema", False), 1, kwargs.get("chunk_size", 10000), kwargs.get("resume")])
+        return ifcpatch.execute({"input": src, "file": self.file, "recipe": "Ifc2Sql", "arguments": arguments})
+
+    def test_run(self, tmp_path):
+        ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcProject")
+        wall = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall", name="Foo")
+        pset = ifcopenshell.api.run("pset.add_pset", self.file, product=wall, name="Foo_Bar")
+        ifcopenshell.api.run("pset.edit_pset", self.file, pset=pset, properties={"Foo": "Bar"})
+        db = sqlite3.connect(self.get_output(tmp_path))
+        c = db.cursor()
+        assert c.execute("SELECT Name FROM IfcWall WHERE ifc_id = ?", (wall.id(),)).fetchall() == [("Foo",)]
+        assert c.execute("SELECT pset_name, name, value FROM psets").fetchall() == [("Foo_Bar", "Foo", "Bar")]
+        assert c.execute("SELECT COUNT(*) FROM id_map").fetchone()[0] == len(list(self.file))
+        tables = {r[0] for r in c.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()}
+        assert "IfcWall" in tables
+        assert "IfcSlab" not in tables
+        assert "export_progress" not in tables
+
+    def test_writing_in_chunks(self, tmp_path):
+        walls = [ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall") for i in range(5)]
+        db = sqlite3.connect(self.get_output(tmp_path, chunk_size=2))
+        ids = [r[0] for r in db.execute("SELECT ifc_id FROM IfcWall ORDER BY ifc_id").fetchall()]
+        assert ids == sorted(w.id() for w in walls)
+
+    def test_resuming_an_interrupted_export(self, tmp_path):
+        walls = [ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall") for i in range(3)]
+        src = str(tmp_path / "input.ifc")
+        db = sqlite3.connect(src + ".sqlite.partial")
+        db.execute("CREATE TABLE export_progress (task varchar(255) NOT NULL);")
+        db.execute("INSERT INTO export_progress VALUES ('IfcWall:0');")
+        db.commit()
+        db.close()
+        output = self.get_output(tmp_path, chunk_size=2, resume=True)
+        assert output == src + ".sqlite.partial"
+        db = sqlite3.connect(output)
+        # The first chunk was already written, so only the last wall is exported
+        assert [r[0] for r in db.execute("SELECT ifc_id FROM IfcWall").fetchall()] == [walls[2].id()]
+        assert not db.execute("SELECT name FROM sqlite_master WHERE name = 'export_progress'").fetchall()
+
+    def test_creating_tables_for_the_full_schema(self, tmp_path):
+        db = sqlite3.connect(self.get_output(tmp_path, full_schema=True))
+        assert db.execute("SELECT name FROM sqlite_master WHERE name = 'IfcSlab'").fetchall()
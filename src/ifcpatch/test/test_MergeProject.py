@@ -61,6 +61,66 @@ class TestMergeProject(test.bootstrap.IFC4):
         matrix[:, 3] = (1, 2, 3, 1)
         assert to_tuple(placement1) == to_tuple(placement2) == to_tuple(matrix)
 
+    def test_run_streaming_many_models(self):
+        self.file = self.setup_project(self.file)
+        filepaths = []
+        for i in range(2):
+            temp_path = Path(tempfile.gettempdir()) / f"federated{i}.ifc"
+            self.setup_project().write(temp_path)
+            filepaths.append(str(temp_path))
+        output = ifcpatch.execute({"file": self.file, "recipe": "MergeProject", "arguments": [filepaths, True]})
+        output = ifcopenshell.open(output)
+
+        assert len(output.by_type("IfcWall")) == 3
+        assert len(output.by_type("IfcProject")) == 1
+        assert len(output.by_type("IfcUnitAssignment")) == 1
+        # Converted units are identical to the main model's units, so are shared
+        assert len(output.by_type("IfcSIUnit")) == 1
+
+        matrix = np.eye(4)
+        matrix[:, 3] = (1, 2, 3, 1)
+        for wall in output.by_type("IfcWall"):
+            assert np.allclose(ifcopenshell.util.placement.get_local_placement(wall.ObjectPlacement), matrix)
+
+    def test_run_streaming_models_sharing_a_styled_material(self):
+        self.file = self.setup_project(self.file)
+        filepaths = []
+        for i, ifc_file in enumerate((self.file, self.setup_project(), self.setup_project())):
+            context = ifcopenshell.api.run("context.add_context", ifc_file, context_type="Model")
+            material = ifcopenshell.api.run("material.add_material", ifc_file, name="Concrete")
+            style = ifcopenshell.api.run("style.add_style", ifc_file, name="Concrete")
+            ifcopenshell.api.run(
+                "style.add_surface_style",
+                ifc_file,
+                style=style,
+                ifc_class="IfcSurfaceStyleShading",
+                attributes={"SurfaceColour": {"Name": None, "Red": 0.5, "Green": 0.5, "Blue": 0.5}},
+            )
+            ifcopenshell.api.run(
+                "style.assign_material_style", ifc_file, material=material, style=style, context=context
+            )
+            if i:
+                temp_path = Path(tempfile.gettempdir()) / f"federated-material{i}.ifc"
+                ifc_file.write(temp_path)
+                filepaths.append(str(temp_path))
+        output = ifcpatch.execute({"file": self.file, "recipe": "MergeProject", "arguments": [filepaths, True]})
+        output = ifcopenshell.open(output)
+
+        assert len(output.by_type("IfcMaterial")) == 1
+        # The shared material keeps only the main model's definition representation
+        assert len(output.by_type("IfcMaterialDefinitionRepresentation")) == 1
+        assert len(output.by_type("IfcStyledRepresentation")) == 1
+        assert len(output.by_type("IfcStyledItem")) == 1
+        assert len(output.by_type("IfcSurfaceStyle")) == 1
+
+    def test_run_not_streaming_from_a_command_line_argument(self):
+        self.file = self.setup_project(self.file)
+        temp_path = Path(tempfile.gettempdir()) / "second.ifc"
+        self.setup_project().write(temp_path)
+        output = ifcpatch.execute({"file": self.file, "recipe": "MergeProject", "arguments": [str(temp_path), "False"]})
+        assert isinstance(output, ifcopenshell.file)
+        assert len(output.by_type("IfcWall")) == 2
+
 
 class TestMergeProjectIFC2X3(test.bootstrap.IFC2X3, TestMergeProject):
     pass
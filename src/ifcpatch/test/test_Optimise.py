@@ -0,0 +1,50 @@
+# IfcOpenShell - IFC toolkit and geometry engine
+# Copyright (C) 2022 Dion Moult <dion@thinkmoult.com>
+#
+# This file is part of IfcOpenShell.
+#
+# IfcOpenShell is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IfcOpenShell is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IfcOpenShell.  If not, see <http://www.gnu.org/licenses/>.
+
+import ifcpatch
+import ifcopenshell
+import ifcopenshell.api
+import test.bootstrap
+
+
+class TestOptimise(test.bootstrap.IFC4):
+    def test_run(self):
+        project = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcProject")
+        for i in range(2):
+            self.file.createIfcAxis2Placement3D(
+                self.file.createIfcCartesianPoint((0.0, 0.0, 0.0)), self.file.createIfcDirection((0.0, 0.0, 1.0))
+            )
+        output = ifcpatch.execute({"file": self.file, "recipe": "Optimise", "arguments": []})
+        assert len(output.by_type("IfcAxis2Placement3D")) == 1
+        assert len(output.by_type("IfcCartesianPoint")) == 1
+        assert len(output.by_type("IfcDirection")) == 1
+        assert output.by_type("IfcProject")[0].GlobalId == project.GlobalId
+
+    def test_keeping_instances_with_different_references(self):
+        self.file.createIfcAxis2Placement3D(self.file.createIfcCartesianPoint((0.0, 0.0, 0.0)))
+        self.file.createIfcAxis2Placement3D(self.file.createIfcCartesianPoint((1.0, 0.0, 0.0)))
+        output = ifcpatch.execute({"file": self.file, "recipe": "Optimise", "arguments": []})
+        assert len(output.by_type("IfcAxis2Placement3D")) == 2
+
+    def test_merging_near_duplicate_coordinates_within_a_tolerance(self):
+        self.file.createIfcCartesianPoint((0.0, 0.0, 0.0))
+        self.file.createIfcCartesianPoint((0.0, 0.0, 0.0000001))
+        output = ifcpatch.execute({"file": self.file, "recipe": "Optimise", "arguments": []})
+        assert len(output.by_type("IfcCartesianPoint")) == 2
+        output = ifcpatch.execute({"file": self.file, "recipe": "Optimise", "arguments": [0.001]})
+        assert len(output.by_type("IfcCartesianPoint")) == 1
@@ -0,0 +1,107 @@
+# IfcOpenShell - IFC toolkit and geometry engine
+# Copyright (C) 2022 Dion Moult <dion@thinkmoult.com>
+#
+# This file is part of IfcOpenShell.
+#
+# IfcOpenShell is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# IfcOpenShell is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with IfcOpenShell.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import ifcpatch
+import ifcopenshell
+import ifcopenshell.api
+import test.bootstrap
+
+
+class TestSplitByBuildingStorey(test.bootstrap.IFC4):
+    def test_run(self, tmp_path):
+        project = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcProject")
+        building = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcBuilding")
+        ifcopenshell.api.run("aggregate.assign_object", self.file, products=[building], relating_object=project)
+        walls = []
+        for name in ("A", "B"):
+            storey = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcBuildingStorey", name=name)
+            ifcopenshell.api.run("aggregate.assign_object", self.file, products=[storey], relating_object=building)
+            wall = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+            ifcopenshell.api.run("spatial.assign_container", self.file, products=[wall], relating_structure=storey)
+            walls.append(wall)
+        wall_type = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWallType")
+        ifcopenshell.api.run("type.assign_type", self.file, related_objects=walls, relating_type=wall_type)
+
+        ifcpatch.execute({"file": self.file, "recipe": "SplitByBuildingStorey", "arguments": [str(tmp_path)]})
+
+        for i, (name, wall) in enumerate(zip(("A", "B"), walls)):
+            output = ifcopenshell.open(os.path.join(tmp_path, f"{i}-{name}.ifc"))
+            assert [e.GlobalId for e in output.by_type("IfcWall")] == [wall.GlobalId]
+            assert len(output.by_type("IfcBuildingStorey")) == 2
+            assert len(output.by_type("IfcRelContainedInSpatialStructure")) == 1
+            rel = output.by_type("IfcRelDefinesByType")[0]
+            assert [e.GlobalId for e in rel.RelatedObjects] == [wall.GlobalId]
+            assert rel.RelatingType.GlobalId == wall_type.GlobalId
+
+    def test_not_including_items_of_other_storeys_through_shared_styles(self, tmp_path):
+        project = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcProject")
+        context = ifcopenshell.api.run("context.add_context", self.file, context_type="Model")
+        body = ifcopenshell.api.run(
+            "context.add_context", self.file, context_type="Model", context_identifier="Body", parent=context
+        )
+        style = ifcopenshell.api.run("style.add_style", self.file)
+        ifcopenshell.api.run(
+            "style.add_surface_style",
+            self.file,
+            style=style,
+            ifc_class="IfcSurfaceStyleShading",
+            attributes={"SurfaceColour": {"Name": None, "Red": 1.0, "Green": 0.8, "Blue": 0.8}},
+        )
+        building = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcBuilding")
+        ifcopenshell.api.run("aggregate.assign_object", self.file, products=[building], relating_object=project)
+        items = []
+        for name, height in (("A", 1.0), ("B", 2.0)):
+            storey = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcBuildingStorey", name=name)
+            ifcopenshell.api.run("aggregate.assign_object", self.file, products=[storey], relating_object=building)
+            wall = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+            ifcopenshell.api.run("spatial.assign_container", self.file, products=[wall], relating_structure=storey)
+            representation = ifcopenshell.api.run(
+                "geometry.add_wall_representation", self.file, context=body, length=1.0, height=height, thickness=0.1
+            )
+            ifcopenshell.api.run(
+                "geometry.assign_representation", self.file, product=wall, representation=representation
+            )
+            ifcopenshell.api.run(
+                "style.assign_representation_styles", self.file, shape_representation=representation, styles=[style]
+            )
+            items.append(representation.Items[0])
+
+        ifcpatch.execute({"file": self.file, "recipe": "SplitByBuildingStorey", "arguments": [str(tmp_path)]})
+
+        for i, (name, item) in enumerate(zip(("A", "B"), items)):
+            output = ifcopenshell.open(os.path.join(tmp_path, f"{i}-{name}.ifc"))
+            # Only the wall's own representation items are included, even though the style is shared
+            assert [e.Depth for e in output.by_type("IfcExtrudedAreaSolid")] == [item.Depth]
+            assert len(output.by_type("IfcStyledItem")) == 1
+            assert len(output.by_type("IfcSurfaceStyle")) == 1
+
+    def test_splitting_elements_by_a_value(self, tmp_path):
+        ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcProject")
+        ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall", name="Foo")
+        ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcSlab", name="Foo")
+        ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcSlab", name="Bar")
+
+        ifcpatch.execute(
+            {"file": self.file, "recipe": "SplitByBuildingStorey", "arguments": [str(tmp_path), "IfcElement", "Name"]}
+        )
+
+        output = ifcopenshell.open(os.path.join(tmp_path, "0-Foo.ifc"))
+        assert len(output.by_type("IfcElement")) == 2
+        output = ifcopenshell.open(os.path.join(tmp_path, "1-Bar.ifc"))
+        assert len(output.by_type("IfcElement")) == 1
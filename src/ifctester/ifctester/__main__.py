@@ -39,6 +39,9 @@ parser.add_argument(
 parser.add_argument(
     "-o", "--output", help="Output file (supported for all types of reporting except Console)"
 )
+parser.add_argument(
+    "-j", "--jobs", type=int, help="The number of processes to validate with. Defaults to 1", default=1
+)
 args = parser.parse_args()
 
 specs = ids.open(args.ids)
@@ -47,7 +50,7 @@ if args.ifc:
     ifc = ifcopenshell.open(args.ifc)
     print("Finished loading:", time.time() - start)
     start = time.time()
-    specs.validate(ifc)
+    specs.validate(ifc, jobs=args.jobs)
     print("Finished validating:", time.time() - start)
 
 if args.reporter == "Console":
@@ -22,7 +22,7 @@ import builtins
 import ifcopenshell.util.unit
 import ifcopenshell.util.element
 import ifcopenshell.util.classification
-from functools import lru_cache
+from collections import OrderedDict
 from xmlschema.validators import identities
 from typing import Union, Optional, Any, Literal, TYPE_CHECKING, TypedDict
 from logging import Logger
@@ -48,14 +48,133 @@ def cast_to_value(from_value, to_value):
         pass
 
 
-@lru_cache
+class EvaluationContext:
+    """Memoises element lookups shared by facets across all specifications
+
+    Many specifications check the same property sets, classifications,
+    materials and parents of the same elements. Whilst a validation run is
+    active, these lookups are cached by element so that they are only
+    computed once. The least recently used entries are discarded beyond
+    ``max_size`` entries. Outside of a run nothing is cached, so that facets
+    may be called on models which are being edited.
+    """
+
+    def __init__(self, max_size: int = 200000):
+        self.max_size = max_size
+        self.is_active = False
+        self.cache = OrderedDict()
+        self.hits = {}
+        self.misses = {}
+
+    def start(self) -> None:
+        self.clear()
+        self.is_active = True
+
+    def stop(self) -> dict[str, dict[str, int]]:
+        self.is_active = False
+        statistics = self.get_statistics()
+        self.clear()
+        return statistics
+
+    def clear(self) -> None:
+        self.cache.clear()
+        self.hits.clear()
+        self.misses.clear()
+
+    def get_statistics(self, since: Optional[dict[str, dict[str, int]]] = None) -> dict[str, dict[str, int]]:
+        """Gets the number of cache hits and misses of each kind of lookup
+
+        :param since: Previous statistics to subtract, to count lookups made
+            after that point.
+        """
+        since = since or {}
+        return {
+            kind: {
+                "hits": self.hits.get(kind, 0) - since.get(kind, {}).get("hits", 0),
+                "misses": self.misses.get(kind, 0) - since.get(kind, {}).get("misses", 0),
+            }
+            for kind in sorted(set(self.hits) | set(self.misses))
+        }
+
+    @staticmethod
+    def merge_statistics(*all_statistics: dict[str, dict[str, int]]) -> dict[str, dict[str, int]]:
+        results = {}
+        for statistics in all_statistics:
+            for kind, counts in statistics.items():
+                result = results.setdefault(kind, {"hits": 0, "misses": 0})
+                result["hits"] += counts["hits"]
+                result["misses"] += counts["misses"]
+        return dict(sorted(results.items()))
+
+    def get(self, kind: str, key: Any, getter) -> Any:
+        if not self.is_active:
+            return getter()
+        try:
+            value = self.cache[(kind, key)]
+            self.cache.move_to_end((kind, key))
+            self.hits[kind] = self.hits.get(kind, 0) + 1
+            return value
+        except KeyError:
+            pass
+        value = getter()
+        self.misses[kind] = self.misses.get(kind, 0) + 1
+        self.cache[(kind, key)] = value
+        if len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+        return value
+
+    def get_pset(self, element: ifcopenshell.entity_instance, pset: str) -> dict:
+        return self.get("pset", (element, pset), lambda: ifcopenshell.util.element.get_pset(element, pset))
+
+    def get_psets(self, element: ifcopenshell.entity_instance) -> dict:
+        return self.get("psets", element, lambda: ifcopenshell.util.element.get_psets(element))
+
+    def get_references(self, element: ifcopenshell.entity_instance) -> set[ifcopenshell.entity_instance]:
+        def get_references():
+            leaf_references = ifcopenshell.util.classification.get_references(element)
+            references = leaf_references.copy()
+            for leaf_reference in leaf_references:
+                references.update(ifcopenshell.util.classification.get_inherited_references(leaf_reference))
+            return references
+
+        return self.get("classification", element, get_references)
+
+    def get_material(self, element: ifcopenshell.entity_instance) -> Optional[ifcopenshell.entity_instance]:
+        return self.get(
+            "material", element, lambda: ifcopenshell.util.element.get_material(element, should_skip_usage=True)
+        )
+
+    def get_aggregate(self, element: ifcopenshell.entity_instance) -> Optional[ifcopenshell.entity_instance]:
+        return self.get("aggregate", element, lambda: ifcopenshell.util.element.get_aggregate(element))
+
+    def get_parent(self, element: ifcopenshell.entity_instance, getter) -> Optional[ifcopenshell.entity_instance]:
+        return self.get("parent", element, lambda: getter(element))
+
+
+context = EvaluationContext()
+
+
 def get_pset(element, pset):
-    return ifcopenshell.util.element.get_pset(element, pset)
+    return context.get_pset(element, pset)
 
 
-@lru_cache
 def get_psets(element):
-    return ifcopenshell.util.element.get_psets(element)
+    return context.get_psets(element)
+
+
+def get_objects_and_occurrences(objects) -> list[ifcopenshell.entity_instance]:
+    """Adds the occurrences of any types, as occurrences inherit relationships from their type
+
+    :return: A list of unique objects, sorted by ID for a deterministic order.
+    """
+    results = set()
+    for obj in objects:
+        if obj is None:
+            continue
+        results.add(obj)
+        if obj.is_a("IfcTypeObject"):
+            results.update(ifcopenshell.util.element.get_types(obj))
+    return sorted(results, key=lambda e: e.id())
 
 
 Cardinality = Literal["required", "optional", "prohibited"]
@@ -378,17 +497,19 @@ class Classification(Facet):
     ) -> list[ifcopenshell.entity_instance]:
         if isinstance(elements, list):
             return super().filter(ifc_file, elements)
-        return ifc_file.by_type("IfcObjectDefinition")
+        if self.cardinality != "required":
+            return ifc_file.by_type("IfcObjectDefinition")
+        # Only objects with a classification association can be classified
+        objects = set()
+        for rel in ifc_file.by_type("IfcRelAssociatesClassification"):
+            objects.update(o for o in rel.RelatedObjects if o.is_a("IfcObjectDefinition"))
+        return get_objects_and_occurrences(objects)
 
     def __call__(self, inst: ifcopenshell.entity_instance, logger: Optional[Logger] = None) -> ClassificationResult:
         if self.cardinality == "optional":
             return ClassificationResult(True)  # Is this really the correct behaviour?
 
-        leaf_references = ifcopenshell.util.classification.get_references(inst)
-
-        references = leaf_references.copy()
-        for leaf_reference in leaf_references:
-            references.update(ifcopenshell.util.classification.get_inherited_references(leaf_reference))
+        references = context.get_references(inst)
 
         is_pass = bool(references)
         reason = None
@@ -442,7 +563,22 @@ class PartOf(Facet):
     ) -> list[ifcopenshell.entity_instance]:
         if isinstance(elements, list):
             return super().filter(ifc_file, elements)
-        return list(ifc_file)  # Lazy
+        if self.cardinality != "required":
+            return list(ifc_file)  # Lazy
+        # Only elements on the child side of the relationship can pass
+        if self.relation == "IFCRELAGGREGATES":
+            objects = [o for r in ifc_file.by_type("IfcRelAggregates") for o in r.RelatedObjects]
+        elif self.relation == "IFCRELASSIGNSTOGROUP":
+            objects = [o for r in ifc_file.by_type("IfcRelAssignsToGroup") for o in r.RelatedObjects]
+        elif self.relation == "IFCRELNESTS":
+            objects = [o for r in ifc_file.by_type("IfcRelNests") for o in r.RelatedObjects]
+        elif self.relation == "IFCRELVOIDSELEMENT IFCRELFILLSELEMENT":
+            objects = [r.RelatedOpeningElement for r in ifc_file.by_type("IfcRelVoidsElement")]
+            objects.extend(r.RelatedBuildingElement for r in ifc_file.by_type("IfcRelFillsElement"))
+        else:
+            # Containment and parent lookups may be inherited through aggregates
+            return list(ifc_file)  # Lazy
+        return sorted(set(objects), key=lambda e: e.id())
 
     def asdict(self, clause_type: str) -> dict[str, Any]:
         results = super().asdict(clause_type)
@@ -482,7 +618,7 @@ class PartOf(Facet):
             if not is_pass:
                 reason = {"type": "ENTITY", "actual": ancestors}
         elif self.relation == "IFCRELAGGREGATES":
-            aggregate = ifcopenshell.util.element.get_aggregate(inst)
+            aggregate = context.get_aggregate(inst)
             is_pass = aggregate is not None
             if not is_pass:
                 reason = {"type": "NOVALUE"}
@@ -498,7 +634,7 @@ class PartOf(Facet):
                         else:
                             is_pass = True
                         break
-                    aggregate = ifcopenshell.util.element.get_aggregate(aggregate)
+                    aggregate = context.get_aggregate(aggregate)
                 if not is_pass:
                     reason = {"type": "ENTITY", "actual": ancestors}
         elif self.relation == "IFCRELASSIGNSTOGROUP":
@@ -592,7 +728,10 @@ class PartOf(Facet):
             return rel.RelatingOpeningElement
 
     def get_parent(self, element):
-        parent = ifcopenshell.util.element.get_aggregate(element)
+        return context.get_parent(element, self.get_uncached_parent)
+
+    def get_uncached_parent(self, element):
+        parent = context.get_aggregate(element)
         if not parent:
             parent = ifcopenshell.util.element.get_container(element, should_get_direct=True)
         if not parent:
@@ -648,13 +787,32 @@ class Property(Facet):
     ) -> list[ifcopenshell.entity_instance]:
         if isinstance(elements, list):
             return super().filter(ifc_file, elements)
-        if ifc_file.schema == "IFC2X3":
-            return ifc_file.by_type("IfcObjectDefinition")
-        return (
-            ifc_file.by_type("IfcObjectDefinition")
-            + ifc_file.by_type("IfcMaterialDefinition")
-            + ifc_file.by_type("IfcProfileDef")
-        )
+        if self.cardinality != "required":
+            if ifc_file.schema == "IFC2X3":
+                return ifc_file.by_type("IfcObjectDefinition")
+            return (
+                ifc_file.by_type("IfcObjectDefinition")
+                + ifc_file.by_type("IfcMaterialDefinition")
+                + ifc_file.by_type("IfcProfileDef")
+            )
+
+        # Start from property sets with a matching name, so only elements carrying them are checked
+        objects = set()
+        for definition in ifc_file.by_type("IfcPropertySetDefinition"):
+            if definition.Name == self.propertySet:
+                for inverse in ifc_file.get_inverse(definition):
+                    if inverse.is_a("IfcRelDefinesByProperties"):
+                        objects.update(inverse.RelatedObjects)
+                    elif inverse.is_a("IfcTypeObject"):
+                        objects.add(inverse)
+        if ifc_file.schema != "IFC2X3":
+            for definition in ifc_file.by_type("IfcMaterialProperties"):
+                if definition.Name == self.propertySet:
+                    objects.add(definition.Material)
+            for definition in ifc_file.by_type("IfcProfileProperties"):
+                if definition.Name == self.propertySet:
+                    objects.add(definition.ProfileDefinition)
+        return get_objects_and_occurrences(objects)
 
     def __call__(self, inst: ifcopenshell.entity_instance, logger: Optional[Logger] = None) -> PropertyResult:
         if self.cardinality == "optional":
@@ -915,13 +1073,19 @@ class Material(Facet):
     ) -> list[ifcopenshell.entity_instance]:
         if isinstance(elements, list):
             return super().filter(ifc_file, elements)
-        return ifc_file.by_type("IfcObjectDefinition")
+        if self.cardinality != "required":
+            return ifc_file.by_type("IfcObjectDefinition")
+        # Only objects with a material association can have a material
+        objects = set()
+        for rel in ifc_file.by_type("IfcRelAssociatesMaterial"):
+            objects.update(o for o in rel.RelatedObjects if o.is_a("IfcObjectDefinition"))
+        return get_objects_and_occurrences(objects)
 
     def __call__(self, inst: ifcopenshell.entity_instance, logger: Optional[Logger] = None) -> MaterialResult:
         if self.cardinality == "optional":
             return MaterialResult(True)
 
-        material = ifcopenshell.util.element.get_material(inst, should_skip_usage=True)
+        material = context.get_material(inst)
 
         is_pass = material is not None
         reason = None
@@ -19,6 +19,7 @@
 from __future__ import annotations
 import os
 import datetime
+import multiprocessing
 import ifcopenshell
 from xmlschema import XMLSchema
 from xmlschema import etree_tostring
@@ -32,8 +33,7 @@ from .facet import (
     PartOf,
     Material,
     Restriction,
-    get_pset,
-    get_psets,
+    context,
     Cardinality,
     FacetFailure,
 )
@@ -42,6 +42,13 @@ from typing import List, Optional, Union, overload, Literal
 cwd = os.path.dirname(os.path.realpath(__file__))
 schema = None
 
+# Set in the parent before forking so that workers inherit the model and candidates
+_worker_ids = None
+
+
+def _validate_shard(shard):
+    return _worker_ids.validate_shard(*shard)
+
 
 @overload
 def open(filepath: str, validate: Literal[False] = False) -> Ids: ...
@@ -77,6 +84,8 @@ class Ids:
         # Not part of the IDS spec, but very useful in practice
         self.filepath: Optional[str] = None
         self.filename: Optional[str] = None
+        # Hits and misses of each kind of cached lookup during the last validation
+        self.cache_statistics: dict[str, dict[str, int]] = {}
 
         self.specifications: List[Specification] = []
         self.info = {}
@@ -139,17 +148,94 @@ class Ids:
         ET.ElementTree(get_schema().encode(self.asdict())).write(filepath, encoding="utf-8", xml_declaration=True)
         return get_schema().is_valid(filepath)
 
-    def validate(self, ifc_file: ifcopenshell.file, filter_version=False, filepath: Optional[str] = None) -> None:
+    def validate(
+        self, ifc_file: ifcopenshell.file, filter_version=False, filepath: Optional[str] = None, jobs: int = 1
+    ) -> None:
+        """Validates an IFC model against all specifications
+
+        :param ifc_file: The IFC model to validate
+        :param filter_version: If true, specifications which do not apply to
+            the schema of the model are skipped.
+        :param filepath: The path of the model, used for reporting
+        :param jobs: The number of processes to validate with. If more than
+            one, the applicable elements of every specification are split
+            into shards and each process validates all specifications for
+            its shard. Results are identical to validating with one process.
+        """
         if filepath:
             self.filepath = filepath
             self.filename = os.path.basename(filepath)
         else:
             self.filepath = self.filename = None
-        get_pset.cache_clear()
-        get_psets.cache_clear()
+        worker_statistics = []
+        context.start()
+        try:
+            if jobs > 1 and "fork" in multiprocessing.get_all_start_methods():
+                worker_statistics = self.validate_parallel(ifc_file, filter_version=filter_version, jobs=jobs)
+            else:
+                for specification in self.specifications:
+                    specification.reset_status()
+                    specification.validate(ifc_file, filter_version=filter_version)
+        finally:
+            statistics = context.stop()
+        self.cache_statistics = context.merge_statistics(statistics, *worker_statistics)
+
+    def validate_parallel(self, ifc_file: ifcopenshell.file, filter_version=False, jobs: int = 2) -> list[dict]:
+        global _worker_ids
+        self.candidates = []
         for specification in self.specifications:
             specification.reset_status()
-            specification.validate(ifc_file, filter_version=filter_version)
+            if filter_version and ifc_file.schema not in specification.ifcVersion:
+                self.candidates.append(None)
+            else:
+                self.candidates.append(specification.filter(ifc_file))
+
+        _worker_ids = self
+        try:
+            with multiprocessing.get_context("fork").Pool(jobs) as pool:
+                shard_results = pool.map(_validate_shard, [(i, jobs) for i in range(jobs)])
+        finally:
+            _worker_ids = None
+
+        # Elements are merged back in their original order, as if validated in a single process
+        for i, specification in enumerate(self.specifications):
+            if self.candidates[i] is None:
+                continue
+            applicable = sorted(p for shard, statistics in shard_results for p in shard[i][0])
+            specification.applicable_entities.extend(self.candidates[i][p] for p in applicable)
+            for j, facet in enumerate(specification.requirements):
+                failures = sorted(f for shard, statistics in shard_results for f in shard[i][1][j])
+                for position, reason in failures:
+                    element = self.candidates[i][position]
+                    specification.failed_entities.add(element)
+                    facet.failures.append(FacetFailure(element=element, reason=reason))
+            specification.update_status()
+        self.candidates = []
+        return [statistics for shard, statistics in shard_results]
+
+    def validate_shard(self, shard: int, total_shards: int) -> tuple[list, dict]:
+        """Validates every nth candidate element of all specifications
+
+        :return: For each specification, a tuple of the positions of
+            applicable candidates, and for each requirement a list of
+            (position, reason) failures. This is returned along with the
+            cache statistics of the shard.
+        """
+        start_statistics = context.get_statistics()
+        results = []
+        for specification, candidates in zip(self.specifications, self.candidates):
+            if candidates is None:
+                results.append(None)
+                continue
+            positions = range(shard, len(candidates), total_shards)
+            applicable, failures = specification.validate_elements([candidates[p] for p in positions])
+            results.append(
+                (
+                    [positions[i] for i in applicable],
+                    [[(positions[i], reason) for i, reason in facet_failures] for facet_failures in failures],
+                )
+            )
+        return results, context.get_statistics(since=start_statistics)
 
 
 class Specification:
@@ -248,6 +334,16 @@ class Specification:
         if filter_version and ifc_file.schema not in self.ifcVersion:
             return
 
+        elements = self.filter(ifc_file)
+        applicable, failures = self.validate_elements(elements)
+        self.applicable_entities.extend(elements[i] for i in applicable)
+        for facet, facet_failures in zip(self.requirements, failures):
+            for i, reason in facet_failures:
+                self.failed_entities.add(elements[i])
+                facet.failures.append(FacetFailure(element=elements[i], reason=reason))
+        self.update_status()
+
+    def filter(self, ifc_file: ifcopenshell.file) -> list[ifcopenshell.entity_instance]:
         elements = None
 
         # This is a broadphase filter of applicability. We almost never want to
@@ -255,7 +351,19 @@ class Specification:
         for i, facet in enumerate(self.applicability):
             elements = facet.filter(ifc_file, elements)
 
-        for element in elements or []:
+        return list(elements or [])
+
+    def validate_elements(
+        self, elements: list[ifcopenshell.entity_instance]
+    ) -> tuple[list[int], list[list[tuple[int, str]]]]:
+        """Checks candidate elements against the applicability and requirements
+
+        :return: A tuple of the indices of applicable elements, and for each
+            requirement a list of (index, reason) failures.
+        """
+        applicable = []
+        failures = [[] for facet in self.requirements]
+        for i, element in enumerate(elements):
             is_applicable = True
             for facet in self.applicability:
                 if isinstance(facet, Entity):
@@ -265,19 +373,19 @@ class Specification:
                     break
             if not is_applicable:
                 continue
-            self.applicable_entities.append(element)
-            for facet in self.requirements:
+            applicable.append(i)
+            for facet, facet_failures in zip(self.requirements, failures):
                 result = facet(element)
                 is_pass = bool(result)
                 if self.maxOccurs != 0:  # This is a required or optional specification
                     if not is_pass:
-                        self.failed_entities.add(element)
-                        facet.failures.append(FacetFailure(element=element, reason=str(result)))
+                        facet_failures.append((i, str(result)))
                 else:  # This is a prohibited specification
                     if is_pass:
-                        self.failed_entities.add(element)
-                        facet.failures.append(FacetFailure(element=element, reason=str(result)))
+                        facet_failures.append((i, str(result)))
+        return applicable, failures
 
+    def update_status(self) -> None:
         self.status = True
         for facet in self.requirements:
             facet.status = not bool(facet.failures)
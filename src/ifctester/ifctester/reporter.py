@@ -70,6 +70,13 @@ class Results(TypedDict):
     total_checks_pass: int
     total_checks_fail: int
     percent_checks_pass: ResultsPercent
+    cache_statistics: dict[str, ResultsCacheStatistics]
+
+
+class ResultsCacheStatistics(TypedDict):
+    hits: int
+    misses: int
+    percent_hits: ResultsPercent
 
 
 class ResultsSpecification(TypedDict):
@@ -280,6 +287,14 @@ class Json(Reporter):
         self.results["percent_checks_pass"] = (
             math.floor((total_checks_pass / total_checks) * 100) if total_checks else "N/A"
         )
+        self.results["cache_statistics"] = {}
+        for kind, statistics in self.ids.cache_statistics.items():
+            total_lookups = statistics["hits"] + statistics["misses"]
+            self.results["cache_statistics"][kind] = {
+                "hits": statistics["hits"],
+                "misses": statistics["misses"],
+                "percent_hits": math.floor((statistics["hits"] / total_lookups) * 100) if total_lookups else "N/A",
+            }
         return self.results
 
     def report_specification(self, specification: Specification) -> ResultsSpecification:
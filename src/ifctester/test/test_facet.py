@@ -30,8 +30,7 @@ def set_facet(facet):
 
 
 def run(name, *, facet, inst, expected):
-    ifctester.facet.get_pset.cache_clear()
-    ifctester.facet.get_psets.cache_clear()
+    ifctester.facet.context.clear()
     assert bool(facet(inst)) is expected
 
 
@@ -1229,6 +1228,26 @@ class TestProperty:
         run("Properties can be overriden by an occurrence 1/2", facet=facet, inst=wall, expected=True)
         run("Properties can be overriden by an occurrence 2/2", facet=facet, inst=wall_type, expected=False)
 
+    def test_filtering_candidates_from_property_sets(self):
+        ifc = self.setup_ifc()
+        wall = ifcopenshell.api.run("root.create_entity", ifc, ifc_class="IfcWall")
+        typed_wall = ifcopenshell.api.run("root.create_entity", ifc, ifc_class="IfcWall")
+        ifcopenshell.api.run("root.create_entity", ifc, ifc_class="IfcSlab")
+        wall_type = ifcopenshell.api.run("root.create_entity", ifc, ifc_class="IfcWallType")
+        ifcopenshell.api.run("type.assign_type", ifc, related_objects=[typed_wall], relating_type=wall_type)
+        for product in (wall, wall_type):
+            pset = ifcopenshell.api.run("pset.add_pset", ifc, product=product, name="Foo_Bar")
+            ifcopenshell.api.run("pset.edit_pset", ifc, pset=pset, properties={"Foo": "Bar"})
+        material = ifcopenshell.api.run("material.add_material", ifc)
+        pset = ifcopenshell.api.run("pset.add_pset", ifc, product=material, name="Foo_Bar")
+        ifcopenshell.api.run("pset.edit_pset", ifc, pset=pset, properties={"Foo": "Bar"})
+
+        facet = Property(propertySet="Foo_Bar", baseName="Foo", dataType="IFCLABEL")
+        assert facet.filter(ifc, None) == sorted([wall, typed_wall, wall_type, material], key=lambda e: e.id())
+        assert Property(propertySet="Foo_Baz", baseName="Foo").filter(ifc, None) == []
+        facet = Property(propertySet="Foo_Bar", baseName="Foo", cardinality="prohibited")
+        assert len(facet.filter(ifc, None)) > 4
+
     def setup_ifc(self):
         ifc = ifcopenshell.file()
         ifc.createIfcProject()
@@ -1253,6 +1272,17 @@ class TestMaterial:
             "@instructions": "instructions",
         }
 
+    def test_filtering_candidates_from_material_associations(self):
+        ifc = ifcopenshell.file()
+        element = ifcopenshell.api.run("root.create_entity", ifc, ifc_class="IfcWall")
+        typed_element = ifcopenshell.api.run("root.create_entity", ifc, ifc_class="IfcWall")
+        ifcopenshell.api.run("root.create_entity", ifc, ifc_class="IfcWall")
+        element_type = ifcopenshell.api.run("root.create_entity", ifc, ifc_class="IfcWallType")
+        ifcopenshell.api.run("type.assign_type", ifc, related_objects=[typed_element], relating_type=element_type)
+        material = ifcopenshell.api.run("material.add_material", ifc)
+        ifcopenshell.api.run("material.assign_material", ifc, products=[element, element_type], material=material)
+        assert Material().filter(ifc, None) == [element, typed_element, element_type]
+
     def test_filtering_using_a_material_facet(self):
         set_facet("material")
 
@@ -1420,6 +1450,15 @@ class TestPartOf:
             "@instructions": "instructions",
         }
 
+    def test_filtering_candidates_from_relationships(self):
+        ifc = ifcopenshell.file()
+        element = ifcopenshell.api.run("root.create_entity", ifc, ifc_class="IfcElementAssembly")
+        subelement = ifcopenshell.api.run("root.create_entity", ifc, ifc_class="IfcWall")
+        ifcopenshell.api.run("root.create_entity", ifc, ifc_class="IfcWall")
+        ifcopenshell.api.run("aggregate.assign_object", ifc, products=[subelement], relating_object=element)
+        assert PartOf(name="IFCELEMENTASSEMBLY", relation="IFCRELAGGREGATES").filter(ifc, None) == [subelement]
+        assert PartOf(name="IFCGROUP", relation="IFCRELASSIGNSTOGROUP").filter(ifc, None) == []
+
     def test_filtering_using_a_partof_facet(self):
         set_facet("partof")
 
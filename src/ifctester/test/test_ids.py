@@ -20,6 +20,8 @@ import os
 import pytest
 import xmlschema
 import ifcopenshell
+import ifcopenshell.api
+import ifctester.facet
 from ifctester import ids
 from typing import Optional
 
@@ -249,6 +251,58 @@ class TestIds:
         assert spec.requirements[0].failures[0]["element"] == wall
         assert spec2.requirements[0].failures[0]["element"] == wall
 
+    def test_validating_with_multiple_jobs(self):
+        specs = ids.Ids(title="Title")
+        spec = ids.Specification(name="Name")
+        spec.applicability.append(ids.Entity(name="IFCWALL"))
+        spec.requirements.append(ids.Attribute(name="Name", value="Waldo"))
+        specs.specifications.append(spec)
+
+        spec2 = ids.Specification(name="Name")
+        spec2.applicability.append(ids.Entity(name="IFCSLAB"))
+        spec2.requirements.append(ids.Attribute(name="Description", value="Foobar"))
+        specs.specifications.append(spec2)
+
+        model = ifcopenshell.file()
+        walls = [model.createIfcWall(Name="Waldo" if i % 3 else None) for i in range(10)]
+        slabs = [model.createIfcSlab(Description="Foobar") for i in range(5)]
+
+        specs.validate(model, jobs=3)
+        assert spec.status is False
+        assert spec.applicable_entities == walls
+        assert spec.failed_entities == set(walls[::3])
+        assert [f["element"] for f in spec.requirements[0].failures] == walls[::3]
+        assert spec2.status is True
+        assert spec2.applicable_entities == slabs
+
+        failures = [(f["element"], f["reason"]) for f in spec.requirements[0].failures]
+        specs.validate(model)
+        assert spec.applicable_entities == walls
+        assert [(f["element"], f["reason"]) for f in spec.requirements[0].failures] == failures
+
+    def test_lookups_are_cached_across_specifications(self):
+        specs = ids.Ids(title="Title")
+        for value in ("Bar", "Baz"):
+            spec = ids.Specification(name="Name")
+            spec.applicability.append(ids.Entity(name="IFCWALL"))
+            spec.requirements.append(
+                ids.Property(propertySet="Foo_Bar", baseName="Foo", dataType="IFCLABEL", value=value)
+            )
+            specs.specifications.append(spec)
+
+        model = ifcopenshell.file()
+        for i in range(3):
+            wall = ifcopenshell.api.run("root.create_entity", model, ifc_class="IfcWall")
+            pset = ifcopenshell.api.run("pset.add_pset", model, product=wall, name="Foo_Bar")
+            ifcopenshell.api.run("pset.edit_pset", model, pset=pset, properties={"Foo": "Bar"})
+
+        specs.validate(model)
+        assert specs.specifications[0].status is True
+        assert specs.specifications[1].status is False
+        assert specs.cache_statistics["pset"] == {"hits": 3, "misses": 3}
+        assert not ifctester.facet.context.is_active
+        assert not ifctester.facet.context.cache
+
 
 class TestSpecification:
     def test_create_specification_with_minimal_information(self):